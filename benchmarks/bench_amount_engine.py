@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+AMOUNT standardization for a transaction-heavy statement: re.sub +
+float() and a spread dict per item (the old _standardize_amounts) vs.
+amount_engine.parse_amounts over the whole column.
+
+    python benchmarks/bench_amount_engine.py [--amounts 10000]
+"""
+import argparse
+import os
+import random
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from amount_engine import parse_amounts
+from entity_table import EntityTable
+from ner_post_processor import NERPostProcessor
+
+
+def legacy_standardize_amount(amount_str):
+    cleaned = re.sub(r'[^\d.,]', '', amount_str)
+    cleaned = cleaned.replace(',', '').replace(' ', '')
+    return {'value': float(cleaned)}
+
+
+def legacy_standardize_amounts(items):
+    return [
+        {'original': item['text'], **legacy_standardize_amount(item['text']), 'start': item.get('start'),
+         'end': item.get('end')}
+        for item in items
+    ]
+
+
+def indian_grouping(value):
+    digits = str(value)
+    head, tail = digits[:-3], digits[-3:]
+    groups = [head[max(i - 2, 0):i] for i in range(len(head), 0, -2)][::-1]
+    return ','.join(groups + [tail])
+
+
+def random_amount(rng):
+    value = rng.randint(1, 9_999_999)
+    western, indian = f"{value:,}", indian_grouping(value)
+    return rng.choice([f"${western}.{rng.randint(0, 99):02d}", f"INR {indian}", f"USD {value}", f"({western})",
+                       f"Rs. {indian}/-", f"€{western}"])
+
+
+def best_of(fn, arg, repeat=3):
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn(arg)
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--amounts", type=int, default=10_000)
+    args = ap.parse_args()
+
+    rng = random.Random(0)
+    items = [{'text': random_amount(rng), 'start': i * 20, 'end': i * 20 + 12} for i in range(args.amounts)]
+    texts = [item['text'] for item in items]
+    processor = NERPostProcessor()
+
+    print(f"{len(items)} amounts")
+    print(f"legacy per-item          {best_of(legacy_standardize_amounts, items):8.4f}s")
+    print(f"parse_amounts (arrays)   {best_of(parse_amounts, texts):8.4f}s")
+    table = EntityTable.from_dicts({'AMOUNT': items})
+    print(f"_standardize_amounts     {best_of(processor._standardize_amounts, table):8.4f}s")
+    columns = parse_amounts(texts)
+    print(f"valid {int(columns.valid.sum())}/{len(columns)}, arrays {columns.values.nbytes + columns.currency.nbytes + columns.valid.nbytes} bytes")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+"""
+Date parsing in ValidationRules: dateutil.parser.parse on every value
+(the old standardize_date / validate_date_logic) vs. parse_date, which
+handles the common statement layouts itself and only falls back to
+dateutil for anything else.
+
+    python benchmarks/bench_date_parsing.py [--dates 50000] [--odd 0.05]
+
+Outputs are compared value by value before timing.
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'tests'))
+
+from dateutil import parser
+
+from reference import date_corpus, outcome
+from validation_rules import ValidationRules
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--dates", type=int, default=50_000)
+    ap.add_argument("--odd", type=float, default=0.05, help="share of layouts outside the fast path")
+    args = ap.parse_args()
+
+    dates = date_corpus(args.dates, args.odd, random.Random(0))
+    mismatches = [d for d in dates if outcome(parser.parse, d) != outcome(ValidationRules.parse_date, d)]
+    assert not mismatches, mismatches[:10]
+
+    timings = {}
+    for name, parse in (("dateutil", parser.parse), ("parse_date", ValidationRules.parse_date)):
+        started = time.perf_counter()
+        for value in dates:
+            outcome(parse, value)
+        timings[name] = time.perf_counter() - started
+
+    print(f"{len(dates)} dates, outputs identical")
+    print(f"dateutil    {timings['dateutil']:8.3f}s")
+    print(f"parse_date  {timings['parse_date']:8.3f}s  {timings['dateutil'] / timings['parse_date']:6.1f}x")
+    print(ValidationRules.date_parse_stats())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+DATE standardization: one to_iso8601 call per entity with uncompiled
+re.match (the old standardize_entities) vs. the deduplicated, memoized
+DateStandardizer.to_iso8601_many.
+
+    python benchmarks/bench_date_standardizer.py [--entities 200000] [--distinct 400]
+
+Statements repeat the same dates, so the batch path only parses each
+distinct string once, and later documents hit the per-worker cache.
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'tests'))
+
+from date_standardizer import DateStandardizer, _cached_iso8601
+from reference import legacy_to_iso8601, random_date
+
+
+def best_of(fn, values, repeat=3, setup=None):
+    best = float("inf")
+    for _ in range(repeat):
+        if setup:
+            setup()
+        started = time.perf_counter()
+        fn(values)
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--entities", type=int, default=200_000)
+    ap.add_argument("--distinct", type=int, default=400)
+    args = ap.parse_args()
+
+    rng = random.Random(0)
+    pool = [random_date(rng) for _ in range(args.distinct)]
+    dates = [rng.choice(pool) for _ in range(args.entities)]
+    assert DateStandardizer.to_iso8601_many(dates) == [legacy_to_iso8601(d) for d in dates]
+
+    legacy = best_of(lambda values: [legacy_to_iso8601(d) for d in values], dates)
+    cold = best_of(DateStandardizer.to_iso8601_many, dates, setup=_cached_iso8601.cache_clear)
+    warm = best_of(DateStandardizer.to_iso8601_many, dates)
+    print(f"{len(dates)} dates, {len(set(dates))} distinct")
+    print(f"legacy per-item  {legacy:8.3f}s")
+    print(f"batch, cold      {cold:8.3f}s  {legacy / cold:6.1f}x")
+    print(f"batch, warm      {warm:8.3f}s  {legacy / warm:6.1f}x")
+    try:
+        import pandas as pd
+    except ImportError:
+        return
+    series = pd.Series(dates)
+    print(f"pandas Series    {best_of(DateStandardizer.to_iso8601_many, series):8.3f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+"""
+Heuristic entity extraction: separate re.finditer pass per pattern
+(the old build_demo_entities) vs. the single-pass EntityScanner.
+
+    python benchmarks/bench_entity_scanner.py [--max-mb 16]
+
+Scan time per MB should stay flat as the document grows.
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'tests'))
+
+from entity_scanner import default_scanner
+from reference import legacy_scan, synthetic_statement
+
+
+def best_of(fn, text, repeat=3):
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn(text)
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--max-mb", type=float, default=16)
+    args = ap.parse_args()
+
+    rng = random.Random(0)
+    print(f"{'size':>8} {'legacy s':>10} {'scanner s':>10} {'speedup':>8} {'scanner s/MB':>13}")
+    size = 256 * 1024
+    while size <= args.max_mb * 1024 * 1024:
+        text = synthetic_statement(size, rng)
+        legacy = best_of(legacy_scan, text)
+        scanner = best_of(default_scanner.scan, text)
+        mb = len(text) / (1024 * 1024)
+        print(f"{mb:7.2f}M {legacy:10.3f} {scanner:10.3f} {legacy / scanner:7.2f}x {scanner / mb:13.4f}")
+        size *= 2
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+NERPostProcessor on a large synthetic statement: the old dict-per-stage
+pipeline (every stage rebuilt each item with {**item, ...}) vs. the
+EntityTable columns updated in place.
+
+    python benchmarks/bench_entity_table.py [--entities 100000]
+
+Reports wall time and peak traced allocation for each variant; the
+"table only" row stops before to_dicts(), i.e. what internal consumers
+(validation, scoring, streaming) pay.
+"""
+import argparse
+import gc
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'tests'))
+
+from entity_table import EntityTable
+from ner_post_processor import NERPostProcessor
+from reference import legacy_process, synthetic_entities
+
+
+def measure(fn, repeat=3):
+    """(result, best wall time, peak traced allocation); timing runs untraced"""
+    best = float("inf")
+    for _ in range(repeat):
+        gc.collect()
+        started = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - started)
+    gc.collect()
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, best, peak
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--entities", type=int, default=100_000)
+    args = ap.parse_args()
+
+    entities = synthetic_entities(args.entities, random.Random(0))
+    text = "Statement of account"
+    processor = NERPostProcessor()
+
+    legacy, legacy_s, legacy_peak = measure(lambda: legacy_process(entities, text))
+    table, table_s, table_peak = measure(lambda: processor.process_table(EntityTable.from_dicts(entities), text))
+    dicts, full_s, full_peak = measure(
+        lambda: processor.process_table(EntityTable.from_dicts(entities), text).to_dicts())
+    assert dicts == legacy
+
+    print(f"{sum(len(v) for v in entities.values())} entities")
+    print(f"{'variant':<22} {'seconds':>8} {'peak MB':>8}")
+    print(f"{'legacy dict stages':<22} {legacy_s:8.3f} {legacy_peak / 2**20:8.1f}")
+    print(f"{'table only':<22} {table_s:8.3f} {table_peak / 2**20:8.1f}")
+    print(f"{'table + to_dicts':<22} {full_s:8.3f} {full_peak / 2**20:8.1f}")
+    print(f"table columns: {table.nbytes / 2**20:.1f} MB for {len(table)} rows")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Gazetteer automaton: build time and peak memory for a synthetic
+counterparty list, size on disk, load time of the prebuilt file, and
+scan throughput. With --regex the same names are also matched by one
+big case-insensitive alternation, the obvious alternative.
+
+    python benchmarks/bench_gazetteer.py [--names 100000] [--mb 2] [--regex]
+"""
+import argparse
+import os
+import random
+import re
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from gazetteer import Gazetteer, suffix_entries
+
+WORDS = ["Acme", "Global", "Sunrise", "Northern", "Blue", "River", "Summit", "Pioneer", "Apex", "Crescent", "Harbor",
+         "Silver", "Eagle", "Metro", "Prime", "Royal", "Union", "Vertex", "Western", "Zenith", "Alpha", "Delta"]
+KINDS = ["Traders", "Textiles", "Logistics", "Foods", "Motors", "Pharma", "Steel", "Software", "Agro", "Exports"]
+
+
+def synthetic_names(count, rng):
+    names = set()
+    while len(names) < count:
+        names.add(f"{rng.choice(WORDS)} {rng.choice(WORDS)}{rng.randint(1, 9999)} {rng.choice(KINDS)}")
+    return sorted(names)
+
+
+def synthetic_text(size, names, rng):
+    lines, total = [], 0
+    while total < size:
+        payee = rng.choice(names) if rng.random() < 0.5 else f"{rng.choice(WORDS)} {rng.choice(KINDS)} Pvt Ltd"
+        line = f"{rng.randint(1, 28):02d}/03/2024 transfer to {payee} ref {rng.randint(10000, 99999)} INR 1,250.00\n"
+        lines.append(line)
+        total += len(line)
+    return "".join(lines)
+
+
+def best_of(fn, text, repeat=3):
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn(text)
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--names", type=int, default=100_000)
+    ap.add_argument("--mb", type=float, default=2)
+    ap.add_argument("--regex", action="store_true", help="also time a single alternation regex")
+    args = ap.parse_args()
+
+    rng = random.Random(0)
+    names = synthetic_names(args.names, rng)
+    text = synthetic_text(int(args.mb * 1024 * 1024), names, rng)
+    mb = len(text) / (1024 * 1024)
+
+    tracemalloc.start()
+    started = time.perf_counter()
+    gazetteer = Gazetteer.build([(name, 'PARTY') for name in names] + suffix_entries())
+    build = time.perf_counter() - started
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    print(f"build:  {len(gazetteer)} entries, {len(gazetteer.char)} states in {build:.2f}s, "
+          f"peak {peak / 2**20:.1f} MB, automaton {gazetteer.nbytes / 2**20:.1f} MB")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "names.gaz")
+        gazetteer.save(path)
+        started = time.perf_counter()
+        loaded = Gazetteer.load(path)
+        print(f"load:   {os.path.getsize(path) / 2**20:.1f} MB file in {time.perf_counter() - started:.3f}s")
+
+    scan = best_of(loaded.scan, text)
+    found = len(loaded.scan(text))
+    print(f"scan:   {mb:.2f} MB, {found} entities in {scan:.3f}s ({mb / scan:.2f} MB/s)")
+
+    if args.regex:
+        started = time.perf_counter()
+        pattern = re.compile(r"\b(?:" + "|".join(re.escape(n) for n in names) + r")\b", re.IGNORECASE)
+        compiled = time.perf_counter() - started
+        regex = best_of(lambda t: pattern.findall(t), text)
+        print(f"regex:  compile {compiled:.2f}s, scan {regex:.3f}s ({mb / regex:.2f} MB/s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Image preprocessing before OCR: ms/page for the pipeline, how well the
+skew estimate recovers the tilt, and (when Tesseract is installed) OCR
+accuracy and time per page with and without preprocessing.
+
+The fixtures are statement pages rendered at --dpi and degraded like
+phone scans: tilted, unevenly lit, low contrast and noisy. --save DIR
+writes them as PNG + ground-truth .txt pairs; --fixtures DIR reads such
+pairs (e.g. real scans) instead of generating them.
+
+    python benchmarks/bench_image_preprocess.py [--pages 20] [--dpi 300] [--fixtures DIR] [--save DIR]
+"""
+import argparse
+import difflib
+import glob
+import os
+import random
+import sys
+import time
+
+import cv2
+import fitz  # PyMuPDF
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from image_preprocess import deskew, gray_view, preprocess
+from ocr_stage import _read, tesseract_version
+
+WORDS = ["payment", "ACME", "BANK", "credit", "debit", "balance", "reference", "transfer", "opening", "closing",
+         "INR", "Pvt", "Ltd", "salary", "interest"]
+
+
+def clean_page(rng, dpi):
+    lines = [f"{rng.randint(1, 28):02d}/03/2024 {' '.join(rng.choice(WORDS) for _ in range(5))} "
+             f"{rng.randint(100, 99999):,}.00" for _ in range(28)]
+    doc = fitz.open()
+    page = doc.new_page()
+    for i, line in enumerate(lines):
+        page.insert_text((50, 60 + i * 26), line, fontsize=11)
+    pix = page.get_pixmap(dpi=dpi, colorspace=fitz.csGRAY)
+    gray = gray_view(pix).copy()
+    doc.close()
+    return gray, "\n".join(lines)
+
+
+def degrade(gray, rng):
+    """Tilt, shade, flatten contrast and add sensor noise"""
+    angle = rng.uniform(-6, 6)
+    image = deskew(gray, angle).astype(np.float32)
+    height, width = image.shape
+    light = np.linspace(rng.uniform(0.55, 0.8), 1.0, width, dtype=np.float32)
+    if rng.random() < 0.5:
+        light = light[::-1]
+    image = 60 + image * 0.6 * light
+    image += np.random.default_rng(rng.randint(0, 2**32)).normal(0, 12, image.shape).astype(np.float32)
+    return np.clip(image, 0, 255).astype(np.uint8), -angle
+
+
+def fixtures(args, rng):
+    if args.fixtures:
+        for path in sorted(glob.glob(os.path.join(args.fixtures, "*.png"))):
+            with open(os.path.splitext(path)[0] + ".txt", encoding="utf-8") as f:
+                yield os.path.basename(path), cv2.imread(path, cv2.IMREAD_GRAYSCALE), f.read(), None
+        return
+    for n in range(args.pages):
+        gray, truth = clean_page(rng, args.dpi)
+        image, angle = degrade(gray, rng)
+        name = f"page_{n:03d}.png"
+        if args.save:
+            os.makedirs(args.save, exist_ok=True)
+            cv2.imwrite(os.path.join(args.save, name), image)
+            with open(os.path.join(args.save, name[:-4] + ".txt"), "w", encoding="utf-8") as f:
+                f.write(truth)
+        yield name, image, truth, angle
+
+
+def accuracy(text, truth):
+    return difflib.SequenceMatcher(None, " ".join(text.split()), " ".join(truth.split()), autojunk=False).ratio()
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--pages", type=int, default=20)
+    ap.add_argument("--dpi", type=int, default=300)
+    ap.add_argument("--fixtures", help="directory of page PNGs with ground-truth .txt files")
+    ap.add_argument("--save", help="write the generated fixtures here")
+    args = ap.parse_args()
+
+    ocr = tesseract_version() is not None
+    if not ocr:
+        print("tesseract not installed: OCR accuracy columns skipped")
+    rng = random.Random(0)
+    prep_ms, skew_errors, rows = [], [], []
+    for name, image, truth, angle in fixtures(args, rng):
+        started = time.perf_counter()
+        cleaned, steps = preprocess(image, args.dpi)
+        prep_ms.append((time.perf_counter() - started) * 1000)
+        if angle is not None:
+            skew_errors.append(abs(steps["skew"] - angle))
+        if ocr:
+            started = time.perf_counter()
+            raw_text, raw_conf = _read(image, "eng")
+            raw_ms = (time.perf_counter() - started) * 1000
+            started = time.perf_counter()
+            prep_text, prep_conf = _read(cleaned, "eng")
+            ocr_ms = (time.perf_counter() - started) * 1000
+            rows.append((accuracy(raw_text, truth), accuracy(prep_text, truth), raw_conf or 0, prep_conf or 0,
+                         raw_ms, ocr_ms + prep_ms[-1]))
+
+    print(f"pages: {len(prep_ms)} at {image.shape[1]}x{image.shape[0]}")
+    print(f"preprocess: {np.mean(prep_ms):.1f} ms/page (p95 {np.percentile(prep_ms, 95):.1f})")
+    if skew_errors:
+        print(f"skew error: mean {np.mean(skew_errors):.2f}°, max {np.max(skew_errors):.2f}°")
+    if rows:
+        raw_acc, prep_acc, raw_conf, prep_conf, raw_ms, prep_total = np.array(rows).T
+        print(f"{'':>14} {'accuracy':>9} {'confidence':>11} {'ms/page':>8}")
+        print(f"{'raw':>14} {raw_acc.mean():9.3f} {raw_conf.mean():11.1f} {raw_ms.mean():8.0f}")
+        print(f"{'preprocessed':>14} {prep_acc.mean():9.3f} {prep_conf.mean():11.1f} {prep_total.mean():8.0f}")
+
+
+if __name__ == "__main__":
+    main()
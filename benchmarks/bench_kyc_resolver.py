@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+KYC resolution: trigram index lookups vs. a brute-force scan of the
+master list with difflib, on OCR-corrupted copies of master names.
+Reports build / save / load time, lookup latency and how often the right
+entry comes back first.
+
+    python benchmarks/bench_kyc_resolver.py [--entries 300000] [--queries 500] [--brute 3]
+"""
+import argparse
+import difflib
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from kyc_resolver import KYCResolver
+
+WORDS = ["Acme", "Global", "Sunrise", "Northern", "Blue", "River", "Summit", "Pioneer", "Apex", "Crescent", "Harbor",
+         "Silver", "Eagle", "Metro", "Prime", "Royal", "Union", "Vertex", "Western", "Zenith", "Alpha", "Delta",
+         "Kaveri", "Lotus", "Orion", "Sterling", "Trident", "Unity", "Vista", "Wave"]
+KINDS = ["Traders", "Textiles", "Logistics", "Foods", "Motors", "Pharma", "Steel", "Software", "Agro", "Exports",
+         "Finance", "Realty", "Chemicals", "Power", "Retail"]
+FORMS = ["Corporation", "Limited", "Pvt Ltd", "Inc", "LLP", "Private Limited", "Company"]
+OCR_ERRORS = [("o", "0"), ("O", "0"), ("l", "1"), ("I", "l"), ("i", "l"), ("m", "rn"), ("S", "5"), ("B", "8")]
+
+
+def synthetic_master(count, rng):
+    names = set()
+    while len(names) < count:
+        names.add(f"{rng.choice(WORDS)} {rng.choice(WORDS)}{rng.randint(1, 999)} {rng.choice(KINDS)} {rng.choice(FORMS)}")
+    return [(f"KYC{i:07d}", name) for i, name in enumerate(sorted(names))]
+
+
+def ocr_noise(name, rng):
+    """Upper-case half the time, then one or two OCR confusions"""
+    noisy = name.upper() if rng.random() < 0.5 else name
+    for _ in range(rng.randint(1, 2)):
+        wrong, right = rng.choice(OCR_ERRORS)
+        positions = [i for i in range(len(noisy)) if noisy.startswith(wrong, i)]
+        if positions:
+            i = rng.choice(positions)
+            noisy = noisy[:i] + right + noisy[i + len(wrong):]
+    return noisy
+
+
+def brute_force(master, name):
+    best = max(master, key=lambda entry: difflib.SequenceMatcher(None, name.lower(), entry[1].lower()).ratio())
+    return best[0]
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--entries", type=int, default=300_000)
+    ap.add_argument("--queries", type=int, default=500)
+    ap.add_argument("--brute", type=int, default=3, help="queries to time with the brute-force scan (0 to skip)")
+    args = ap.parse_args()
+
+    rng = random.Random(0)
+    master = synthetic_master(args.entries, rng)
+    queries = [(entity_id, ocr_noise(name, rng)) for entity_id, name in rng.sample(master, args.queries)]
+
+    started = time.perf_counter()
+    resolver = KYCResolver.build(master)
+    print(f"build:  {len(resolver)} entries, {len(resolver.postings)} trigrams in {time.perf_counter() - started:.2f}s")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "kyc.idx")
+        started = time.perf_counter()
+        resolver.save(path)
+        saved = time.perf_counter() - started
+        started = time.perf_counter()
+        resolver = KYCResolver.load(path)
+        print(f"save:   {os.path.getsize(path) / 2**20:.1f} MB in {saved:.2f}s, load {time.perf_counter() - started:.2f}s")
+
+    latencies, hits = [], 0
+    for entity_id, name in queries:
+        started = time.perf_counter()
+        matches = resolver.search(name)
+        latencies.append((time.perf_counter() - started) * 1000)
+        hits += bool(matches) and matches[0]['id'] == entity_id
+    latencies.sort()
+    print(f"index:  p50 {statistics.median(latencies):.2f} ms, p95 {latencies[int(len(latencies) * 0.95)]:.2f} ms, "
+          f"top-1 {hits / len(queries):.1%}")
+
+    if args.brute:
+        sample = queries[:args.brute]
+        started = time.perf_counter()
+        hits = sum(brute_force(master, name) == entity_id for entity_id, name in sample)
+        per_query = (time.perf_counter() - started) * 1000 / len(sample)
+        print(f"brute:  {per_query:.0f} ms per query, top-1 {hits / len(sample):.1%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Metrics overhead: the cost of one ``with stage(...)`` block with metrics
+enabled, disabled (the shared no-op timer) and without instrumentation,
+then analyze_text on a synthetic document with metrics on vs. off, plus
+how long a /api/metrics scrape takes to render.
+
+    python benchmarks/bench_metrics.py [--calls 200000] [--chars 20000 200000]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+import metrics
+from document_pipeline import analyze_text
+from metrics import registry, stage
+
+WORDS = ["payment", "ACME", "BANK", "credit", "debit", "2024-01-15", "$1,234.00", "balance", "reference", "Pvt",
+         "Ltd", "transfer", "opening", "closing", "INR", "12,34,567.00", "between", "agreement", "dated", "XYZ"]
+
+
+def best_of(fn, arg, repeat=5):
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn(arg)
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def bare(calls):
+    for _ in range(calls):
+        pass
+
+
+def timed_blocks(calls):
+    for _ in range(calls):
+        with stage("bench"):
+            pass
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--calls", type=int, default=200_000)
+    ap.add_argument("--chars", type=int, nargs="+", default=[20_000, 200_000])
+    args = ap.parse_args()
+
+    base = best_of(bare, args.calls)
+    enabled = best_of(timed_blocks, args.calls)
+    registry.enabled = False
+    disabled = best_of(timed_blocks, args.calls)
+    registry.enabled = True
+    print(f"{'stage() block':<22} {'ns/call':>8}")
+    for name, seconds in (("enabled", enabled), ("disabled", disabled)):
+        print(f"{name:<22} {(seconds - base) / args.calls * 1e9:8.0f}")
+
+    rng = random.Random(0)
+    print(f"\n{'chars':>8} {'on s':>8} {'off s':>8} {'overhead':>9}")
+    for chars in args.chars:
+        words = []
+        while sum(map(len, words)) + len(words) < chars:
+            words.append(rng.choice(WORDS))
+        text = " ".join(words)
+        analyze_text(text, "warm.pdf")
+        on = best_of(lambda t: analyze_text(t, "bench.pdf"), text, repeat=3)
+        registry.enabled = False
+        off = best_of(lambda t: analyze_text(t, "bench.pdf"), text, repeat=3)
+        registry.enabled = True
+        print(f"{chars:8d} {on:8.3f} {off:8.3f} {(on - off) / off:9.2%}")
+
+    render = best_of(lambda _: registry.render(), None, repeat=20)
+    series = sum(1 for line in registry.render().splitlines() if not line.startswith("#"))
+    print(f"\nrender: {render * 1e3:.2f} ms for {series} samples ({len(metrics.STAGE_SECONDS.values)} stage series)")
+
+
+if __name__ == "__main__":
+    main()
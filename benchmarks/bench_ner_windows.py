@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+Windowed NER: time and peak traced memory (tracemalloc, which sees the
+numpy/thinc buffers) for one long synthetic statement run through the
+models/legal_ner pipeline as a single Doc vs. as overlapping windows.
+Whole-document runs stop at spaCy's 1M-character nlp.max_length.
+
+    python benchmarks/bench_ner_windows.py [--chars 100000 400000 900000] [--window 10000] [--overlap 500]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from ner_service import NERService
+
+WORDS = ["payment", "ACME", "BANK", "Ltd", "credit", "debit", "2024-01-15", "$1,234.00", "balance", "reference",
+         "transfer", "Delaware", "agreement", "between", "INR", "12,34,567.00"]
+
+
+def synthetic_text(chars, rng):
+    lines, size = [], 0
+    while size < chars:
+        line = " ".join(rng.choice(WORDS) for _ in range(12)) + ".\n"
+        lines.append(line)
+        size += len(line)
+    return "".join(lines)[:chars]
+
+
+def measure(service, text):
+    tracemalloc.start()
+    started = time.perf_counter()
+    entities = service.predict([text])[0]
+    seconds = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return seconds, peak, sum(len(v) for v in entities.values())
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--chars", type=int, nargs="+", default=[100_000, 400_000, 900_000])
+    ap.add_argument("--window", type=int, default=10_000)
+    ap.add_argument("--overlap", type=int, default=500)
+    args = ap.parse_args()
+
+    whole = NERService(window_chars=10**9, window_overlap=0)
+    windowed = NERService(window_chars=args.window, window_overlap=args.overlap)
+    windowed.nlp = whole.load()
+    rng = random.Random(0)
+
+    print(f"{'chars':>8} {'mode':>9} {'windows':>8} {'seconds':>8} {'peak MB':>8} {'entities':>9}")
+    for chars in args.chars:
+        text = synthetic_text(chars, rng)
+        for mode, service in (("whole", whole), ("windowed", windowed)):
+            if mode == "whole" and chars > service.nlp.max_length:
+                print(f"{chars:8d} {mode:>9} {'-':>8} {'too long for one Doc':>28}")
+                continue
+            seconds, peak, found = measure(service, text)
+            print(f"{chars:8d} {mode:>9} {service.last_batch['windows']:8d} {seconds:8.2f} {peak / 2**20:8.1f} "
+                  f"{found:9d}")
+
+
+if __name__ == "__main__":
+    main()
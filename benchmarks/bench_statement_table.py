@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Statement table extraction: a synthetic bank statement (right-aligned
+amounts, multi-line narrations, a header and footer on every page)
+through PyMuPDF word boxes and StatementTable.from_words, reporting the
+word extraction and the table parse separately, plus how many rows came
+back exact and whether the running balance checks out.
+
+    python benchmarks/bench_statement_table.py [--rows 1000 10000 50000]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+import fitz  # PyMuPDF
+
+from statement_table import StatementTable
+
+ROWS_PER_PAGE = 50
+NARRATIONS = ["UPI/{}/GROCERY", "NEFT/{}/SALARY ACME PVT LTD", "ATM WDL {}", "IMPS/{}/RENT", "POS {} FUEL"]
+
+
+def right(page, x, text, y):
+    page.insert_text((x - fitz.get_text_length(text, fontsize=8), y), text, fontsize=8)
+
+
+def synthetic_statement(rows, rng):
+    doc = fitz.open()
+    balance, expected = 10_000.0, []
+    for i in range(rows):
+        if i % ROWS_PER_PAGE == 0:
+            page = doc.new_page()
+            page.insert_text((40, 40), "ACME BANK LTD  Statement of Account", fontsize=10)
+            page.insert_text((280, 830), f"Page {doc.page_count}", fontsize=8)
+            y = 60
+            page.insert_text((40, y), "Date", fontsize=8)
+            page.insert_text((110, y), "Narration", fontsize=8)
+            for x, name in ((360, "Withdrawals"), (440, "Deposits"), (520, "Balance")):
+                right(page, x, name, y)
+            y += 14
+        amount = round(rng.uniform(1, 50_000), 2)
+        debit = rng.random() < 0.6
+        balance = round(balance - amount if debit else balance + amount, 2)
+        narration = rng.choice(NARRATIONS).format(rng.randint(10**6, 10**7))
+        page.insert_text((40, y), f"{1 + i % 28:02d}/{1 + i // 28 % 12:02d}/2024", fontsize=8)
+        page.insert_text((110, y), narration, fontsize=8)
+        right(page, 360 if debit else 440, f"{amount:,.2f}", y)
+        right(page, 520, f"{balance:,.2f}", y)
+        if i % 5 == 0:
+            y += 10
+            page.insert_text((110, y), "REF MUMBAI MAIN BRANCH", fontsize=8)
+            narration += " REF MUMBAI MAIN BRANCH"
+        expected.append((narration, balance))
+        y += 12
+    data = doc.tobytes()
+    doc.close()
+    return data, expected
+
+
+def words(data):
+    with fitz.open(stream=data) as doc:
+        return [page.get_text("words", sort=False) for page in doc]
+
+
+def best_of(fn, arg, repeat=3):
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn(arg)
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--rows", type=int, nargs="+", default=[1_000, 10_000, 50_000])
+    args = ap.parse_args()
+
+    rng = random.Random(0)
+    print(f"{'rows':>7} {'words':>8} {'words s':>8} {'parse s':>8} {'rows/s':>9} {'exact':>7} {'balance':>8}")
+    for rows in args.rows:
+        data, expected = synthetic_statement(rows, rng)
+        pages = words(data)
+        extract = best_of(words, data)
+        parse = best_of(StatementTable.from_words, pages)
+        table = StatementTable.from_words(pages)
+        frame = table.frame
+        exact = sum(1 for (narration, balance), got, got_balance
+                    in zip(expected, frame["description"], frame["balance"]) if got == narration
+                    and got_balance == balance)
+        check = "ok" if table.balance_check()["consistent"] else "FAIL"
+        print(f"{rows:7d} {sum(map(len, pages)):8d} {extract:8.3f} {parse:8.3f} {rows / parse:9.0f} "
+              f"{exact / rows:7.1%} {check:>8}")
+
+
+if __name__ == "__main__":
+    main()
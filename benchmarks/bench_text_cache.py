@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+Text cache: extracting and cleaning a synthetic statement PDF vs. reading
+the same stage outputs back from the compressed cache.
+
+    python benchmarks/bench_text_cache.py [--pages 50 200 1000]
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+import fitz  # PyMuPDF
+
+from text_cache import TextCache, extract_and_clean
+
+WORDS = ["payment", "ACME", "BANK", "credit", "debit", "2024-01-15", "$1,234.00", "balance", "reference", "Pvt",
+         "Ltd", "transfer", "opening", "closing", "INR", "12,34,567.00"]
+
+
+def synthetic_pdf(pages, rng):
+    doc = fitz.open()
+    for _ in range(pages):
+        page = doc.new_page()
+        for line in range(40):
+            page.insert_text((40, 40 + line * 18), " ".join(rng.choice(WORDS) for _ in range(12)), fontsize=9)
+    data = doc.tobytes()
+    doc.close()
+    return data
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--pages", type=int, nargs="+", default=[50, 200, 1000])
+    args = ap.parse_args()
+
+    rng = random.Random(0)
+    print(f"{'pages':>6} {'chars':>9} {'miss ms':>9} {'hit ms':>8} {'speedup':>8} {'on disk':>9}")
+    for pages in args.pages:
+        pdf = synthetic_pdf(pages, rng)
+        with tempfile.TemporaryDirectory() as tmp:
+            cache = TextCache(tmp)
+            started = time.perf_counter()
+            extracted, cleaned, _ = extract_and_clean(pdf, cache, parallel=False)
+            miss = time.perf_counter() - started
+            started = time.perf_counter()
+            extract_and_clean(pdf, TextCache(tmp))
+            hit = time.perf_counter() - started
+            size = cache.stats()["bytes"]
+        chars = len(extracted.text) + len(cleaned)
+        print(f"{pages:6d} {chars:9d} {miss * 1000:9.1f} {hit * 1000:8.1f} {miss / hit:7.0f}x {size / 1024:8.1f}K")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+"""
+OCR text cleaning throughput: the original multi-pass normalize_text
+vs. the compiled TextCleaner.normalize_text.
+
+    python benchmarks/bench_text_cleaner.py [--mb 4]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'tests'))
+
+from reference import SAMPLE_LINES, legacy_normalize_text
+from text_cleaner import TextCleaner
+
+
+def synthetic_ocr(size, rng):
+    lines, total = [], 0
+    while total < size:
+        line = rng.choice(SAMPLE_LINES)
+        lines.append(line)
+        total += len(line)
+    return "".join(lines)
+
+
+def best_of(fn, text, repeat=3):
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn(text)
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--mb", type=float, default=4)
+    args = ap.parse_args()
+
+    text = synthetic_ocr(int(args.mb * 1024 * 1024), random.Random(0))
+    assert TextCleaner.normalize_text(text) == legacy_normalize_text(text)
+
+    mb = len(text.encode("utf-8")) / (1024 * 1024)
+    legacy = best_of(legacy_normalize_text, text)
+    compiled = best_of(TextCleaner.normalize_text, text)
+    print(f"input: {mb:.2f} MB")
+    print(f"legacy   : {legacy:7.3f} s  {mb / legacy:7.2f} MB/s")
+    print(f"compiled : {compiled:7.3f} s  {mb / compiled:7.2f} MB/s  ({legacy / compiled:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -6,6 +6,7 @@ function DocumentParser() {
   const [data, setData] = useState(null);
   const [loading, setLoading] = useState(false);
   const [error, setError] = useState("");
+  const [pagesDone, setPagesDone] = useState(0);
 
   const handleFileUpload = async (e) => {
     const selectedFile = e.target.files[0];
@@ -15,22 +16,86 @@ function DocumentParser() {
     setLoading(true);
     setError("");
     setData(null);
+    setPagesDone(0);
 
     const formData = new FormData();
     formData.append("file", selectedFile);
 
     try {
-      const response = await fetch("http://127.0.0.1:8000/api/process", {
-        method: "POST",
-        body: formData,
-      });
+      // stream page-by-page results so entities show up while the rest
+      // of the document is still being processed
+      const response = await fetch(
+        "http://127.0.0.1:8000/api/process?stream=ndjson",
+        {
+          method: "POST",
+          body: formData,
+        }
+      );
 
-      const result = await response.json();
-      if (result.success) {
-        setData(result);
-      } else {
+      if (!response.ok || !response.body) {
+        const result = await response.json();
         setError(result.error || "Processing failed");
+        return;
       }
+
+      const reader = response.body.getReader();
+      const decoder = new TextDecoder();
+      let buffer = "";
+      let current = {
+        success: true,
+        filename: selectedFile.name,
+        entities: {},
+        text: "",
+        summary: { total_entities: 0, entity_types: 0 },
+      };
+
+      const applyRecord = (record) => {
+        if (record.type === "error") {
+          setError(record.error || "Processing failed");
+          return;
+        }
+        if (record.type === "page") {
+          const entities = { ...current.entities };
+          Object.entries(record.entities).forEach(([label, items]) => {
+            entities[label] = [...(entities[label] || []), ...items];
+          });
+          // page slices of the cleaned text join without a separator
+          const text = current.text + record.text;
+          current = {
+            ...current,
+            entities,
+            text,
+            text_length: text.length,
+            quality_score: record.quality_score,
+            validation_report: record.validation_report,
+            summary: {
+              total_entities: Object.values(entities).reduce(
+                (n, items) => n + items.length,
+                0
+              ),
+              entity_types: Object.values(entities).filter((v) => v.length)
+                .length,
+            },
+          };
+          setPagesDone(record.page);
+        } else if (record.type === "summary") {
+          // a cached document arrives as one summary carrying the full result
+          current = record.cached
+            ? { ...record }
+            : { ...current, ...record, text: current.text };
+        }
+        setData(current);
+      };
+
+      for (;;) {
+        const { done, value } = await reader.read();
+        if (done) break;
+        buffer += decoder.decode(value, { stream: true });
+        const lines = buffer.split("\n");
+        buffer = lines.pop();
+        lines.filter(Boolean).forEach((line) => applyRecord(JSON.parse(line)));
+      }
+      if (buffer.trim()) applyRecord(JSON.parse(buffer));
     } catch (err) {
       setError("Server error: " + err.message);
     } finally {
@@ -127,7 +192,7 @@ function DocumentParser() {
           />
           {loading && (
             <p style={{ color: "#6b7280", fontSize: "12px", margin: 0 }}>
-              ⏳ Processing...
+              ⏳ Processing...{pagesDone > 0 && ` (${pagesDone} page(s) done)`}
             </p>
           )}
           {file && !loading && (
@@ -0,0 +1,135 @@
+import re
+from typing import Dict, Optional, Sequence
+
+import numpy as np
+
+# currency as written → ISO 4217; index 0 means no currency was given
+CURRENCY_TOKENS = (
+    '', '$', 'US$', '€', '£', '₹', '¥', 'Rs', 'Rs.',
+    'USD', 'INR', 'EUR', 'GBP', 'JPY', 'AUD', 'CAD', 'SGD', 'AED', 'CHF',
+)
+CURRENCY_ISO = (
+    '', 'USD', 'USD', 'EUR', 'GBP', 'INR', 'JPY', 'INR', 'INR',
+    'USD', 'INR', 'EUR', 'GBP', 'JPY', 'AUD', 'CAD', 'SGD', 'AED', 'CHF',
+)
+CURRENCY_INDEX = {token: i for i, token in enumerate(CURRENCY_TOKENS) if token}
+
+# text before the number | the number | text after it, one line per amount.
+# Lines without a number match the empty alternative and come out blank.
+AMOUNT_FIELDS_RE = re.compile(r'^(?:([^\d\n]*)(\d[\d,]*(?:\.\d+)?)([^\d\n]*)|.*)$', re.MULTILINE)
+
+# numbers with plain digits, Western 1,234,567 or Indian lakh/crore 12,34,567 grouping
+WELL_GROUPED_RE = re.compile(
+    r'^(?:\d+|\d{1,3}(?:,\d{3})+|\d{1,2}(?:,\d{2})*,\d{3})(?:\.\d+)?$', re.MULTILINE
+)
+
+
+class AmountColumns:
+    """
+    Parsed amounts as parallel typed arrays: ``values`` (float64, NaN when
+    no number was found), ``currency`` (int8 index into CURRENCY_TOKENS,
+    0 = none) and ``valid`` (bool: a number with well-formed grouping and
+    balanced parentheses).
+    """
+
+    __slots__ = ('values', 'currency', 'valid')
+
+    def __init__(self, values: np.ndarray, currency: np.ndarray, valid: np.ndarray):
+        self.values = values
+        self.currency = currency
+        self.valid = valid
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    @property
+    def currency_codes(self) -> np.ndarray:
+        """ISO 4217 code per amount ('' when no currency was given)"""
+        return np.asarray(CURRENCY_ISO, dtype=object)[self.currency]
+
+    def total(self, currency: Optional[str] = None) -> float:
+        """Sum of the valid amounts, optionally for one ISO currency only"""
+        mask = self.valid
+        if currency is not None:
+            mask = mask & (self.currency_codes == currency)
+        return float(self.values[mask].sum())
+
+    def record(self, i: int) -> Dict:
+        """One amount in the {value, currency, currency_code, valid} shape of standardize_amount"""
+        value = self.values[i]
+        token = int(self.currency[i])
+        return {
+            'value': None if np.isnan(value) else float(value),
+            'currency': CURRENCY_TOKENS[token] or None,
+            'currency_code': CURRENCY_ISO[token] or None,
+            'valid': bool(self.valid[i]),
+        }
+
+
+def parse_amounts(texts: Sequence[str]) -> AmountColumns:
+    """
+    Parse a list or pandas Series of amount strings in one go. The column
+    is joined into one string and split into fields by a single findall,
+    so there is no regex call per string; the few distinct prefixes and
+    suffixes (currency, sign, parentheses) are decoded once each.
+    """
+    texts = texts.tolist() if hasattr(texts, 'tolist') else list(texts)
+    count = len(texts)
+    if not count:
+        return AmountColumns(np.empty(0), np.empty(0, dtype=np.int8), np.empty(0, dtype=bool))
+    try:
+        joined = '\n'.join(texts)
+    except TypeError:
+        joined = None
+    if joined is None or joined.count('\n') != count - 1:
+        joined = '\n'.join(t.replace('\n', ' ') if isinstance(t, str) else '' for t in texts)
+    prefixes, numbers, suffixes = zip(*AMOUNT_FIELDS_RE.findall(joined))
+
+    joined_numbers = '\n'.join(numbers)
+    found = np.array(numbers) != ''
+    values = np.where(found, joined_numbers.replace(',', '').split('\n'), 'nan').astype(np.float64)
+    grouped = np.array(WELL_GROUPED_RE.sub('', joined_numbers).split('\n')) == ''
+
+    before = {p: _decode_affix(p, prefix=True) for p in set(prefixes)}
+    after = {p: _decode_affix(p, prefix=False) for p in set(suffixes)}
+    pre = np.fromiter(map(before.__getitem__, prefixes), dtype=np.int16, count=count)
+    post = np.fromiter(map(after.__getitem__, suffixes), dtype=np.int16, count=count)
+
+    values = np.where(pre & NEGATIVE, -values, values)
+    currency = np.where(pre & CURRENCY_MASK, pre & CURRENCY_MASK, post & CURRENCY_MASK).astype(np.int8)
+    valid = (
+        found & grouped
+        & ((pre | post) & UNKNOWN == 0)
+        & ((pre & PARENTHESIS) == (post & PARENTHESIS))
+        & ((pre & CURRENCY_MASK == 0) | (post & CURRENCY_MASK == 0))  # currency on one side only
+    )
+    return AmountColumns(values, currency, valid)
+
+
+# bit flags for a decoded prefix/suffix; the low bits hold the currency index
+CURRENCY_MASK = 0xFF
+PARENTHESIS = 0x100
+NEGATIVE = 0x200
+UNKNOWN = 0x400
+
+
+def _decode_affix(affix: str, prefix: bool) -> int:
+    """'( $ -' or '/- INR)' → currency index | flags"""
+    rest = affix.strip()
+    flags = 0
+    if prefix and rest.startswith('('):
+        flags |= PARENTHESIS | NEGATIVE
+        rest = rest[1:].strip()
+    elif not prefix and rest.endswith(')'):
+        flags |= PARENTHESIS
+        rest = rest[:-1].strip()
+    if prefix:
+        if rest.startswith('-') or rest.endswith('-'):
+            flags |= NEGATIVE
+        rest = rest.strip('- ')
+    elif rest.startswith('/-'):
+        rest = rest[2:].strip()
+    currency = CURRENCY_INDEX.get(rest, 0)
+    if rest and not currency:
+        flags |= UNKNOWN
+    return flags | currency
@@ -1,22 +1,79 @@
-from flask import Flask, request, jsonify
+from flask import Flask, Response, g, request, jsonify, stream_with_context
 from flask_cors import CORS
 import sys, os
-import fitz  # PyMuPDF
+import io
+import json
+import time
+import zipfile
 
 # make sure we can import from src
 sys.path.insert(0, os.path.dirname(__file__))
 
-from ner_post_processor import NERPostProcessor
-from text_cleaner import normalize_text
+from document_pipeline import (
+    ner_batcher,
+    ner_service,
+    process_batch,
+    process_upload,
+    result_cache,
+    stream_document,
+    text_cache,
+    warm_up,
+)
+from job_queue import JobStore, JobWorkerPool
+from metrics import REQUEST_SECONDS, registry, stage
+from ocr_stage import OCR_DPI, OCR_WORKERS, tesseract_version
+from statement_table import extract_statement
+
+# ?stream=<format> on /api/process → response mimetype
+STREAM_FORMATS = {"ndjson": "application/x-ndjson", "sse": "text/event-stream"}
+
+# upper bound on documents accepted in one batch request
+MAX_BATCH_DOCUMENTS = int(os.environ.get("MAX_BATCH_DOCUMENTS", 1000))
+
+# upper bound on the uncompressed size of the PDFs in one zip archive (checked before inflating them)
+MAX_ZIP_BYTES = int(os.environ.get("MAX_ZIP_BYTES", 512 * 1024 * 1024))
+
+# background job workers started inside the server (0 = run `python src/job_queue.py` separately)
+JOB_WORKERS = int(os.environ.get("JOB_WORKERS", 2))
 
 app = Flask(__name__)
 CORS(app)
 
-processor = NERPostProcessor()
+job_store = JobStore()
+job_workers = JobWorkerPool(job_store, workers=JOB_WORKERS)
+
+
+@app.before_request
+def _start_timer():
+    g.request_started = time.perf_counter()
+
+
+@app.after_request
+def _record_latency(response):
+    # streamed responses are timed up to their first byte
+    started = g.pop("request_started", None)
+    if started is not None:
+        REQUEST_SECONDS.observe(time.perf_counter() - started, endpoint=request.endpoint or "unknown",
+                                status=str(response.status_code))
+    return response
+
+
+@app.route("/api/metrics", methods=["GET"])
+def metrics():
+    """Stage latencies, document/page/entity counts and cache hit rates in Prometheus text format"""
+    return Response(registry.render(), mimetype="text/plain; version=0.0.4")
+
 
 @app.route("/api/health", methods=["GET"])
 def health():
-    return jsonify({"status": "ok"})
+    return jsonify({
+        "status": "ok",
+        "ner": ner_service.stats(),
+        "ner_batcher": ner_batcher.stats(),
+        "result_cache": result_cache.stats(),
+        "text_cache": text_cache.stats(),
+        "ocr": {"tesseract": tesseract_version(), "dpi": OCR_DPI, "workers": OCR_WORKERS},
+    })
 
 @app.route("/api/process", methods=["POST"])
 def process_document():
@@ -27,6 +84,9 @@ def process_document():
       - summary.total_entities
       - summary.entity_types
     Your frontend can keep using whatever it already uses for these.
+
+    With ?stream=ndjson (or ?stream=sse) the results are streamed page by
+    page instead, followed by a final "summary" record.
     """
     if "file" not in request.files:
         return jsonify({"success": False, "error": "No file provided"}), 400
@@ -34,98 +94,167 @@ def process_document():
     upload = request.files["file"]
     filename = upload.filename
 
-    # 1) extract text from PDF (simple but works for your demo)
-    text = extract_text_from_pdf(upload)
+    stream = request.args.get("stream")
+    if stream:
+        if stream not in STREAM_FORMATS:
+            return jsonify({"success": False, "error": f"Unknown stream format: {stream}"}), 400
+        records = stream_document(upload.read(), filename)
+        return Response(
+            stream_with_context(_format_records(records, stream)),
+            mimetype=STREAM_FORMATS[stream],
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        )
 
-    # 1.5) clean the extracted text for OCR errors
-    text = normalize_text(text)
+    # extract → clean → entities → Week‑3 post‑processor (cached by content)
+    return jsonify(process_upload(upload, filename))
 
-    # 2) build a SIMPLE demo entity dict from that text
-    #    (replace this later with your real NER model)
-    raw_entities = build_demo_entities(text)
+@app.route("/api/process/batch", methods=["POST"])
+def process_batch_documents():
+    """
+    Expects many PDFs in one multipart request (repeated "files" fields)
+    and/or zip archives of PDFs. Every document runs through the same
+    pipeline as /api/process on a worker pool; a failing document is
+    reported in its own entry and does not fail the batch.
+    """
+    uploads = request.files.getlist("files") + request.files.getlist("file")
+    if not uploads:
+        return jsonify({"success": False, "error": "No files provided"}), 400
 
-    # 3) run Week‑3 post‑processor
-    processed = processor.process(raw_entities, text)
-    entities = processed["entities"]
+    documents = []
+    for upload in uploads:
+        data = upload.read()
+        if (upload.filename or "").lower().endswith(".zip"):
+            try:
+                documents.extend(_read_zip_documents(data, MAX_BATCH_DOCUMENTS - len(documents)))
+            except zipfile.BadZipFile:
+                return jsonify({"success": False, "error": f"Invalid zip archive: {upload.filename}"}), 400
+            except ValueError as exc:
+                return jsonify({"success": False, "error": f"{upload.filename}: {exc}"}), 413
+        else:
+            documents.append((upload.filename, data))
 
-    # 4) compute summary fields your UI needs
-    total_entities = sum(len(v) for v in entities.values())
-    entity_types = len([k for k, v in entities.items() if v])
+    if len(documents) > MAX_BATCH_DOCUMENTS:
+        return jsonify({
+            "success": False,
+            "error": f"Batch has {len(documents)} documents, limit is {MAX_BATCH_DOCUMENTS}",
+        }), 413
+
+    return jsonify(process_batch(documents))
 
-    return jsonify(
-    {
-        "success": True,
-        "filename": filename,
-        "entities": entities,
-        "quality_score": processed["quality_score"],
-        "validation_report": processed["validation_report"],
-        "text": text,  # ← ADD THIS LINE
-        "text_length": len(text),  # ← ADD THIS LINE
-        "summary": {
-            "total_entities": total_entities,
-            "entity_types": entity_types,
-        },
-    }
-)
 
+@app.route("/api/statement", methods=["POST"])
+def extract_statement_table():
+    """
+    Expects a bank statement PDF upload. Returns every transaction row
+    (date, description, debit, credit, balance, page), a summary and the
+    running-balance check; ?format=csv returns the rows as CSV instead.
+    """
+    if "file" not in request.files:
+        return jsonify({"success": False, "error": "No file provided"}), 400
 
-def extract_text_from_pdf(file_storage):
-    """Read text from uploaded PDF using PyMuPDF."""
-    tmp_path = "temp_upload.pdf"
-    file_storage.save(tmp_path)
-    text = ""
+    upload = request.files["file"]
     try:
-        doc = fitz.open(tmp_path)
-        for page in doc:
-            text += page.get_text()
-        doc.close()
-    except Exception:
-        text = ""
-    finally:
-        if os.path.exists(tmp_path):
-            os.remove(tmp_path)
-    return text
-
-def build_demo_entities(text: str):
+        with stage("statement"):
+            table = extract_statement(upload)
+    except Exception as exc:
+        return jsonify({"success": False, "filename": upload.filename, "error": f"{type(exc).__name__}: {exc}"}), 422
+
+    if request.args.get("format") == "csv":
+        return Response(table.frame.to_csv(index=False, date_format="%Y-%m-%d"), mimetype="text/csv")
+    return jsonify({
+        "success": True,
+        "filename": upload.filename,
+        "transactions": table.to_records(),
+        "summary": table.summary(),
+        "balance_check": table.balance_check(),
+    })
+
+
+@app.route("/api/cache/invalidate", methods=["POST"])
+def invalidate_cache():
+    """Drop cached results, e.g. after updating validation rules or the model"""
+    result_cache.invalidate()
+    return jsonify({"success": True, "result_cache": result_cache.stats()})
+
+@app.route("/api/jobs", methods=["POST"])
+def create_job():
     """
-    Very simple heuristic entities so that your UI shows SOMETHING
-    even if no ML model is wired yet.
+    Queue a document for background processing and return its job id
+    right away. Poll GET /api/jobs/<id> for progress and the result.
     """
-    entities = {"DATE": [], "AMOUNT": [], "ORG": []}
-
-    # crude date detection like 2024-01-15, 15/01/2024, January 15, 2024
-    import re
-    date_patterns = [
-        r"\b\d{4}-\d{1,2}-\d{1,2}\b",
-        r"\b\d{1,2}/\d{1,2}/\d{4}\b",
-        r"\b\d{1,2}-\d{1,2}-\d{4}\b",
-        r"\b(?:January|February|March|April|May|June|July|August|September|October|November|December)\s+\d{1,2},\s+\d{4}\b",
-    ]
-    for pat in date_patterns:
-        for m in re.finditer(pat, text):
-            entities["DATE"].append(
-                {"text": m.group(0), "start": m.start(), "end": m.end()}
-            )
-
-    # crude amount detection like $125,000 or 125,000.00
-    amt_pattern = r"\$[0-9][0-9,]*(?:\.[0-9]{2})?"
-    for m in re.finditer(amt_pattern, text):
-        entities["AMOUNT"].append(
-            {"text": m.group(0), "start": m.start(), "end": m.end()}
-        )
+    if "file" not in request.files:
+        return jsonify({"success": False, "error": "No file provided"}), 400
 
-    # crude ORG detection: words in ALL CAPS with “LIMITED/INC/LLC/BANK”
-    org_pattern = r"\b[A-Z][A-Z &]{2,}\b"
-    for m in re.finditer(org_pattern, text):
-        entities["ORG"].append(
-            {"text": m.group(0).strip(), "start": m.start(), "end": m.end()}
-        )
+    upload = request.files["file"]
+    job_id = job_store.submit(upload.filename, upload.read())
+    if JOB_WORKERS > 0:
+        job_workers.start()
 
-    # remove empty labels
-    return {k: v for k, v in entities.items() if v}
+    return jsonify({
+        "success": True,
+        "job_id": job_id,
+        "status": "queued",
+        "status_url": f"/api/jobs/{job_id}",
+    }), 202
 
-if __name__ == "__main__":
-    print("Backend running on http://127.0.0.1:8000")
-    app.run(host="127.0.0.1", port=8000, debug=True)
+@app.route("/api/jobs/<job_id>", methods=["GET"])
+def get_job(job_id):
+    job = job_store.get(job_id)
+    if job is None:
+        return jsonify({"success": False, "error": "Unknown job"}), 404
+
+    response = {
+        "success": job["status"] != "failed",
+        "job_id": job["id"],
+        "filename": job["filename"],
+        "status": job["status"],
+        "stage": job["stage"],
+        "progress": job["progress"],
+        "created_at": job["created_at"],
+        "updated_at": job["updated_at"],
+    }
+    if job["status"] == "done":
+        response["result"] = job["result"]
+    elif job["status"] == "failed":
+        response["error"] = job["error"]
+    return jsonify(response)
+
+
+def _format_records(records, stream_format):
+    for record in records:
+        payload = json.dumps(record)
+        if stream_format == "sse":
+            yield f"event: {record['type']}\ndata: {payload}\n\n"
+        else:
+            yield payload + "\n"
 
 
+def _read_zip_documents(data: bytes, max_documents: int):
+    """
+    (filename, bytes) for every PDF inside a zip archive. The entry count
+    and declared sizes are checked first (ValueError when over the
+    limits), so an archive is never inflated past MAX_ZIP_BYTES.
+    """
+    with zipfile.ZipFile(io.BytesIO(data)) as archive:
+        entries = [
+            info for info in archive.infolist()
+            if not info.is_dir() and info.filename.lower().endswith(".pdf")
+        ]
+        if len(entries) > max_documents:
+            raise ValueError(f"archive has {len(entries)} PDFs, the batch has room for {max(max_documents, 0)}")
+        size = sum(info.file_size for info in entries)
+        if size > MAX_ZIP_BYTES:
+            raise ValueError(f"PDFs inflate to {size} bytes, limit is {MAX_ZIP_BYTES}")
+        # reads stop at each entry's declared file_size, so the check above bounds the total
+        return [(info.filename, archive.read(info)) for info in entries]
+
+if __name__ == "__main__":
+    print("Backend running on http://127.0.0.1:8000")
+    # debug mode runs this block again in the reloader's serving child (WERKZEUG_RUN_MAIN=true);
+    # load the model and start job workers only there, not in the file watcher as well
+    if os.environ.get("WERKZEUG_RUN_MAIN") == "true":
+        warm_up()
+        if JOB_WORKERS > 0:
+            job_workers.start()  # resume jobs queued before a restart
+    # uploads are extracted in memory, so requests can run on parallel threads
+    app.run(host="127.0.0.1", port=8000, debug=True, use_reloader=True, threaded=True)
@@ -1,5 +1,11 @@
+import os
 import re
-from typing import Dict
+from functools import lru_cache
+from typing import Dict, Iterable
+
+# distinct date strings remembered per worker process, across documents
+DATE_CACHE_SIZE = int(os.environ.get("DATE_CACHE_SIZE", 65536))
+
 
 class DateStandardizer:
     """Convert all dates to ISO 8601 format"""
@@ -10,28 +16,53 @@ class DateStandardizer:
         'jan': 1, 'feb': 2, 'mar': 3, 'apr': 4, 'may': 5, 'jun': 6,
         'jul': 7, 'aug': 8, 'sep': 9, 'oct': 10, 'nov': 11, 'dec': 12
     }
+
+    # January 15, 2024
+    MONTH_NAME_PATTERN = re.compile(r'(\w+)\s+(\d{1,2}),?\s+(\d{4})')
+    # 15-01-2024 or 15/01/2024
+    DAY_FIRST_PATTERN = re.compile(r'(\d{1,2})[-/](\d{1,2})[-/](\d{4})')
+    # 2024-01-15
+    YEAR_FIRST_PATTERN = re.compile(r'(\d{4})[-/](\d{1,2})[-/](\d{1,2})')
     
     @classmethod
     def to_iso8601(cls, date_str: str) -> str:
         """Convert any date format to ISO 8601 (YYYY-MM-DD)"""
+        return _cached_iso8601(date_str)
+
+    @classmethod
+    def to_iso8601_many(cls, dates: Iterable[str]):
+        """
+        to_iso8601 over many dates at once. Each distinct string is parsed
+        once (statements repeat the same few dates); a pandas Series comes
+        back as a Series with the same index, anything else as a list.
+        """
+        if hasattr(dates, 'unique') and hasattr(dates, 'map'):
+            return dates.map({value: _cached_iso8601(value) for value in dates.unique()})
+        dates = list(dates)
+        parsed = {value: _cached_iso8601(value) for value in dict.fromkeys(dates)}
+        return [parsed[value] for value in dates]
+
+    @classmethod
+    def cache_info(cls):
+        return _cached_iso8601.cache_info()
+
+    @classmethod
+    def _parse(cls, date_str: str) -> str:
         date_str = date_str.strip().strip('.,')
         
-        # Pattern 1: January 15, 2024
-        m = re.match(r'(\w+)\s+(\d{1,2}),?\s+(\d{4})', date_str)
+        m = cls.MONTH_NAME_PATTERN.match(date_str)
         if m:
             month = cls.MONTHS.get(m.group(1).lower())
             if month:
                 return f"{m.group(3)}-{month:02d}-{int(m.group(2)):02d}"
         
-        # Pattern 2: 15-01-2024 or 15/01/2024
-        m = re.match(r'(\d{1,2})[-/](\d{1,2})[-/](\d{4})', date_str)
+        m = cls.DAY_FIRST_PATTERN.match(date_str)
         if m:
             day, month, year = int(m.group(1)), int(m.group(2)), int(m.group(3))
             if 1 <= month <= 12:
                 return f"{year}-{month:02d}-{day:02d}"
         
-        # Pattern 3: 2024-01-15
-        m = re.match(r'(\d{4})[-/](\d{1,2})[-/](\d{1,2})', date_str)
+        m = cls.YEAR_FIRST_PATTERN.match(date_str)
         if m:
             return f"{m.group(1)}-{int(m.group(2)):02d}-{int(m.group(3)):02d}"
         
@@ -43,15 +74,28 @@ class DateStandardizer:
         standardized = {}
         for label, items in entities.items():
             if label == 'DATE':
+                iso = cls.to_iso8601_many([item['text'] for item in items])
                 standardized[label] = [
                     {
                         'original': item['text'],
-                        'standardized': cls.to_iso8601(item['text']),
+                        'standardized': value,
                         'start': item.get('start'),
                         'end': item.get('end')
                     }
-                    for item in items
+                    for item, value in zip(items, iso)
                 ]
             else:
                 standardized[label] = items
         return standardized
+
+    @classmethod
+    def standardize_table(cls, table):
+        """Fill the value column of every DATE row of an EntityTable"""
+        rows = table.rows('DATE')
+        for i, value in zip(rows, cls.to_iso8601_many([table.text[i] for i in rows])):
+            table.value[i] = value
+
+
+@lru_cache(maxsize=DATE_CACHE_SIZE)
+def _cached_iso8601(date_str: str) -> str:
+    return DateStandardizer._parse(date_str)
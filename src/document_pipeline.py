@@ -0,0 +1,374 @@
+import multiprocessing
+import os
+import time
+from bisect import bisect_left
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from entity_scanner import default_scanner
+from entity_table import EntityTable
+from kyc_resolver import load_default as load_kyc_resolver
+from metrics import DOCUMENTS, ENTITIES, PAGES, cache_samples, registry, stage
+from ner_batcher import MicroBatcher
+from ner_post_processor import NERPostProcessor
+from ner_service import NERService
+from ocr_stage import routing_summary
+from pdf_extractor import ExtractedText, extract_document
+from result_cache import PIPELINE_VERSION, ResultCache, content_hash
+from text_alignment import AlignmentMap
+from text_cache import TextCache, extract_and_clean
+from text_cleaner import normalize_text
+
+# worker pool size for batch uploads (defaults to one worker per core)
+BATCH_WORKERS = int(os.environ.get("BATCH_WORKERS", os.cpu_count() or 1))
+
+# "model" runs the trained spaCy pipeline with the heuristic hits filling in
+# what it misses; "heuristic" uses the regex extractor only
+NER_BACKEND = os.environ.get("NER_BACKEND", "model")
+
+processor = NERPostProcessor()
+ner_service = NERService()
+ner_batcher = MicroBatcher(ner_service)
+# resolves extracted parties against the KYC master list when KYC_INDEX_PATH is set
+kyc_resolver = load_kyc_resolver()
+_MODEL_VERSION = f"{PIPELINE_VERSION}:{NER_BACKEND}:{ner_service.version}"
+
+
+def _result_version() -> str:
+    # read per key: the KYC index can be edited in place while the server runs
+    return f"{_MODEL_VERSION}:{kyc_resolver.version if kyc_resolver else 'no-kyc'}"
+
+
+result_cache = ResultCache(version=_result_version)
+
+# extracted + cleaned text on disk when TEXT_CACHE_DIR is set, so a re-run skips both stages
+text_cache = TextCache()
+
+_batch_pool = None
+
+
+@registry.collector
+def _pipeline_metrics():
+    """Cache and NER counts the pipeline objects already keep, read at scrape time"""
+    ner = ner_service.stats()["totals"]
+    return cache_samples("result_cache", result_cache.stats()) + cache_samples("text_cache", text_cache.stats()) + [
+        ("ner_tokens_total", "counter", "Tokens run through the NER model", [({}, ner["tokens"])]),
+        ("ner_windows_total", "counter", "Texts and text windows run through the NER model", [({}, ner["windows"])]),
+        ("ner_queue_depth", "gauge", "Texts waiting for the NER micro-batcher", [({}, ner_batcher.queue_depth)]),
+    ]
+
+
+def extract_text_from_pdf(file_storage) -> str:
+    """Extracted text of an uploaded PDF (text cache and OCR included); "" when it cannot be read."""
+    try:
+        extracted, _, _ = extract_and_clean(file_storage, text_cache)
+    except Exception:
+        return ""
+    return extracted.text
+
+
+def process_upload(upload, filename: str, strict: bool = False, progress=None) -> Dict:
+    """
+    /api/process for one upload (FileStorage or PDF bytes). Repeat uploads
+    of the same bytes are answered from the result cache.
+
+    An unreadable PDF gives an empty-text result, or raises with ``strict``.
+    ``progress(stage, fraction)`` is called as the stages start.
+    """
+    digest = content_hash(upload)
+    key = result_cache.key_for_hash(digest)
+    cached = result_cache.get(key)
+    if cached is not None:
+        DOCUMENTS.inc(outcome="cached")
+        return {**cached, "filename": filename}
+
+    if progress:
+        progress("extracting", 0.1)
+    try:
+        extracted, cleaned, alignment = extract_and_clean(upload, text_cache, digest)
+    except Exception:
+        DOCUMENTS.inc(outcome="failed")
+        if strict:
+            raise
+        # answer like before, but don't cache the failure
+        return analyze_text("", filename)
+
+    if progress:
+        progress("analyzing", 0.5)
+    result = analyze_text(extracted.text, filename, pages=extracted, cleaned=(cleaned, alignment))
+    result_cache.put(key, result)
+    DOCUMENTS.inc(outcome="processed")
+    return result
+
+
+def extract_text_from_bytes(data: bytes, parallel: bool = True) -> str:
+    """Read text from an in-memory PDF. Raises if the bytes are not a PDF."""
+    return extract_document(data, parallel=parallel).text
+
+
+def build_demo_entities(text: str):
+    """
+    Very simple heuristic entities so that your UI shows SOMETHING
+    even if no ML model is wired yet. All patterns run as a single
+    compiled pass (see entity_scanner.default_scanner).
+    """
+    return default_scanner.scan(text)
+
+
+def extract_entities(text: str) -> Dict:
+    """Raw {label: [{text, start, end}]} entities for NERPostProcessor.process"""
+    with stage("scan"):
+        heuristic = build_demo_entities(text)
+    if NER_BACKEND != "model" or not ner_service.available:
+        return heuristic
+    # concurrent requests share one nlp.pipe batch through the coalescer
+    with stage("ner"):
+        model = ner_batcher.predict(text)
+    return combine_entities(model, heuristic)
+
+
+def combine_entities(model: Dict, heuristic: Dict) -> Dict:
+    """Model entities first, then heuristic hits the model did not already produce"""
+    combined = {label: list(items) for label, items in model.items()}
+    for label, items in heuristic.items():
+        seen = {(e["start"], e["end"]) for e in combined.get(label, [])}
+        extra = [e for e in items if (e["start"], e["end"]) not in seen]
+        if extra:
+            combined.setdefault(label, []).extend(extra)
+    return combined
+
+
+def warm_up():
+    """Load the NER model up front so the first request does not pay for it"""
+    if NER_BACKEND == "model" and ner_service.available:
+        ner_service.load()
+
+
+def analyze_text(text: str, filename: str, pages: Optional[ExtractedText] = None,
+                 cleaned: Optional[Tuple[str, AlignmentMap]] = None) -> Dict:
+    """
+    Clean → extract entities → post-process, returning the API response body.
+
+    Entities keep start/end in the cleaned text and also get
+    source_start/source_end in the extracted text (plus the 1-based
+    ``page`` when the ExtractedText the text came from is passed).
+    ``cleaned`` is normalize_text's (text, alignment) when already known,
+    e.g. from the text cache.
+    """
+    # clean the extracted text for OCR errors, keeping a map back to the source
+    if cleaned is None:
+        with stage("clean"):
+            cleaned = normalize_text(text, return_alignment=True)
+    text, alignment = cleaned
+
+    # trained NER model + heuristic entities
+    table = EntityTable.from_dicts(extract_entities(text))
+
+    # run Week‑3 post‑processor on the entity table; dicts are built only for the response
+    processor.process_table(table, text)
+    if kyc_resolver is not None:
+        with stage("kyc"):
+            kyc_resolver.resolve_table(table)
+    with stage("project"):
+        table.project(alignment, pages)
+    evaluation = processor.evaluate(table)
+    entities = table.to_dicts()
+    for label, items in entities.items():
+        if items:
+            ENTITIES.inc(len(items), label=label)
+
+    # compute summary fields your UI needs
+    total_entities = sum(len(v) for v in entities.values())
+    entity_types = len([k for k, v in entities.items() if v])
+
+    result = {
+        "success": True,
+        "filename": filename,
+        "entities": entities,
+        "quality_score": evaluation["quality_score"],
+        "validation_report": evaluation["validation_report"],
+        "text": text,
+        "text_length": len(text),
+        "summary": {
+            "total_entities": total_entities,
+            "entity_types": entity_types,
+        },
+    }
+    if pages is not None and pages.routing:
+        # how each page's text was obtained (text layer / OCR) and the time it took
+        result["extraction"] = {**routing_summary(pages), "routing": pages.routing}
+        for route, count in result["extraction"]["routes"].items():
+            PAGES.inc(count, route=route)
+    return result
+
+
+def stream_document(data: bytes, filename: str) -> Iterator[Dict]:
+    """
+    Run the pipeline page by page, yielding one record per page as soon as
+    that page is done, then a final summary record.
+
+    Text comes from the same cached extract → OCR → clean stages as
+    /api/process; entities are then found one page at a time. Page records
+    carry the page's slice of the cleaned text (``text_offset`` is where it
+    starts, so the slices join into the /api/process ``text``), its
+    entities with source_start/source_end/page, and the validation report
+    and quality score over everything found so far. A document already in
+    the result cache is answered by a single summary record carrying the
+    cached response. Streamed results are not written to the result cache:
+    entities are found per page, so they can differ slightly from the
+    one-shot response.
+    """
+    started = time.perf_counter()
+    digest = content_hash(data)
+    cached = result_cache.get(result_cache.key_for_hash(digest))
+    if cached is not None:
+        DOCUMENTS.inc(outcome="cached")
+        yield {
+            **cached,
+            "type": "summary",
+            "filename": filename,
+            "cached": True,
+            "page_count": len(cached.get("extraction", {}).get("routing", [])),
+            "elapsed_ms": round((time.perf_counter() - started) * 1000, 2),
+        }
+        return
+
+    found = EntityTable()
+    evaluation = processor.evaluate(found)
+    try:
+        extracted, cleaned, alignment = extract_and_clean(data, text_cache, digest)
+        bounds = _cleaned_page_starts(extracted, alignment) + [len(cleaned)]
+        for page in range(extracted.page_count):
+            start, end = bounds[page], bounds[page + 1]
+            text = cleaned[start:end]
+            table = processor.process_table(EntityTable.from_dicts(extract_entities(text)), text)
+            if kyc_resolver is not None:
+                with stage("kyc"):
+                    kyc_resolver.resolve_table(table)
+            table.shift(start)
+            with stage("project"):
+                table.project(alignment, extracted)
+            found.extend(table)
+            evaluation = processor.evaluate(found)
+            for label, count in table.label_counts().items():
+                if count:
+                    ENTITIES.inc(count, label=label)
+            yield {
+                "type": "page",
+                "page": page + 1,
+                "entities": table.to_dicts(),
+                "validation_report": evaluation["validation_report"],
+                "quality_score": evaluation["quality_score"],
+                "text": text,
+                "text_offset": start,
+                "elapsed_ms": round((time.perf_counter() - started) * 1000, 2),
+            }
+    except Exception as exc:
+        DOCUMENTS.inc(outcome="failed")
+        yield {"type": "error", "success": False, "filename": filename, "error": f"{type(exc).__name__}: {exc}"}
+        return
+
+    DOCUMENTS.inc(outcome="processed")
+    summary = {
+        "type": "summary",
+        "success": True,
+        "filename": filename,
+        "page_count": extracted.page_count,
+        "quality_score": evaluation["quality_score"],
+        "validation_report": evaluation["validation_report"],
+        "text_length": len(cleaned),
+        "summary": {
+            "total_entities": len(found),
+            "entity_types": len([label for label, n in found.label_counts().items() if n]),
+        },
+    }
+    if extracted.routing:
+        summary["extraction"] = {**routing_summary(extracted), "routing": extracted.routing}
+        for route, count in summary["extraction"]["routes"].items():
+            PAGES.inc(count, route=route)
+    summary["elapsed_ms"] = round((time.perf_counter() - started) * 1000, 2)
+    yield summary
+
+
+def _cleaned_page_starts(extracted: ExtractedText, alignment: AlignmentMap) -> List[int]:
+    """Offset in the cleaned text where each extracted page starts (first character mapped to it or later)"""
+    offsets = range(alignment.clean_length + 1)
+    return [bisect_left(offsets, start, key=alignment.to_original) for start in extracted.page_starts]
+
+
+def process_batch_item(filename: str, data: bytes) -> Dict:
+    """Run the full pipeline on one batch document; failures are reported, not raised."""
+    started = time.perf_counter()
+    try:
+        # batch items already run one per core, so pages are read serially
+        extracted, cleaned, alignment = extract_and_clean(data, text_cache, parallel=False)
+        result = analyze_text(extracted.text, filename, pages=extracted, cleaned=(cleaned, alignment))
+    except Exception as exc:
+        result = {"success": False, "filename": filename, "error": f"{type(exc).__name__}: {exc}"}
+    result["elapsed_ms"] = round((time.perf_counter() - started) * 1000, 2)
+    if multiprocessing.parent_process() is not None:
+        # what this worker recorded goes back with the result for the server's /api/metrics
+        result["metrics"] = registry.snapshot(reset=True)
+    return result
+
+
+def _init_batch_worker():
+    # a forked worker starts from the server's counts; only what it records itself is sent back
+    registry.reset()
+    ner_batcher.after_fork()
+
+
+def _get_batch_pool() -> ProcessPoolExecutor:
+    global _batch_pool
+    if _batch_pool is None:
+        _batch_pool = ProcessPoolExecutor(max_workers=BATCH_WORKERS, initializer=_init_batch_worker)
+    return _batch_pool
+
+
+def process_batch(documents: List[Tuple[str, bytes]]) -> Dict:
+    """
+    Process (filename, pdf bytes) pairs on the worker pool.
+    Results come back in upload order together with batch timing.
+    """
+    started = time.perf_counter()
+    keys = [result_cache.key(data) for _, data in documents]
+    results = [result_cache.get(key) for key in keys]
+
+    pool = _get_batch_pool()
+    futures = {
+        i: pool.submit(process_batch_item, name, data)
+        for i, (name, data) in enumerate(documents)
+        if results[i] is None
+    }
+    for i, (name, _) in enumerate(documents):
+        if i not in futures:
+            results[i] = {**results[i], "filename": name, "cached": True}
+            DOCUMENTS.inc(outcome="cached")
+            continue
+        try:
+            results[i] = futures[i].result()
+        except Exception as exc:  # e.g. a worker process died
+            results[i] = {"success": False, "filename": name, "error": f"{type(exc).__name__}: {exc}"}
+            DOCUMENTS.inc(outcome="failed")
+            continue
+        registry.merge(results[i].pop("metrics", None))
+        DOCUMENTS.inc(outcome="processed" if results[i]["success"] else "failed")
+        if results[i]["success"]:
+            result_cache.put(keys[i], {k: v for k, v in results[i].items() if k != "elapsed_ms"})
+
+    elapsed = time.perf_counter() - started
+    succeeded = sum(1 for r in results if r["success"])
+    return {
+        "success": True,
+        "documents": results,
+        "summary": {
+            "total_documents": len(results),
+            "succeeded": succeeded,
+            "failed": len(results) - succeeded,
+        },
+        "timing": {
+            "batch_ms": round(elapsed * 1000, 2),
+            "workers": BATCH_WORKERS,
+            "documents_per_second": round(len(results) / elapsed, 2) if elapsed > 0 else None,
+        },
+    }
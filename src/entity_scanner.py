@@ -0,0 +1,87 @@
+import re
+from typing import Dict, List, Optional, Tuple
+
+
+class EntityScanner:
+    """
+    Heuristic entity patterns compiled into one regex with a named group per
+    pattern, so every entity class is found in a single pass over the text.
+
+    Patterns are tried in registration order at each position and matches
+    never overlap: where two patterns could match at the same place, the
+    one registered first wins.
+
+    When every pattern declares the characters a match can start with,
+    the combined regex is guarded by a lookahead on that class, so the
+    engine skips other positions without trying each alternative.
+    """
+
+    def __init__(self):
+        self._patterns: List[Tuple[str, str, str, bool, Optional[str]]] = []
+        self._compiled: Optional[re.Pattern] = None
+        self._groups: Dict[str, Tuple[str, bool]] = {}
+
+    def register(self, label: str, pattern: str, name: Optional[str] = None, strip: bool = False,
+                 first_chars: Optional[str] = None) -> str:
+        """
+        Add a pattern for ``label`` and return its group name. ``pattern``
+        must not define capture groups of its own; use (?:...) instead.
+        ``strip`` trims whitespace from the emitted text (not the span).
+        ``first_chars`` is a character-class body (e.g. ``"0-9$"``) that
+        every match of the pattern starts with.
+        """
+        name = name or f"{label}_{sum(1 for p in self._patterns if p[1] == label)}"
+        if not name.isidentifier() or any(p[0] == name for p in self._patterns):
+            raise ValueError(f"Invalid or duplicate pattern name: {name}")
+        if re.compile(pattern).groups:
+            raise ValueError(f"Pattern {name} must not contain capture groups")
+        self._patterns.append((name, label, pattern, strip, first_chars))
+        self._compiled = None
+        return name
+
+    def unregister(self, name: str):
+        self._patterns = [p for p in self._patterns if p[0] != name]
+        self._compiled = None
+
+    @property
+    def labels(self) -> List[str]:
+        return list(dict.fromkeys(p[1] for p in self._patterns))
+
+    def compile(self) -> re.Pattern:
+        if self._compiled is None:
+            combined = "|".join(f"(?P<{p[0]}>{p[2]})" for p in self._patterns)
+            if all(p[4] for p in self._patterns):
+                combined = f"(?=[{''.join(p[4] for p in self._patterns)}])(?:{combined})"
+            self._compiled = re.compile(combined)
+            self._groups = {p[0]: (p[1], p[3]) for p in self._patterns}
+        return self._compiled
+
+    def scan(self, text: str) -> Dict[str, List[Dict]]:
+        """{label: [{text, start, end}]} for every match, in document order"""
+        entities: Dict[str, List[Dict]] = {}
+        if not self._patterns:
+            return entities
+        compiled = self.compile()
+        groups = self._groups
+        for m in compiled.finditer(text):
+            label, strip = groups[m.lastgroup]
+            found = m.group()
+            entities.setdefault(label, []).append(
+                {"text": found.strip() if strip else found, "start": m.start(), "end": m.end()}
+            )
+        return entities
+
+
+MONTH_NAMES = "January|February|March|April|May|June|July|August|September|October|November|December"
+
+default_scanner = EntityScanner()
+# dates like 2024-01-15, 15/01/2024, 15-01-2024, January 15, 2024
+default_scanner.register("DATE", r"\b\d{4}-\d{1,2}-\d{1,2}\b", name="DATE_ISO", first_chars=r"\d")
+default_scanner.register("DATE", r"\b\d{1,2}/\d{1,2}/\d{4}\b", name="DATE_SLASH", first_chars=r"\d")
+default_scanner.register("DATE", r"\b\d{1,2}-\d{1,2}-\d{4}\b", name="DATE_DASH", first_chars=r"\d")
+default_scanner.register("DATE", rf"\b(?:{MONTH_NAMES})\s+\d{{1,2}},\s+\d{{4}}\b", name="DATE_LONG",
+                         first_chars="JFMASOND")
+# amounts like $125,000 or $125,000.00
+default_scanner.register("AMOUNT", r"\$[0-9][0-9,]*(?:\.[0-9]{2})?", name="AMOUNT_DOLLAR", first_chars=r"\$")
+# words in ALL CAPS, e.g. ACME BANK LIMITED
+default_scanner.register("ORG", r"\b[A-Z][A-Z &]{2,}\b", name="ORG_CAPS", strip=True, first_chars="A-Z")
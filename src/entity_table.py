@@ -0,0 +1,246 @@
+from array import array
+from typing import Dict, List, Optional
+
+from amount_engine import CURRENCY_INDEX, CURRENCY_ISO, CURRENCY_TOKENS
+
+# start/end of an entity without a span (e.g. heuristic party names)
+NO_SPAN = -1
+
+# labels whose items change shape once standardized
+STANDARDIZED_LABELS = ('DATE', 'AMOUNT')
+
+
+class EntityTable:
+    """
+    Entities as parallel columns instead of one dict per item: label codes
+    and spans in typed arrays, text / normalized value / source as lists
+    of references. Post-processing stages update the columns in place and
+    the {label: [{...}]} shape the API returns is only built by to_dicts().
+
+    ``value`` holds the ISO date for DATE rows and the parsed number for
+    AMOUNT rows (``currency``/``valid`` are only meaningful for those);
+    ``role`` is e.g. 'effective' or 'termination' for DATE rows.
+    Item keys the table has no column for are kept per row in ``extras``.
+    """
+
+    __slots__ = ('labels', 'label', 'start', 'end', 'text', 'value', 'currency', 'valid', 'source', 'role', 'extras',
+                 'source_start', 'source_end', 'page', 'standardized', '_label_codes')
+
+    def __init__(self):
+        self.labels: List[str] = []
+        self.label = array('H')
+        self.start = array('q')
+        self.end = array('q')
+        self.text: List[str] = []
+        self.value: List = []
+        self.currency = array('b')
+        self.valid = bytearray()
+        self.source: List[Optional[str]] = []
+        self.role: List[Optional[str]] = []
+        self.extras: Dict[int, Dict] = {}
+        self.source_start: Optional[array] = None
+        self.source_end: Optional[array] = None
+        self.page: Optional[array] = None
+        self.standardized = False
+        self._label_codes: Dict[str, int] = {}
+
+    @classmethod
+    def from_dicts(cls, entities: Dict) -> 'EntityTable':
+        """Table from the {label: [{text, start, end, ...}]} shape (raw or already processed)"""
+        table = cls()
+        for label, items in entities.items():
+            code = table.label_code(label)
+            if label in STANDARDIZED_LABELS and any('original' in item for item in items):
+                for item in items:
+                    table._append_item(code, label, item)
+                continue
+            # raw items: fill each column for the whole list at once
+            offset, count = len(table), len(items)
+            table.label.extend(array('H', [code]) * count)
+            table.start.extend(array('q', [NO_SPAN if s is None else s for s in (i.get('start') for i in items)]))
+            table.end.extend(array('q', [NO_SPAN if e is None else e for e in (i.get('end') for i in items)]))
+            table.text.extend([item.get('text', '') for item in items])
+            table.value.extend([None] * count)
+            table.currency.extend(array('b', bytes(count)))
+            table.valid.extend(bytes(count))
+            table.source.extend([item.get('source') for item in items])
+            table.role.extend([item.get('role') for item in items])
+            for row, item in enumerate(items, offset):
+                if not _COLUMN_KEYS.issuperset(item):
+                    table.extras[row] = {k: v for k, v in item.items() if k not in _COLUMN_KEYS}
+        return table
+
+    def __len__(self) -> int:
+        return len(self.label)
+
+    def label_code(self, label: str) -> int:
+        code = self._label_codes.get(label)
+        if code is None:
+            code = self._label_codes[label] = len(self.labels)
+            self.labels.append(label)
+        return code
+
+    def add(self, label: str, text: str, start: Optional[int] = None, end: Optional[int] = None,
+            source: Optional[str] = None) -> int:
+        """Append one entity and return its row"""
+        return self._append(self.label_code(label), text, start, end, source, None)
+
+    def extend(self, other: 'EntityTable'):
+        """Append every row of ``other``"""
+        offset = len(self)
+        codes = [self.label_code(label) for label in other.labels]
+        self.label.extend(array('H', (codes[c] for c in other.label)))
+        self.start.extend(other.start)
+        self.end.extend(other.end)
+        self.text.extend(other.text)
+        self.value.extend(other.value)
+        self.currency.extend(other.currency)
+        self.valid.extend(other.valid)
+        self.source.extend(other.source)
+        self.role.extend(other.role)
+        for row, extra in other.extras.items():
+            self.extras[offset + row] = extra
+        for name in ('source_start', 'source_end', 'page'):
+            mine, theirs = getattr(self, name), getattr(other, name)
+            if mine is None and theirs is None:
+                continue
+            if mine is None:
+                mine = array('q', [NO_SPAN]) * offset
+                setattr(self, name, mine)
+            mine.extend(theirs if theirs is not None else array('q', [NO_SPAN]) * len(other))
+        self.standardized = self.standardized or other.standardized
+
+    def take(self, rows: List[int]):
+        """Keep only ``rows`` (in that order), e.g. after a merge dropped some"""
+        self.label = array('H', (self.label[i] for i in rows))
+        self.start = array('q', (self.start[i] for i in rows))
+        self.end = array('q', (self.end[i] for i in rows))
+        self.text = [self.text[i] for i in rows]
+        self.value = [self.value[i] for i in rows]
+        self.currency = array('b', (self.currency[i] for i in rows))
+        self.valid = bytearray(self.valid[i] for i in rows)
+        self.source = [self.source[i] for i in rows]
+        self.role = [self.role[i] for i in rows]
+        self.extras = {n: self.extras[i] for n, i in enumerate(rows) if i in self.extras}
+        for name in ('source_start', 'source_end', 'page'):
+            column = getattr(self, name)
+            if column is not None:
+                setattr(self, name, array('q', (column[i] for i in rows)))
+
+    def rows(self, label: str) -> List[int]:
+        code = self._label_codes.get(label)
+        if code is None:
+            return []
+        return [i for i, c in enumerate(self.label) if c == code]
+
+    def count(self, label: str) -> int:
+        code = self._label_codes.get(label)
+        return 0 if code is None else self.label.count(code)
+
+    def label_counts(self) -> Dict[str, int]:
+        """Rows per label, including labels that have none"""
+        return {label: self.label.count(code) for label, code in self._label_codes.items()}
+
+    def shift(self, offset: int):
+        """Move every span by ``offset`` characters (e.g. page → document coordinates)"""
+        if not offset:
+            return
+        self.start = array('q', (s + offset if s != NO_SPAN else s for s in self.start))
+        self.end = array('q', (e + offset if e != NO_SPAN else e for e in self.end))
+
+    def project(self, alignment, pages=None):
+        """
+        Fill source_start/source_end from an AlignmentMap (cleaned → extracted
+        text) and, when the ExtractedText is given, the 1-based page.
+        """
+        starts, ends = array('q'), array('q')
+        for s, e in zip(self.start, self.end):
+            if s == NO_SPAN or e == NO_SPAN:
+                starts.append(NO_SPAN)
+                ends.append(NO_SPAN)
+            else:
+                starts.append(alignment.to_original(s))
+                ends.append(alignment.end_to_original(e))
+        self.source_start, self.source_end = starts, ends
+        if pages is not None:
+            self.page = array('q', (pages.page_for_offset(s) + 1 if s != NO_SPAN else NO_SPAN for s in starts))
+
+    def to_dicts(self) -> Dict[str, List[Dict]]:
+        """The {label: [{...}]} shape of NERPostProcessor.process / the API"""
+        grouped: Dict[str, List[Dict]] = {label: [] for label in self.labels}
+        buckets = [grouped[label] for label in self.labels]
+        date_code = self._label_codes.get('DATE') if self.standardized else None
+        amount_code = self._label_codes.get('AMOUNT') if self.standardized else None
+        source_start, source_end, page = self.source_start, self.source_end, self.page
+        extras = self.extras
+        for i, code in enumerate(self.label):
+            start, end = self.start[i], self.end[i]
+            if code == date_code:
+                item = {'original': self.text[i], 'standardized': self.value[i],
+                        'start': None if start == NO_SPAN else start, 'end': None if end == NO_SPAN else end}
+            elif code == amount_code:
+                token = self.currency[i]
+                item = {'original': self.text[i], 'value': self.value[i],
+                        'currency': CURRENCY_TOKENS[token] or None, 'currency_code': CURRENCY_ISO[token] or None,
+                        'valid': bool(self.valid[i]),
+                        'start': None if start == NO_SPAN else start, 'end': None if end == NO_SPAN else end}
+            else:
+                item = {'text': self.text[i]}
+                if start != NO_SPAN:
+                    item['start'] = start
+                if end != NO_SPAN:
+                    item['end'] = end
+                if self.source[i] is not None:
+                    item['source'] = self.source[i]
+            if self.role[i] is not None:
+                item['role'] = self.role[i]
+            if i in extras:
+                item.update(extras[i])
+            if source_start is not None and source_start[i] != NO_SPAN:
+                item['source_start'] = source_start[i]
+                item['source_end'] = source_end[i]
+                if page is not None:
+                    item['page'] = page[i]
+            buckets[code].append(item)
+        return grouped
+
+    @property
+    def nbytes(self) -> int:
+        """Approximate size of the columns themselves (not the strings they point to)"""
+        arrays = [self.label, self.start, self.end, self.currency, self.source_start, self.source_end, self.page]
+        size = sum(a.itemsize * len(a) for a in arrays if a is not None) + len(self.valid)
+        return size + 8 * (len(self.text) + len(self.value) + len(self.source))
+
+    def _append(self, code: int, text: str, start, end, source, value) -> int:
+        self.label.append(code)
+        self.start.append(NO_SPAN if start is None else start)
+        self.end.append(NO_SPAN if end is None else end)
+        self.text.append(text)
+        self.value.append(value)
+        self.currency.append(0)
+        self.valid.append(0)
+        self.source.append(source)
+        self.role.append(None)
+        return len(self.label) - 1
+
+
+    def _append_item(self, code: int, label: str, item: Dict):
+        """Append one item that may already be in the processed DATE/AMOUNT shape"""
+        if 'original' in item:
+            self.standardized = True
+            text, value = item['original'], item.get('standardized', item.get('value'))
+        else:
+            text, value = item.get('text', ''), None
+        row = self._append(code, text, item.get('start'), item.get('end'), item.get('source'), value)
+        self.role[row] = item.get('role')
+        if label == 'AMOUNT' and 'currency' in item:
+            self.currency[row] = CURRENCY_INDEX.get(item['currency'], 0)
+            self.valid[row] = bool(item.get('valid'))
+        extra = {k: v for k, v in item.items() if k not in _COLUMN_KEYS}
+        if extra:
+            self.extras[row] = extra
+
+_COLUMN_KEYS = frozenset((
+    'text', 'start', 'end', 'source', 'role', 'original', 'standardized', 'value', 'currency', 'currency_code', 'valid',
+))
+
@@ -0,0 +1,308 @@
+import argparse
+import json
+import os
+import re
+import sys
+from array import array
+from bisect import bisect_left
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# prebuilt automaton of known counterparties (see main below); unset = legal suffixes only
+GAZETTEER_PATH = os.environ.get("GAZETTEER_PATH") or None
+
+# how many capitalised words before a legal suffix make up the organisation name
+GAZETTEER_MAX_NAME_WORDS = int(os.environ.get("GAZETTEER_MAX_NAME_WORDS", 5))
+
+# entries whose label is SUFFIX mark the end of an organisation name rather than a name
+SUFFIX = 'SUFFIX'
+
+LEGAL_SUFFIXES = (
+    'Corp', 'Corporation', 'Inc', 'Incorporated', 'LLC', 'LLP', 'LP', 'Ltd', 'Limited', 'Pvt Ltd',
+    'Private Limited', 'Co', 'Company', 'PLC', 'GmbH', 'AG', 'SA', 'S.A.', 'NV', 'BV', 'SE', 'Pty Ltd',
+    'Bank', 'Group', 'Holdings', 'Trust', 'Partners', 'Associates', 'Capital', 'Financial',
+)
+
+MAGIC = b'GAZ1\n'
+
+# capitalised words that start a sentence or clause rather than a name
+NAME_STOPWORDS = frozenset(('The', 'This', 'That', 'Between', 'And', 'Or', 'Of', 'By', 'With', 'To', 'For', 'From',
+                            'Dear', 'Re', 'Pay', 'Paid'))
+
+_SPACES = re.compile(r'\s+')
+
+# keeps offsets: every whitespace character becomes one space
+_WHITESPACE = {ord(c): ' ' for c in '\t\n\r\x0b\x0c'}
+
+
+def fold(name: str) -> str:
+    """Key form of a name: lower case, single spaces"""
+    return _SPACES.sub(' ', name.strip()).lower()
+
+
+class Gazetteer:
+    """
+    Aho-Corasick automaton over a name list, matching every entry in one
+    pass over the text (case-insensitive, whole words only).
+
+    Nodes are numbered in breadth-first order and stored in flat arrays,
+    so there is no per-node object: a node's children are consecutive
+    ids (found by bisecting their characters), plus failure and output
+    links. An automaton is built straight from the sorted keys one trie
+    level at a time and saved as raw array bytes, so loading a prebuilt
+    one is a handful of reads.
+
+    Entries labelled SUFFIX (Ltd, GmbH, ...) are not names themselves;
+    a match is extended left over the capitalised words before it and
+    emitted as ORG.
+    """
+
+    ARRAYS = (('char', 'I'), ('first_child', 'I'), ('child_count', 'I'), ('fail', 'I'), ('output', 'i'),
+              ('output_link', 'i'), ('key_length', 'I'), ('key_label', 'H'), ('name_offsets', 'I'))
+
+    def __init__(self):
+        self.labels: List[str] = []
+        self.names = ''
+        for name, typecode in self.ARRAYS:
+            setattr(self, name, array(typecode))
+        self._root: Dict[str, int] = {}
+
+    @classmethod
+    def build(cls, entries: Iterable[Tuple[str, str]]) -> 'Gazetteer':
+        """Automaton for (name, label) pairs; the first label given for a name wins"""
+        gazetteer = cls()
+        by_key: Dict[str, Tuple[str, str]] = {}
+        for name, label in entries:
+            key = fold(name)
+            if key and key not in by_key:
+                by_key[key] = (name.strip(), label)
+        keys = sorted(by_key)
+
+        labels: Dict[str, int] = {}
+        names = []
+        offset = 0
+        for key in keys:
+            name, label = by_key[key]
+            gazetteer.key_length.append(len(key))
+            gazetteer.key_label.append(labels.setdefault(label, len(labels)))
+            gazetteer.name_offsets.append(offset)
+            names.append(name)
+            offset += len(name)
+        gazetteer.name_offsets.append(offset)
+        gazetteer.names = ''.join(names)
+        gazetteer.labels = list(labels)
+        gazetteer._build_nodes(keys)
+        gazetteer._index_root()
+        return gazetteer
+
+    def _build_nodes(self, keys: List[str]):
+        char, first_child, child_count = self.char, self.first_child, self.child_count
+        fail, output, output_link = self.fail, self.output, self.output_link
+        # root; each node covers the keys[lo:hi] that share its prefix
+        char.append(0)
+        fail.append(0)
+        output.append(-1)
+        output_link.append(-1)
+        level = [(0, 0, len(keys))]
+        depth = 0
+        while level:
+            next_level = []
+            for node, lo, hi in level:
+                if lo < hi and len(keys[lo]) == depth:
+                    lo += 1  # keys[lo] ends here (sorted: the shortest comes first)
+                first_child.append(len(char))
+                count = 0
+                i = lo
+                while i < hi:
+                    key = keys[i]
+                    code = ord(key[depth])
+                    # keys sharing this prefix are contiguous; the group ends before prefix[:-1] + next char
+                    j = hi if hi - i == 1 else bisect_left(keys, key[:depth] + chr(code + 1), i + 1, hi)
+                    child = len(char)
+                    char.append(code)
+                    fail.append(0 if node == 0 else self._goto(fail[node], code))
+                    ends_here = len(key) == depth + 1
+                    output.append(i if ends_here else -1)
+                    target = fail[child]
+                    output_link.append(target if output[target] >= 0 else output_link[target])
+                    next_level.append((child, i, j))
+                    count += 1
+                    i = j
+                child_count.append(count)
+            level = next_level
+            depth += 1
+
+    def _goto(self, state: int, code: int) -> int:
+        """Transition from ``state`` on ``code``, following failure links"""
+        char, first_child, child_count, fail = self.char, self.first_child, self.child_count, self.fail
+        while True:
+            lo = first_child[state]
+            hi = lo + child_count[state]
+            k = bisect_left(char, code, lo, hi)
+            if k < hi and char[k] == code:
+                return k
+            if state == 0:
+                return 0
+            state = fail[state]
+
+    def _index_root(self):
+        lo = self.first_child[0]
+        self._root = {chr(self.char[k]): k for k in range(lo, lo + self.child_count[0])}
+
+    def __len__(self) -> int:
+        return len(self.key_length)
+
+    @property
+    def nbytes(self) -> int:
+        return sum(getattr(self, name).itemsize * len(getattr(self, name)) for name, _ in self.ARRAYS) + len(self.names)
+
+    def name(self, entry: int) -> str:
+        return self.names[self.name_offsets[entry]:self.name_offsets[entry + 1]]
+
+    def matches(self, text: str) -> List[Tuple[int, int, int]]:
+        """Every whole-word (start, end, entry) in ``text``, in order of end offset"""
+        folded = text.lower()
+        if len(folded) != len(text):  # e.g. 'İ' lowers to two characters
+            folded = ''.join(c.lower()[0] for c in text)
+        folded = folded.translate(_WHITESPACE)
+        root, goto = self._root, self._goto
+        output, output_link, key_length = self.output, self.output_link, self.key_length
+        found = []
+        state = 0
+        for i, c in enumerate(folded):
+            if state == 0:
+                state = root.get(c, 0)
+                if not state:
+                    continue
+            else:
+                state = goto(state, ord(c))
+            hit = state if output[state] >= 0 else output_link[state]
+            while hit >= 0:
+                entry = output[hit]
+                start = i + 1 - key_length[entry]
+                if _is_word_boundary(folded, start, i + 1):
+                    found.append((start, i + 1, entry))
+                hit = output_link[hit]
+        return found
+
+    def scan(self, text: str) -> List[Dict]:
+        """
+        Non-overlapping entities [{label, text, start, end, name}], leftmost
+        longest first. ``name`` is the canonical gazetteer entry (for
+        suffix-derived organisations, the suffix).
+        """
+        candidates = []
+        for start, end, entry in self.matches(text):
+            label = self.labels[self.key_label[entry]]
+            if label == SUFFIX:
+                if not text[start].isupper():
+                    continue
+                start = _extend_name(text, start)
+                if start is None:
+                    continue
+                label = 'ORG'
+            candidates.append((start, start - end, -self.key_length[entry], label, entry))
+        entities = []
+        for start, length, _, label, entry in sorted(candidates):
+            if entities and start < entities[-1]['end']:
+                continue
+            entities.append({'label': label, 'text': text[start:start - length], 'start': start,
+                             'end': start - length, 'name': self.name(entry)})
+        return entities
+
+    def save(self, path: str):
+        header = {
+            'labels': self.labels,
+            'names_bytes': len(self.names.encode('utf-8')),
+            'arrays': [[name, typecode, len(getattr(self, name))] for name, typecode in self.ARRAYS],
+        }
+        tmp = path + '.tmp'
+        with open(tmp, 'wb') as f:
+            f.write(MAGIC)
+            f.write(json.dumps(header).encode('utf-8') + b'\n')
+            f.write(self.names.encode('utf-8'))
+            for name, _ in self.ARRAYS:
+                getattr(self, name).tofile(f)
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: str) -> 'Gazetteer':
+        gazetteer = cls()
+        with open(path, 'rb') as f:
+            if f.read(len(MAGIC)) != MAGIC:
+                raise ValueError(f"{path} is not a gazetteer file")
+            header = json.loads(f.readline())
+            gazetteer.labels = header['labels']
+            gazetteer.names = f.read(header['names_bytes']).decode('utf-8')
+            for name, typecode, length in header['arrays']:
+                column = array(typecode)
+                column.fromfile(f, length)
+                setattr(gazetteer, name, column)
+        gazetteer._index_root()
+        return gazetteer
+
+
+def _is_word_boundary(text: str, start: int, end: int) -> bool:
+    return (start == 0 or not text[start - 1].isalnum()) and (end == len(text) or not text[end].isalnum())
+
+
+def _extend_name(text: str, start: int) -> Optional[int]:
+    """Start of the capitalised words right before a suffix at ``start``, or None if there are none"""
+    name_start = None
+    pos = start
+    for _ in range(GAZETTEER_MAX_NAME_WORDS):
+        end = pos
+        while end > 0 and text[end - 1] in ' \t':
+            end -= 1
+        if end == pos or end == 0:
+            break
+        word_start = end
+        while word_start > 0 and (text[word_start - 1].isalnum() or text[word_start - 1] in "&.'-"):
+            word_start -= 1
+        word = text[word_start:end]
+        if not word or word in NAME_STOPWORDS or not (word[0].isupper() or word == '&'):
+            break
+        pos = word_start
+        if word != '&':
+            name_start = word_start
+    return name_start
+
+
+def suffix_entries() -> List[Tuple[str, str]]:
+    return [(suffix, SUFFIX) for suffix in LEGAL_SUFFIXES]
+
+
+def read_entries(path: str) -> List[Tuple[str, str]]:
+    """``name<TAB>label`` per line (label defaults to PARTY)"""
+    entries = []
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            name, _, label = line.rstrip('\n').partition('\t')
+            if name.strip():
+                entries.append((name, label.strip() or 'PARTY'))
+    return entries
+
+
+def load_default() -> Gazetteer:
+    if GAZETTEER_PATH and os.path.exists(GAZETTEER_PATH):
+        return Gazetteer.load(GAZETTEER_PATH)
+    return Gazetteer.build(suffix_entries())
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Build a gazetteer automaton from name<TAB>label lines")
+    ap.add_argument("names", help="names file (name<TAB>label per line, label defaults to PARTY)")
+    ap.add_argument("output", help="where to write the automaton, e.g. models/gazetteer.gaz")
+    ap.add_argument("--no-suffixes", action="store_true", help="leave out the built-in legal suffixes")
+    args = ap.parse_args(argv)
+
+    entries = read_entries(args.names)
+    if not args.no_suffixes:
+        entries += suffix_entries()
+    gazetteer = Gazetteer.build(entries)
+    gazetteer.save(args.output)
+    print(f"{len(gazetteer)} entries, {len(gazetteer.char)} states, {gazetteer.nbytes / 2**20:.1f} MB -> {args.output}",
+          file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,307 @@
+"""
+Persistent background job queue for document processing.
+
+Jobs live in a local SQLite database, so queued work survives a restart
+and the workers can run inside the API server or as a separate process:
+
+    python src/job_queue.py --workers 4
+"""
+import argparse
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+import traceback
+import uuid
+from typing import Dict, Optional
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+JOB_DB_PATH = os.environ.get(
+    "JOB_DB_PATH", os.path.join(os.path.dirname(__file__), "..", "data", "jobs.sqlite3")
+)
+
+# running jobs not updated for this long are assumed orphaned and requeued
+JOB_LEASE_SECONDS = int(os.environ.get("JOB_LEASE_SECONDS", 600))
+
+# a job whose worker died this many times (lease expired while running) is failed instead of requeued
+JOB_MAX_ATTEMPTS = int(os.environ.get("JOB_MAX_ATTEMPTS", 3))
+
+# how often idle workers look for new jobs
+JOB_POLL_SECONDS = float(os.environ.get("JOB_POLL_SECONDS", 0.5))
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    filename TEXT,
+    status TEXT NOT NULL,
+    stage TEXT,
+    progress REAL NOT NULL DEFAULT 0,
+    payload BLOB,
+    result TEXT,
+    error TEXT,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS jobs_status_created ON jobs (status, created_at);
+"""
+
+
+class JobStore:
+    """SQLite-backed job table shared by the API and any number of worker processes"""
+
+    def __init__(self, path: str = JOB_DB_PATH):
+        self.path = path
+        self._local = threading.local()
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(SCHEMA)
+            self._local.conn = conn
+        return conn
+
+    def submit(self, filename: str, data: bytes) -> str:
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        self._conn().execute(
+            "INSERT INTO jobs (id, filename, status, stage, payload, created_at, updated_at) "
+            "VALUES (?, ?, 'queued', 'queued', ?, ?, ?)",
+            (job_id, filename, sqlite3.Binary(data), now, now),
+        )
+        return job_id
+
+    def get(self, job_id: str) -> Optional[Dict]:
+        row = self._conn().execute(
+            "SELECT id, filename, status, stage, progress, result, error, attempts, created_at, updated_at "
+            "FROM jobs WHERE id = ?",
+            (job_id,),
+        ).fetchone()
+        if row is None:
+            return None
+        job = dict(row)
+        job["result"] = json.loads(job["result"]) if job["result"] else None
+        return job
+
+    def claim(self) -> Optional[Dict]:
+        """
+        Atomically move the oldest queued job to running and return it with
+        its payload. ``attempt`` identifies this lease: heartbeat, complete
+        and fail only apply while the job is still running under it.
+        """
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute(
+                "SELECT id, filename, payload, attempts FROM jobs WHERE status = 'queued' "
+                "ORDER BY created_at LIMIT 1"
+            ).fetchone()
+            if row is not None:
+                conn.execute(
+                    "UPDATE jobs SET status = 'running', stage = 'started', attempts = attempts + 1, "
+                    "updated_at = ? WHERE id = ?",
+                    (time.time(), row["id"]),
+                )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        if row is None:
+            return None
+        job = dict(row)
+        job["attempt"] = job.pop("attempts") + 1
+        return job
+
+    def heartbeat(self, job_id: str, attempt: int) -> bool:
+        """Renew a running job's lease; False once another worker or requeue_stale has taken it"""
+        cursor = self._conn().execute(
+            "UPDATE jobs SET updated_at = ? WHERE id = ? AND status = 'running' AND attempts = ?",
+            (time.time(), job_id, attempt),
+        )
+        return cursor.rowcount == 1
+
+    def update_progress(self, job_id: str, stage: str, progress: float, attempt: Optional[int] = None):
+        sql = "UPDATE jobs SET stage = ?, progress = ?, updated_at = ? WHERE id = ?"
+        params = [stage, progress, time.time(), job_id]
+        if attempt is not None:
+            sql += " AND status = 'running' AND attempts = ?"
+            params.append(attempt)
+        self._conn().execute(sql, params)
+
+    def complete(self, job_id: str, result: Dict, attempt: Optional[int] = None) -> bool:
+        """Store the result; with ``attempt``, only if that lease is still held"""
+        return self._finish(job_id, attempt, "status = 'done', stage = 'done', progress = 1, result = ?",
+                            json.dumps(result))
+
+    def fail(self, job_id: str, error: str, attempt: Optional[int] = None) -> bool:
+        return self._finish(job_id, attempt, "status = 'failed', stage = 'failed', error = ?", error)
+
+    def _finish(self, job_id: str, attempt: Optional[int], assignments: str, value) -> bool:
+        sql = f"UPDATE jobs SET {assignments}, payload = NULL, updated_at = ? WHERE id = ?"
+        params = [value, time.time(), job_id]
+        if attempt is not None:
+            sql += " AND status = 'running' AND attempts = ?"
+            params.append(attempt)
+        return self._conn().execute(sql, params).rowcount == 1
+
+    def requeue_stale(self, lease_seconds: int = JOB_LEASE_SECONDS, max_attempts: int = JOB_MAX_ATTEMPTS) -> int:
+        """
+        Put running jobs whose worker stopped updating them back on the
+        queue, or fail them once they have been tried ``max_attempts``
+        times (e.g. a document that crashes its worker). Returns the number
+        requeued.
+        """
+        conn = self._conn()
+        now = time.time()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute(
+                "UPDATE jobs SET status = 'failed', stage = 'failed', payload = NULL, updated_at = ?, "
+                "error = 'Worker stopped ' || attempts || ' times while running this job' "
+                "WHERE status = 'running' AND updated_at < ? AND attempts >= ?",
+                (now, now - lease_seconds, max_attempts),
+            )
+            cursor = conn.execute(
+                "UPDATE jobs SET status = 'queued', stage = 'queued', progress = 0, updated_at = ? "
+                "WHERE status = 'running' AND updated_at < ?",
+                (now, now - lease_seconds),
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return cursor.rowcount
+
+    def counts(self) -> Dict[str, int]:
+        rows = self._conn().execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall()
+        return {status: count for status, count in rows}
+
+
+def run_job(store: JobStore, job: Dict) -> Dict:
+    """Run the document pipeline for one claimed job, recording stage progress"""
+    from document_pipeline import process_upload
+
+    return process_upload(
+        bytes(job["payload"]),
+        job["filename"],
+        strict=True,
+        progress=lambda stage, fraction: store.update_progress(job["id"], stage, fraction, job.get("attempt")),
+    )
+
+
+class JobWorkerPool:
+    """
+    Background threads that claim queued jobs and run the pipeline. While
+    a job runs its lease is renewed every quarter of ``lease_seconds``, so
+    long documents are not requeued under a live worker. Idle workers look
+    for stale jobs at that same interval, shared across the pool, and a
+    worker that hits a store error logs it and keeps polling.
+    """
+
+    def __init__(self, store: JobStore, workers: int = 2, poll_seconds: float = JOB_POLL_SECONDS,
+                 lease_seconds: int = JOB_LEASE_SECONDS):
+        self.store = store
+        self.workers = workers
+        self.poll_seconds = poll_seconds
+        self.lease_seconds = lease_seconds
+        self._stop = threading.Event()
+        self._threads = []
+        self._requeue_lock = threading.Lock()
+        self._next_requeue = 0.0
+
+    @property
+    def running(self) -> bool:
+        return any(t.is_alive() for t in self._threads)
+
+    def start(self):
+        if self.running:
+            return
+        self._stop.clear()
+        self.store.requeue_stale(self.lease_seconds)
+        self._next_requeue = time.monotonic() + self.lease_seconds / 4
+        self._threads = [
+            threading.Thread(target=self._work, name=f"job-worker-{i}", daemon=True)
+            for i in range(self.workers)
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def stop(self, timeout: Optional[float] = None):
+        self._stop.set()
+        for thread in self._threads:
+            thread.join(timeout)
+
+    def run_forever(self):
+        self.start()
+        try:
+            while self.running:
+                time.sleep(1)
+        except KeyboardInterrupt:
+            self.stop()
+
+    def _work(self):
+        while not self._stop.is_set():
+            try:
+                self._work_once()
+            except Exception:
+                # e.g. the database stayed locked past its busy timeout; the thread must not die with it
+                traceback.print_exc()
+                self._stop.wait(self.poll_seconds)
+
+    def _work_once(self):
+        job = self.store.claim()
+        if job is None:
+            self._requeue_if_due()
+            self._stop.wait(self.poll_seconds)
+            return
+        done = threading.Event()
+        heartbeat = threading.Thread(target=self._heartbeat, args=(job, done), daemon=True)
+        heartbeat.start()
+        try:
+            result = run_job(self.store, job)
+        except Exception as exc:
+            traceback.print_exc()
+            result, error = None, f"{type(exc).__name__}: {exc}"
+        finally:
+            done.set()
+            heartbeat.join()
+        # a job whose lease was lost has been requeued or taken over: leave it to that run
+        if result is not None:
+            self.store.complete(job["id"], result, job["attempt"])
+        else:
+            self.store.fail(job["id"], error, job["attempt"])
+
+    def _requeue_if_due(self):
+        """requeue_stale at most once per quarter lease across the pool; it takes the database write lock"""
+        now = time.monotonic()
+        with self._requeue_lock:
+            if now < self._next_requeue:
+                return
+            self._next_requeue = now + self.lease_seconds / 4
+        self.store.requeue_stale(self.lease_seconds)
+
+    def _heartbeat(self, job: Dict, done: threading.Event):
+        while not done.wait(self.lease_seconds / 4):
+            if not self.store.heartbeat(job["id"], job["attempt"]):
+                return
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Run document processing job workers")
+    ap.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    ap.add_argument("--db", default=JOB_DB_PATH)
+    args = ap.parse_args()
+
+    print(f"Job workers: {args.workers} on {os.path.abspath(args.db)}")
+    JobWorkerPool(JobStore(args.db), workers=args.workers).run_forever()
+
+
+if __name__ == "__main__":
+    main()
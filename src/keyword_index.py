@@ -0,0 +1,83 @@
+import os
+import re
+from array import array
+from bisect import bisect_left, bisect_right
+from typing import Dict, Iterable, Optional, Tuple
+
+# how far (characters) a keyword may be from a date and still give it a role
+DATE_ROLE_WINDOW = int(os.environ.get("DATE_ROLE_WINDOW", 80))
+
+# role → keyword stems, matched case-insensitively at the start of a word
+DATE_ROLE_KEYWORDS = {
+    'effective': ('effective', 'commencement', 'commence', 'start date', 'dated as of', 'entered into'),
+    'termination': ('terminat', 'expir', 'end date', 'until', 'maturity'),
+}
+
+
+class KeywordIndex:
+    """
+    Sorted positions of role keywords in one document, built by a single
+    regex pass. ``nearest`` finds the closest keyword to a span with two
+    bisects, so tagging every date stays O(n log k).
+    """
+
+    __slots__ = ('starts', 'ends', 'roles')
+
+    _compiled: Dict[Tuple, Tuple[re.Pattern, Dict[str, str]]] = {}
+
+    def __init__(self, text: str, keywords: Dict[str, Iterable[str]] = DATE_ROLE_KEYWORDS):
+        pattern, group_roles = self._compile(keywords)
+        self.starts, self.ends = array('I'), array('I')
+        self.roles = []
+        for m in pattern.finditer(text):
+            self.starts.append(m.start())
+            self.ends.append(m.end())
+            self.roles.append(group_roles[m.lastgroup])
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    def nearest(self, start: int, end: int, window: int = DATE_ROLE_WINDOW, lower: int = 0,
+                upper: Optional[int] = None) -> Optional[str]:
+        """
+        Role of the closest keyword within ``window`` of [start, end),
+        preferring one before it. Only keywords inside [lower, upper) count,
+        so a keyword is not shared with another date lying in between.
+        """
+        best, best_distance = None, window + 1
+        # last keyword that starts before the span ends (it may overlap the span)
+        k = bisect_left(self.starts, end) - 1
+        if k >= 0 and self.starts[k] >= lower:
+            best, best_distance = self.roles[k], max(start - self.ends[k], 0)
+        # first keyword that starts at or after the span ends
+        k = bisect_right(self.starts, end - 1)
+        if k < len(self.starts) and (upper is None or self.ends[k] <= upper) and self.starts[k] - end < best_distance:
+            best, best_distance = self.roles[k], self.starts[k] - end
+        return best if best_distance <= window else None
+
+    def assign(self, spans: Iterable[Tuple[int, int]], window: int = DATE_ROLE_WINDOW) -> list:
+        """nearest() for every span, each bounded by its neighbouring spans"""
+        spans = list(spans)
+        order = sorted(range(len(spans)), key=lambda i: spans[i])
+        roles = [None] * len(spans)
+        for n, i in enumerate(order):
+            start, end = spans[i]
+            lower = spans[order[n - 1]][1] if n > 0 else 0
+            upper = spans[order[n + 1]][0] if n + 1 < len(order) else None
+            roles[i] = self.nearest(start, end, window, lower, upper)
+        return roles
+
+    @classmethod
+    def _compile(cls, keywords: Dict[str, Iterable[str]]):
+        key = tuple((role, tuple(words)) for role, words in keywords.items())
+        compiled = cls._compiled.get(key)
+        if compiled is None:
+            alternatives, group_roles = [], {}
+            for i, (role, words) in enumerate(key):
+                name = f"role{i}"
+                group_roles[name] = role
+                stems = '|'.join(re.escape(w).replace(r'\ ', r'\s+') for w in words)
+                alternatives.append(f"(?P<{name}>{stems})")
+            compiled = cls._compiled[key] = (re.compile(rf"\b(?:{'|'.join(alternatives)})", re.IGNORECASE),
+                                             group_roles)
+        return compiled
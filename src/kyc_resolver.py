@@ -0,0 +1,293 @@
+import argparse
+import hashlib
+import json
+import os
+import re
+import sys
+from array import array
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from entity_table import EntityTable
+
+# prebuilt index of the KYC master list (see main below); unset = no resolver stage
+KYC_INDEX_PATH = os.environ.get("KYC_INDEX_PATH") or None
+
+# candidates returned per extracted party, and the lowest score still reported
+KYC_TOP_K = int(os.environ.get("KYC_TOP_K", 3))
+KYC_MIN_SCORE = float(os.environ.get("KYC_MIN_SCORE", 0.5))
+
+# trigrams found in more than this share of the master list only count when rescoring
+KYC_COMMON_GRAM_RATIO = float(os.environ.get("KYC_COMMON_GRAM_RATIO", 0.02))
+
+# labels whose entities are looked up
+KYC_LABELS = ('PARTY', 'ORG', 'PARTY_HEURISTIC')
+
+MAGIC = b'KYC1\n'
+
+# characters OCR confuses, folded to one form on both sides of the match
+OCR_CONFUSIONS = str.maketrans({'0': 'o', '1': 'l', 'i': 'l', '|': 'l', '!': 'l', '5': 's', '$': 's', '8': 'b', '@': 'a'})
+OCR_DIGRAPHS = (('rn', 'm'), ('vv', 'w'))
+
+_NON_WORD = re.compile(r'[^\w&]+')
+
+# separates ids / names / keys in the saved file
+_SEP = '\x1f'
+
+_DIGEST_MASK = (1 << 64) - 1
+
+
+def _fold(text: str) -> str:
+    text = _NON_WORD.sub(' ', text.lower()).translate(OCR_CONFUSIONS)
+    for pair, single in OCR_DIGRAPHS:
+        text = text.replace(pair, single)
+    return text
+
+
+LEGAL_FORMS = {_fold(long): _fold(short) for long, short in (
+    ('corporation', 'corp'), ('incorporated', 'inc'), ('limited', 'ltd'), ('company', 'co'), ('private', 'pvt'),
+    ('and', '&'), ('international', 'intl'), ('brothers', 'bros'),
+)}
+
+
+def normalize_name(name: str) -> str:
+    """Match key: lower case, OCR confusions folded, legal forms abbreviated, single spaces"""
+    return ' '.join(LEGAL_FORMS.get(word, word) for word in _fold(name).split())
+
+
+def _entry_hash(entity_id: str, name: str) -> int:
+    return int.from_bytes(hashlib.blake2b(f"{entity_id}{_SEP}{name}".encode('utf-8'), digest_size=8).digest(), 'little')
+
+
+def trigrams(key: str) -> set:
+    padded = f' {key} '
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class KYCResolver:
+    """
+    Resolves noisy party names against a KYC master list through an
+    inverted index of character trigrams over normalized names.
+
+    A lookup counts shared trigrams per entry from the posting lists of
+    the query's trigrams, skipping the very common ones (e.g. " ltd"),
+    then rescores the best-counting entries by trigram Dice similarity.
+    Removed entries are tombstoned and dropped when the index is
+    compacted. The index is saved as raw arrays plus joined strings, so a
+    worker loads it without rebuilding anything.
+
+    ``version`` is derived from the live (id, name) pairs (a sum of
+    per-entry hashes, kept up to date by add and remove), so it changes
+    with every edit and is the same wherever the contents are.
+    """
+
+    def __init__(self):
+        self.ids: List[str] = []
+        self.names: List[str] = []
+        self.keys: List[str] = []
+        self.gram_count = array('H')
+        self.alive = bytearray()
+        self.postings: Dict[str, array] = {}
+        self._by_id: Dict[str, int] = {}
+        self._removed = 0
+        # sum of _entry_hash over live entries (mod 2**64); None until computed for an index loaded without it
+        self._digest: Optional[int] = 0
+
+    @property
+    def version(self) -> str:
+        return f"{self._content_digest():016x}-{len(self)}"
+
+    @classmethod
+    def build(cls, entries: Iterable[Tuple[str, str]]) -> 'KYCResolver':
+        """Index (kyc_id, name) pairs; a repeated id keeps its last name"""
+        resolver = cls()
+        for entity_id, name in entries:
+            resolver.add(entity_id, name)
+        resolver.compact()
+        return resolver
+
+    def __len__(self) -> int:
+        return len(self._by_id)
+
+    def __contains__(self, entity_id: str) -> bool:
+        return entity_id in self._by_id
+
+    def add(self, entity_id: str, name: str):
+        """Add or rename one master entry"""
+        if _SEP in entity_id:
+            raise ValueError(f"KYC id {entity_id!r} contains the index separator \\x1f")
+        name = name.replace(_SEP, ' ')
+        if entity_id in self._by_id:
+            self.remove(entity_id)
+        self._digest = (self._content_digest() + _entry_hash(entity_id, name)) & _DIGEST_MASK
+        entry = len(self.ids)
+        key = normalize_name(name)
+        grams = trigrams(key)
+        self.ids.append(entity_id)
+        self.names.append(name)
+        self.keys.append(key)
+        self.gram_count.append(min(len(grams), 0xFFFF))
+        self.alive.append(1)
+        self._by_id[entity_id] = entry
+        for gram in grams:
+            posting = self.postings.get(gram)
+            if posting is None:
+                posting = self.postings[gram] = array('I')
+            posting.append(entry)
+
+    def remove(self, entity_id: str) -> bool:
+        """Tombstone one master entry; the index is compacted once a quarter of it is dead"""
+        entry = self._by_id.get(entity_id)
+        if entry is None:
+            return False
+        self._digest = (self._content_digest() - _entry_hash(entity_id, self.names[entry])) & _DIGEST_MASK
+        del self._by_id[entity_id]
+        self.alive[entry] = 0
+        self._removed += 1
+        if self._removed > max(len(self.ids) // 4, 1024):
+            self.compact()
+        return True
+
+    def compact(self):
+        """Drop tombstoned entries and renumber the rest, keeping posting lists sorted"""
+        if self._removed:
+            keep = [i for i in range(len(self.ids)) if self.alive[i]]
+            self.ids = [self.ids[i] for i in keep]
+            self.names = [self.names[i] for i in keep]
+            self.keys = [self.keys[i] for i in keep]
+            self.gram_count = array('H', (self.gram_count[i] for i in keep))
+            self.alive = bytearray(b'\x01') * len(keep)
+            self._by_id = {entity_id: i for i, entity_id in enumerate(self.ids)}
+            self.postings = {}
+            for entry, key in enumerate(self.keys):
+                for gram in trigrams(key):
+                    posting = self.postings.get(gram)
+                    if posting is None:
+                        posting = self.postings[gram] = array('I')
+                    posting.append(entry)
+            self._removed = 0
+
+    def _content_digest(self) -> int:
+        if self._digest is None:
+            self._digest = sum(_entry_hash(self.ids[i], self.names[i]) for i in self._by_id.values()) & _DIGEST_MASK
+        return self._digest
+
+    def search(self, name: str, k: int = KYC_TOP_K, min_score: float = 0.0, shortlist: int = 50) -> List[Dict]:
+        """Top ``k`` master entries [{id, name, score}] for ``name``, best first; score is trigram Dice in [0, 1]"""
+        grams = trigrams(normalize_name(name))
+        postings = [self.postings[g] for g in grams if g in self.postings]
+        if not postings:
+            return []
+        common = max(int(len(self.ids) * KYC_COMMON_GRAM_RATIO), 1000)
+        rare = [p for p in postings if len(p) <= common] or [min(postings, key=len)]
+        counts = Counter()
+        for posting in rare:
+            counts.update(posting)
+
+        alive, keys, gram_count = self.alive, self.keys, self.gram_count
+        scored = []
+        for entry, _ in counts.most_common(shortlist + self._removed):
+            if not alive[entry]:
+                continue
+            shared = len(grams & trigrams(keys[entry]))
+            score = 2 * shared / (len(grams) + gram_count[entry])
+            if score >= min_score:
+                scored.append((-score, entry))
+        scored.sort()
+        return [{'id': self.ids[entry], 'name': self.names[entry], 'score': round(-score, 4)}
+                for score, entry in scored[:k]]
+
+    def resolve_table(self, table: EntityTable, labels: Iterable[str] = KYC_LABELS, k: int = KYC_TOP_K,
+                      min_score: float = KYC_MIN_SCORE):
+        """Attach ``kyc_matches`` to every party/organisation row of a processed table"""
+        cache: Dict[str, List[Dict]] = {}
+        for label in labels:
+            for row in table.rows(label):
+                text = table.text[row]
+                if text not in cache:
+                    cache[text] = self.search(text, k, min_score)
+                table.extras[row] = {**table.extras.get(row, {}), 'kyc_matches': cache[text]}
+
+    def save(self, path: str):
+        self.compact()
+        grams = list(self.postings)
+        lengths = array('I', (len(self.postings[g]) for g in grams))
+        postings = array('I')
+        for gram in grams:
+            postings.extend(self.postings[gram])
+        blobs = [_SEP.join(column).encode('utf-8') for column in (self.ids, self.names, self.keys)]
+        blobs.append(''.join(grams).encode('utf-8'))
+        header = {
+            'version': self.version,
+            'digest': self._content_digest(),
+            'entries': len(self.ids),
+            'grams': len(grams),
+            'postings': len(postings),
+            'blob_bytes': [len(blob) for blob in blobs],
+        }
+        tmp = path + '.tmp'
+        with open(tmp, 'wb') as f:
+            f.write(MAGIC)
+            f.write(json.dumps(header).encode('utf-8') + b'\n')
+            for blob in blobs:
+                f.write(blob)
+            self.gram_count.tofile(f)
+            lengths.tofile(f)
+            postings.tofile(f)
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: str) -> 'KYCResolver':
+        resolver = cls()
+        with open(path, 'rb') as f:
+            if f.read(len(MAGIC)) != MAGIC:
+                raise ValueError(f"{path} is not a KYC index file")
+            header = json.loads(f.readline())
+            ids, names, keys, grams = (f.read(size).decode('utf-8') for size in header['blob_bytes'])
+            gram_count, lengths, postings = array('H'), array('I'), array('I')
+            gram_count.fromfile(f, header['entries'])
+            lengths.fromfile(f, header['grams'])
+            postings.fromfile(f, header['postings'])
+        if header['entries']:
+            resolver.ids, resolver.names, resolver.keys = ids.split(_SEP), names.split(_SEP), keys.split(_SEP)
+        resolver.gram_count = gram_count
+        resolver.alive = bytearray(b'\x01') * header['entries']
+        resolver._by_id = {entity_id: i for i, entity_id in enumerate(resolver.ids)}
+        offset = 0
+        for i, length in enumerate(lengths):
+            resolver.postings[grams[3 * i:3 * i + 3]] = postings[offset:offset + length]
+            offset += length
+        resolver._digest = header.get('digest')
+        return resolver
+
+
+def read_entries(path: str) -> List[Tuple[str, str]]:
+    """``kyc_id<TAB>name`` per line"""
+    entries = []
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            entity_id, _, name = line.rstrip('\n').partition('\t')
+            if entity_id and name.strip():
+                entries.append((entity_id, name.replace(_SEP, ' ')))
+    return entries
+
+
+def load_default() -> Optional[KYCResolver]:
+    if KYC_INDEX_PATH and os.path.exists(KYC_INDEX_PATH):
+        return KYCResolver.load(KYC_INDEX_PATH)
+    return None
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Build a KYC resolver index from kyc_id<TAB>name lines")
+    ap.add_argument("master", help="KYC master list (kyc_id<TAB>name per line)")
+    ap.add_argument("output", help="where to write the index, e.g. models/kyc.idx")
+    args = ap.parse_args(argv)
+
+    resolver = KYCResolver.build(read_entries(args.master))
+    resolver.save(args.output)
+    print(f"{len(resolver)} entries, {len(resolver.postings)} trigrams -> {args.output}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,267 @@
+import os
+import threading
+import time
+from bisect import bisect_left
+from functools import wraps
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+# "0" turns every timer and counter into a no-op (one flag check per call)
+METRICS_ENABLED = os.environ.get("METRICS_ENABLED", "1") != "0"
+
+# prefix of every exported metric name
+METRICS_PREFIX = os.environ.get("METRICS_PREFIX", "docparse")
+
+# upper bounds (seconds) of the latency histogram buckets
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+class Counter:
+    """Monotonic count per label set (the name ends in _total)"""
+
+    kind = "counter"
+
+    def __init__(self, name: str, help: str):
+        self.name = name
+        self.help = help
+        self.values: Dict[Labels, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1, **labels):
+        if not registry.enabled:
+            return
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+    def samples(self) -> Iterable[Tuple[str, Labels, float]]:
+        with self._lock:
+            items = sorted(self.values.items())
+        for labels, value in items:
+            yield self.name, labels, value
+
+    def snapshot(self, reset: bool = False) -> Dict:
+        with self._lock:
+            values = dict(self.values)
+            if reset:
+                self.values.clear()
+        return values
+
+    def merge(self, values: Dict):
+        with self._lock:
+            for labels, value in values.items():
+                self.values[labels] = self.values.get(labels, 0) + value
+
+
+class Histogram:
+    """
+    Latency distribution per label set: per-bucket counts (rendered
+    cumulatively, Prometheus style), the sum and the count.
+    """
+
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.buckets = tuple(sorted(buckets))
+        # labels → [count per bucket (+Inf last), sum, count]
+        self.values: Dict[Labels, list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels):
+        if not registry.enabled:
+            return
+        key = tuple(sorted(labels.items()))
+        bucket = bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self.values.get(key)
+            if entry is None:
+                entry = self.values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            entry[0][bucket] += 1
+            entry[1] += value
+            entry[2] += 1
+
+    def time(self, **labels):
+        """Context manager observing the seconds spent inside it (a no-op while metrics are disabled)"""
+        return _Timer(self, labels) if registry.enabled else _NULL_TIMER
+
+    def samples(self) -> Iterable[Tuple[str, Labels, float]]:
+        with self._lock:
+            items = sorted((labels, (list(counts), total, count)) for labels, (counts, total, count)
+                           in self.values.items())
+        for labels, (counts, total, count) in items:
+            cumulative = 0
+            for bound, n in zip(self.buckets + (float("inf"),), counts):
+                cumulative += n
+                yield self.name + "_bucket", labels + (("le", _format_value(bound)),), cumulative
+            yield self.name + "_sum", labels, total
+            yield self.name + "_count", labels, count
+
+    def snapshot(self, reset: bool = False) -> Dict:
+        with self._lock:
+            values = {labels: [list(counts), total, count] for labels, (counts, total, count) in self.values.items()}
+            if reset:
+                self.values.clear()
+        return values
+
+    def merge(self, values: Dict):
+        with self._lock:
+            for labels, (counts, total, count) in values.items():
+                entry = self.values.setdefault(labels, [[0] * (len(self.buckets) + 1), 0.0, 0])
+                entry[0] = [a + b for a, b in zip(entry[0], counts)]
+                entry[1] += total
+                entry[2] += count
+
+
+class Registry:
+    """
+    The process's metrics plus collectors: callables run at scrape time
+    that report values kept elsewhere (cache hit counts, NER totals) as
+    (name, kind, help, [(labels, value)]).
+    """
+
+    def __init__(self, prefix: str = METRICS_PREFIX, enabled: bool = METRICS_ENABLED):
+        self.prefix = prefix
+        self.enabled = enabled
+        self.metrics: Dict[str, object] = {}
+        self.collectors: List[Callable[[], Iterable[Tuple]]] = []
+
+    def counter(self, name: str, help: str) -> Counter:
+        return self._add(Counter(f"{self.prefix}_{name}_total", help))
+
+    def histogram(self, name: str, help: str, buckets: Sequence[float] = LATENCY_BUCKETS) -> Histogram:
+        return self._add(Histogram(f"{self.prefix}_{name}", help, buckets))
+
+    def collector(self, fn: Callable[[], Iterable[Tuple]]):
+        self.collectors.append(fn)
+        return fn
+
+    def snapshot(self, reset: bool = False) -> Dict:
+        """Counts and histograms as plain data, e.g. to ship from a worker process to the parent"""
+        return {name: metric.snapshot(reset) for name, metric in self.metrics.items()}
+
+    def merge(self, snapshot: Optional[Dict]):
+        """Add a worker's snapshot to this process's metrics"""
+        for name, values in (snapshot or {}).items():
+            if name in self.metrics:
+                self.metrics[name].merge(values)
+
+    def reset(self):
+        self.snapshot(reset=True)
+
+    def render(self) -> str:
+        """Prometheus text exposition format (version 0.0.4)"""
+        lines = []
+        for metric in self.metrics.values():
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(_sample_line(name, labels, value) for name, labels, value in metric.samples())
+        for collect in self.collectors:
+            for name, kind, help, samples in collect():
+                name = f"{self.prefix}_{name}"
+                lines.append(f"# HELP {name} {help}")
+                lines.append(f"# TYPE {name} {kind}")
+                lines.extend(_sample_line(name, tuple(sorted(labels.items())), value) for labels, value in samples)
+        return "\n".join(lines) + "\n"
+
+    def _add(self, metric):
+        self.metrics[metric.name] = metric
+        return metric
+
+
+class _Timer:
+    __slots__ = ("histogram", "labels", "started")
+
+    def __init__(self, histogram: Histogram, labels: Dict):
+        self.histogram = histogram
+        self.labels = labels
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.observe(time.perf_counter() - self.started, **self.labels)
+        return False
+
+
+class _NullTimer:
+    """What timers are while metrics are disabled"""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_TIMER = _NullTimer()
+
+registry = Registry()
+
+STAGE_SECONDS = registry.histogram("stage_seconds", "Time spent in each pipeline stage")
+REQUEST_SECONDS = registry.histogram("request_seconds", "Time to answer an API request, by endpoint")
+DOCUMENTS = registry.counter("documents", "Documents processed, by outcome (processed, cached, failed)")
+PAGES = registry.counter("pages", "Pages processed, by how their text was obtained")
+ENTITIES = registry.counter("entities", "Entities returned, by label")
+
+
+def stage(name: str):
+    """
+    ``with stage("extract"):`` times a block into the stage histogram.
+    While metrics are disabled this returns a shared no-op timer.
+    """
+    return STAGE_SECONDS.time(stage=name)
+
+
+def timed(name: str):
+    """Decorator form of stage: every call of the function is one observation"""
+    def decorate(fn):
+        labels = {"stage": name}
+
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not registry.enabled:
+                return fn(*args, **kwargs)
+            started = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                STAGE_SECONDS.observe(time.perf_counter() - started, **labels)
+        return wrapper
+    return decorate
+
+
+def cache_samples(name: str, stats: Dict) -> List[Tuple]:
+    """Collector rows for a cache's stats(): lookups by result, and the hit ratio"""
+    return [
+        (f"{name}_lookups_total", "counter", f"{name.replace('_', ' ').capitalize()} lookups, by result",
+         [({"result": "hit"}, stats["hits"]), ({"result": "miss"}, stats["misses"])]),
+        (f"{name}_hit_ratio", "gauge", f"Share of {name.replace('_', ' ')} lookups answered from the cache",
+         [({}, stats["hit_rate"] if stats["hit_rate"] is not None else float("nan"))]),
+    ]
+
+
+def _sample_line(name: str, labels: Labels, value: float) -> str:
+    if labels:
+        rendered = ",".join(f'{key}="{_escape(str(val))}"' for key, val in labels)
+        return f"{name}{{{rendered}}} {_format_value(value)}"
+    return f"{name} {_format_value(value)}"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if value != value:
+        return "NaN"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
@@ -0,0 +1,109 @@
+import os
+import queue
+import threading
+import time
+from bisect import bisect_left
+from collections import Counter
+from concurrent.futures import Future
+from typing import Dict, List, Sequence, Tuple
+
+# how long the first request of a batch waits for others to join it
+NER_MAX_WAIT_MS = float(os.environ.get("NER_MAX_WAIT_MS", 5))
+
+# most documents run as one batch
+NER_MAX_BATCH = int(os.environ.get("NER_MAX_BATCH", 32))
+
+# texts are grouped by length (characters) so short ones don't pad out long ones
+NER_LENGTH_BUCKETS = (1_000, 10_000, 100_000)
+
+
+class MicroBatcher:
+    """
+    Coalesces concurrent single-document NER requests. Texts submitted
+    within ``max_wait_ms`` of each other (up to ``max_batch``) run as one
+    nlp.pipe call per length bucket, and each result goes back to the
+    request that submitted it.
+    """
+
+    def __init__(self, service, max_wait_ms: float = NER_MAX_WAIT_MS, max_batch: int = NER_MAX_BATCH,
+                 length_buckets: Sequence[int] = NER_LENGTH_BUCKETS):
+        self.service = service
+        self.max_wait = max_wait_ms / 1000
+        self.max_batch = max_batch
+        self.length_buckets = tuple(sorted(length_buckets))
+        self.batch_sizes = Counter()
+        self.batches = 0
+        self.docs = 0
+        self._queue: "queue.Queue[Tuple[str, Future]]" = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    @property
+    def queue_depth(self) -> int:
+        return self._queue.qsize()
+
+    def submit(self, text: str) -> Future:
+        self._ensure_running()
+        future = Future()
+        self._queue.put((text, future))
+        return future
+
+    def predict(self, text: str) -> Dict:
+        """Entities for one text, batched with whatever else arrives meanwhile"""
+        return self.submit(text).result()
+
+    def stats(self) -> Dict:
+        return {
+            'queue_depth': self.queue_depth,
+            'batches': self.batches,
+            'docs': self.docs,
+            'max_wait_ms': self.max_wait * 1000,
+            'max_batch': self.max_batch,
+            'batch_size_histogram': {str(size): n for size, n in sorted(self.batch_sizes.items())},
+        }
+
+    def after_fork(self):
+        """Start over in a forked child: the inherited queue still lists the parent's (gone) waiting thread"""
+        self._queue = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def _ensure_running(self):
+        if self._thread is None or not self._thread.is_alive():
+            with self._lock:
+                if self._thread is None or not self._thread.is_alive():
+                    self._thread = threading.Thread(target=self._run, name="ner-batcher", daemon=True)
+                    self._thread.start()
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.max_wait
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            self._run_batch(batch)
+
+    def _run_batch(self, batch: List[Tuple[str, Future]]):
+        self.batches += 1
+        self.docs += len(batch)
+        self.batch_sizes[len(batch)] += 1
+
+        buckets: Dict[int, List[Tuple[str, Future]]] = {}
+        for item in batch:
+            buckets.setdefault(bisect_left(self.length_buckets, len(item[0])), []).append(item)
+
+        for _, items in sorted(buckets.items()):
+            try:
+                results = self.service.predict([text for text, _ in items])
+            except Exception as exc:
+                for _, future in items:
+                    future.set_exception(exc)
+                continue
+            for (_, future), result in zip(items, results):
+                future.set_result(result)
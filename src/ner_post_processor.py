@@ -1,4 +1,10 @@
 from typing import Dict, List
+from amount_engine import parse_amounts
+from entity_table import NO_SPAN, EntityTable
+from gazetteer import load_default
+from keyword_index import KeywordIndex
+from metrics import stage
+from span_merge import SpanMerger
 from validation_rules import ValidationRules
 from date_standardizer import DateStandardizer
 
@@ -8,106 +14,116 @@ class NERPostProcessor:
     def __init__(self):
         self.validator = ValidationRules()
         self.date_std = DateStandardizer()
+        self.merger = SpanMerger()
+        self.gazetteer = load_default()
     
     def process(self, entities: Dict, text: str) -> Dict:
         """Main pipeline: Clean → Standardize → Validate → Score"""
+        table = self.process_table(EntityTable.from_dicts(entities), text)
+        
+        # 7. Validate constraints
+        return {'entities': table.to_dicts(), **self.evaluate(table)}
+    
+    def process_table(self, table: EntityTable, text: str) -> EntityTable:
+        """Stages 1-6 of process, updating the table's columns in place"""
         
         # 1. Clean text
-        cleaned = self._clean_entities(entities)
+        with stage("post_clean"):
+            self._clean_entities(table)
         
         # 2. Standardize dates
-        standardized = self.date_std.standardize_entities(cleaned)
+        with stage("post_dates"):
+            self.date_std.standardize_table(table)
         
         # 3. Standardize amounts
-        standardized = self._standardize_amounts(standardized)
+        with stage("post_amounts"):
+            self._standardize_amounts(table)
+        table.standardized = True
         
-        # 4. Add heuristic entities
-        heuristics = self._extract_heuristics(text)
-        final = self._merge_entities(standardized, heuristics)
+        # 4. Tag effective/termination dates from nearby keywords
+        with stage("post_date_roles"):
+            self._assign_date_roles(table, text)
         
-        # 5. Validate constraints
-        report = self._validate_constraints(final)
+        # 5. Add heuristic entities
+        with stage("post_heuristics"):
+            self._extract_heuristics(table, text)
         
+        # 6. Resolve overlapping spans across labels and sources
+        with stage("post_merge"):
+            self.merger.merge(table)
+        return table
+    
+    def evaluate(self, entities) -> Dict:
+        """Validation report and quality score for already processed entities (dict or EntityTable)"""
+        if not isinstance(entities, EntityTable):
+            entities = EntityTable.from_dicts(entities)
+        with stage("post_validate"):
+            report = self._validate_constraints(entities)
         return {
-            'entities': final,
             'validation_report': report,
-            'quality_score': self._calculate_quality(final, report)
+            'quality_score': self._calculate_quality(entities, report)
         }
     
-    def _clean_entities(self, entities: Dict) -> Dict:
-        cleaned = {}
-        for label, items in entities.items():
-            cleaned[label] = [
-                {
-                    **item,
-                    'text': self.validator.clean_entity_text(item['text'])
-                }
-                for item in items
-            ]
-        return cleaned
+    def _clean_entities(self, table: EntityTable):
+        clean = self.validator.clean_entity_text
+        table.text = [clean(text) for text in table.text]
     
-    def _standardize_amounts(self, entities: Dict) -> Dict:
-        if 'AMOUNT' not in entities:
-            return entities
+    def _standardize_amounts(self, table: EntityTable):
+        rows = table.rows('AMOUNT')
+        if not rows:
+            return
         
-        result = {}
-        for label, items in entities.items():
-            if label == 'AMOUNT':
-                result[label] = [
-                    {
-                        'original': item['text'],
-                        **self.validator.standardize_amount(item['text']),
-                        'start': item.get('start'),
-                        'end': item.get('end')
-                    }
-                    for item in items
-                ]
-            else:
-                result[label] = items
-        return result
+        # parse the whole column at once and write the results into the table
+        columns = parse_amounts([table.text[i] for i in rows])
+        for i, value, token, valid in zip(
+            rows, columns.values.tolist(), columns.currency.tolist(), columns.valid.tolist()
+        ):
+            table.value[i] = None if value != value else value
+            table.currency[i] = token
+            table.valid[i] = valid
     
-    def _extract_heuristics(self, text: str) -> Dict:
-        parties = self.validator.extract_party_names(text)
-        heuristics = {}
-        if parties:
-            heuristics['PARTY_HEURISTIC'] = [
-                {'text': party, 'source': 'heuristic'}
-                for party in parties
-            ]
-        return heuristics
+    def _assign_date_roles(self, table: EntityTable, text: str):
+        rows = [i for i in table.rows('DATE') if table.start[i] != NO_SPAN and table.end[i] != NO_SPAN]
+        if not rows:
+            return
+        index = KeywordIndex(text)
+        if not len(index):
+            return
+        for i, role in zip(rows, index.assign((table.start[i], table.end[i]) for i in rows)):
+            table.role[i] = role
     
-    def _merge_entities(self, ml_entities: Dict, heuristics: Dict) -> Dict:
-        merged = ml_entities.copy()
-        for label, items in heuristics.items():
-            if label not in merged:
-                merged[label] = []
-            merged[label].extend(items)
-        return merged
+    def _extract_heuristics(self, table: EntityTable, text: str):
+        for entity in self.gazetteer.scan(text):
+            table.add(entity['label'], entity['text'], entity['start'], entity['end'], source='gazetteer')
+        for party, start, end in self.validator.find_party_names(text):
+            table.add('PARTY_HEURISTIC', party, start, end, source='heuristic')
     
-    def _validate_constraints(self, entities: Dict) -> List[str]:
+    def _validate_constraints(self, table: EntityTable) -> List[str]:
         warnings = []
         
         # Date logic check
-        dates = entities.get('DATE', [])
-        eff_dates = [d.get('standardized', d.get('text', '')) for d in dates if 'effective' in str(d).lower()]
-        term_dates = [d.get('standardized', d.get('text', '')) for d in dates if 'terminat' in str(d).lower()]
+        dates = table.rows('DATE')
+        eff_dates = [table.value[i] or table.text[i] for i in dates if table.role[i] == 'effective']
+        term_dates = [table.value[i] or table.text[i] for i in dates if table.role[i] == 'termination']
         
         if eff_dates and term_dates:
             valid, msg = self.validator.validate_date_logic(eff_dates[0], term_dates[0])
-            warnings.append(f"Date Logic: {msg}")
+            # only an out-of-order or unparseable pair is a warning
+            if not valid:
+                warnings.append(f"Date Logic: {msg}")
         
-        if not entities.get('AMOUNT'):
+        if not table.count('AMOUNT'):
             warnings.append("WARNING: No amount found")
-        if not any('PARTY' in k for k in entities.keys()):
+        if not any('PARTY' in label for label in table.labels):
             warnings.append("WARNING: No parties found")
             
         return warnings
     
-    def _calculate_quality(self, entities: Dict, report: List) -> float:
+    def _calculate_quality(self, table: EntityTable, report: List) -> float:
         score = 0.0
         
         # Entity coverage
-        types_found = len([k for k, v in entities.items() if v])
+        types_found = len([label for label, n in table.label_counts().items() if n])
         score += min(types_found * 0.25, 1.0)
         
         # Penalty for warnings
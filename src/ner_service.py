@@ -0,0 +1,239 @@
+import json
+import math
+import os
+import re
+import threading
+import time
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+NER_MODEL_PATH = os.environ.get(
+    "NER_MODEL_PATH", os.path.join(os.path.dirname(__file__), "..", "models", "legal_ner")
+)
+NER_BATCH_SIZE = int(os.environ.get("NER_BATCH_SIZE", 32))
+NER_N_PROCESS = int(os.environ.get("NER_N_PROCESS", 1))
+
+# texts longer than this (characters) are run as overlapping windows, so
+# no spaCy Doc is ever larger than one window however long the document
+NER_WINDOW_CHARS = int(os.environ.get("NER_WINDOW_CHARS", 10_000))
+
+# characters shared by neighbouring windows; entities cut by a window edge
+# are read whole by the neighbour
+NER_WINDOW_OVERLAP = int(os.environ.get("NER_WINDOW_OVERLAP", 500))
+
+# sentence ends a window may be cut after when no line break is near
+_SENTENCE_END = re.compile(r'[.!?;]["\')\]]*\s')
+
+# components the entity recognizer needs; everything else in the pipeline is disabled
+NER_COMPONENTS = ("tok2vec", "transformer", "ner")
+
+
+class NERService:
+    """
+    Serves the trained spaCy pipeline: loaded once per process, only the
+    components NER needs enabled, and every call batched through nlp.pipe.
+    Output uses the same {label: [{text, start, end}]} shape as the
+    heuristic extractor so it can go straight into NERPostProcessor.process.
+
+    Texts longer than ``window_chars`` are split into overlapping windows
+    (see split_windows) that stream through the same nlp.pipe call, so
+    peak memory depends on the window size and batch size, not on the
+    document length.
+    """
+
+    def __init__(self, model_path: str = NER_MODEL_PATH, batch_size: int = NER_BATCH_SIZE,
+                 n_process: int = NER_N_PROCESS, window_chars: int = NER_WINDOW_CHARS,
+                 window_overlap: int = NER_WINDOW_OVERLAP):
+        if not 0 <= window_overlap < window_chars // 2:
+            raise ValueError("window_overlap must be less than half of window_chars")
+        self.model_path = model_path
+        self.batch_size = batch_size
+        self.n_process = n_process
+        self.window_chars = window_chars
+        self.window_overlap = window_overlap
+        self.nlp = None
+        self.load_seconds: Optional[float] = None
+        self.last_batch: Dict = {}
+        self.totals = {'batches': 0, 'docs': 0, 'windows': 0, 'tokens': 0, 'seconds': 0.0}
+        self._lock = threading.Lock()
+
+    @property
+    def available(self) -> bool:
+        return os.path.isdir(self.model_path)
+
+    @property
+    def version(self) -> str:
+        """
+        Model name/version plus weight timestamps, so a retrained model gets
+        a new version, and the windowing (it can change entities at window
+        edges)
+        """
+        if not self.available:
+            return 'none'
+        with open(os.path.join(self.model_path, 'meta.json'), encoding='utf-8') as f:
+            meta = json.load(f)
+        stamp = max(
+            int(os.path.getmtime(os.path.join(root, name)))
+            for root, _, files in os.walk(self.model_path) for name in files
+        )
+        return f"{meta.get('name')}-{meta.get('version')}-{stamp}-w{self.window_chars}/{self.window_overlap}"
+
+    @property
+    def labels(self) -> List[str]:
+        return list(self.load().get_pipe('ner').labels)
+
+    def load(self):
+        """Load the model (only the first call does any work)"""
+        if self.nlp is None:
+            with self._lock:
+                if self.nlp is None:
+                    import spacy
+
+                    started = time.perf_counter()
+                    pipeline = spacy.util.load_config(os.path.join(self.model_path, 'config.cfg'))['nlp']['pipeline']
+                    nlp = spacy.load(self.model_path, disable=[p for p in pipeline if p not in NER_COMPONENTS])
+                    self.load_seconds = time.perf_counter() - started
+                    self.nlp = nlp
+        return self.nlp
+
+    def predict(self, texts: Iterable[str]) -> List[Dict]:
+        """Entities for each text, in input order"""
+        nlp = self.load()
+        texts = list(texts)
+        started = time.perf_counter()
+        results: List[Dict] = [{} for _ in texts]
+        candidates: List[Tuple] = []
+        current, tokens, windows = None, 0, 0
+        # docs come back in input order, so a text is finished as soon as the next one starts
+        for doc, (i, start, end) in nlp.pipe(self._windows(texts), as_tuples=True, batch_size=self.batch_size,
+                                             n_process=self.n_process):
+            if i != current:
+                if candidates:
+                    results[current] = merge_windows(texts[current], candidates)
+                    candidates = []
+                current = i
+            tokens += len(doc)
+            windows += 1
+            if start == 0 and end == len(texts[i]):
+                results[i] = self.doc_entities(doc)
+                continue
+            # distance to the nearest window edge that cuts the text: more context reads better
+            cut_left, cut_right = start > 0, end < len(texts[i])
+            for ent in doc.ents:
+                margin = min(ent.start_char if cut_left else math.inf,
+                             end - start - ent.end_char if cut_right else math.inf)
+                candidates.append((start + ent.start_char, start + ent.end_char, margin, ent.label_))
+        if candidates:
+            results[current] = merge_windows(texts[current], candidates)
+        self._record_batch(len(texts), tokens, time.perf_counter() - started, windows)
+        return results
+
+    def _windows(self, texts: List[str]) -> Iterator[Tuple[str, Tuple[int, int, int]]]:
+        """(window text, (text index, start, end)), produced lazily as nlp.pipe consumes them"""
+        for i, text in enumerate(texts):
+            if len(text) <= self.window_chars:
+                yield text, (i, 0, len(text))
+                continue
+            for start, end in split_windows(text, self.window_chars, self.window_overlap):
+                yield text[start:end], (i, start, end)
+
+    @staticmethod
+    def doc_entities(doc) -> Dict:
+        entities: Dict[str, List] = {}
+        for ent in doc.ents:
+            entities.setdefault(ent.label_, []).append(
+                {'text': ent.text, 'start': ent.start_char, 'end': ent.end_char, 'source': 'model'}
+            )
+        return entities
+
+    def stats(self) -> Dict:
+        seconds = self.totals['seconds']
+        return {
+            'model_path': os.path.abspath(self.model_path),
+            'loaded': self.nlp is not None,
+            'load_seconds': self.load_seconds,
+            'batch_size': self.batch_size,
+            'n_process': self.n_process,
+            'window_chars': self.window_chars,
+            'window_overlap': self.window_overlap,
+            'last_batch': self.last_batch,
+            'totals': {
+                **self.totals,
+                'tokens_per_second': self.totals['tokens'] / seconds if seconds else None,
+            },
+        }
+
+    def _record_batch(self, docs: int, tokens: int, seconds: float, windows: int = 0):
+        self.last_batch = {
+            'docs': docs,
+            'windows': windows,
+            'tokens': tokens,
+            'seconds': seconds,
+            'tokens_per_second': tokens / seconds if seconds else None,
+        }
+        with self._lock:
+            self.totals['batches'] += 1
+            self.totals['docs'] += docs
+            self.totals['windows'] += windows
+            self.totals['tokens'] += tokens
+            self.totals['seconds'] += seconds
+
+
+def split_windows(text: str, size: int = NER_WINDOW_CHARS,
+                  overlap: int = NER_WINDOW_OVERLAP) -> Iterator[Tuple[int, int]]:
+    """
+    (start, end) of overlapping windows covering ``text``. Windows are at
+    most ``size`` characters, neighbours share at least ``overlap``, and
+    every cut is placed after a line break, else a sentence end, else a
+    space, searched in the last half of the window (a hard cut only when
+    the text has none of them).
+    """
+    start, length = 0, len(text)
+    while True:
+        if length - start <= size:
+            yield start, length
+            return
+        end = _boundary(text, start + size // 2, start + size)
+        yield start, end
+        # the next window starts at a boundary at least ``overlap`` before this one ends
+        start = _boundary(text, max(start + 1, end - 2 * overlap), end - overlap)
+
+
+def _boundary(text: str, lo: int, hi: int) -> int:
+    """The last cut point in text[lo:hi], right after its separator"""
+    newline = text.rfind("\n", lo, hi)
+    if newline >= 0:
+        return newline + 1
+    last = None
+    for last in _SENTENCE_END.finditer(text, lo, hi):
+        pass
+    if last is not None:
+        return last.end()
+    space = max(text.rfind(" ", lo, hi), text.rfind("\t", lo, hi))
+    return space + 1 if space >= 0 else hi
+
+
+def merge_windows(text: str, candidates: List[Tuple]) -> Dict:
+    """
+    Entities in document coordinates from the (start, end, margin, label)
+    of every window of ``text``. Entities from one window never overlap,
+    so overlapping ones are two windows reading the same stretch: among
+    them the readings furthest from a window edge (largest margin) win.
+    """
+    candidates.sort(key=lambda c: (c[0], c[1]))
+    kept = []
+    cluster, cluster_end = [], -1
+    for candidate in candidates + [(math.inf, math.inf, 0, None)]:
+        if cluster and candidate[0] >= cluster_end:
+            chosen = []
+            for c in sorted(cluster, key=lambda c: (-c[2], c[0])):
+                if all(c[1] <= k[0] or k[1] <= c[0] for k in chosen):
+                    chosen.append(c)
+            kept.extend(chosen)
+            cluster, cluster_end = [], -1
+        cluster.append(candidate)
+        cluster_end = max(cluster_end, candidate[1])
+
+    entities: Dict[str, List] = {}
+    for start, end, _, label in sorted(kept):
+        entities.setdefault(label, []).append({'text': text[start:end], 'start': start, 'end': end, 'source': 'model'})
+    return entities
@@ -0,0 +1,226 @@
+import os
+import shutil
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+
+import fitz  # PyMuPDF
+import numpy as np
+import pytesseract
+from PIL import Image
+
+from image_preprocess import OCR_PREPROCESS_BELOW, gray_view, preprocess
+from metrics import STAGE_SECONDS, registry
+from pdf_extractor import ExtractedText, extract_document, open_pdf, pdf_source
+
+# "auto" runs OCR when the tesseract binary is on PATH; "0" never does
+OCR_ENABLED = os.environ.get("OCR_ENABLED", "auto")
+
+# resolution pages are rasterized at for Tesseract
+OCR_DPI = int(os.environ.get("OCR_DPI", 300))
+
+# worker processes running Tesseract (defaults to one per core)
+OCR_WORKERS = int(os.environ.get("OCR_WORKERS", os.cpu_count() or 1))
+
+# Tesseract language(s), e.g. "eng+hin"
+OCR_LANG = os.environ.get("OCR_LANG", "eng")
+
+# a text layer with fewer letters/digits than this is treated as missing
+OCR_MIN_TEXT_CHARS = int(os.environ.get("OCR_MIN_TEXT_CHARS", 16))
+
+TESSERACT_CMD = os.environ.get("TESSERACT_CMD", "tesseract")
+
+# page routes recorded in ExtractedText.routing
+ROUTE_TEXT = "text"          # usable text layer, PyMuPDF output kept
+ROUTE_OCR = "ocr"            # no usable text layer, rasterized and OCR'd
+ROUTE_BLANK = "blank"        # no text layer and nothing drawn that OCR could read
+ROUTE_NO_OCR = "no-ocr"      # needed OCR but it is disabled or Tesseract is missing
+
+_ocr_pool = None
+
+
+@lru_cache(maxsize=1)
+def tesseract_version() -> Optional[str]:
+    """Installed Tesseract version, or None when OCR can't run"""
+    if OCR_ENABLED == "0" or not shutil.which(TESSERACT_CMD):
+        return None
+    pytesseract.pytesseract.tesseract_cmd = TESSERACT_CMD
+    try:
+        return str(pytesseract.get_tesseract_version())
+    except Exception:
+        return None
+
+
+def ocr_version() -> str:
+    """Part of the text cache key: OCR'd text changes with the engine and its settings"""
+    version = tesseract_version()
+    return f"tesseract-{version}:{OCR_DPI}:{OCR_LANG}:{OCR_PREPROCESS_BELOW}" if version else "no-ocr"
+
+
+def has_text_layer(text: str, min_chars: int = OCR_MIN_TEXT_CHARS) -> bool:
+    count = 0
+    for c in text:
+        if c.isalnum():
+            count += 1
+            if count >= min_chars:
+                return True
+    return False
+
+
+def extract_with_ocr(source, parallel: bool = True, dpi: int = OCR_DPI, lang: str = OCR_LANG,
+                     workers: Optional[int] = None) -> ExtractedText:
+    """
+    extract_document, then OCR for the pages whose text layer is missing.
+
+    Every page first takes the PyMuPDF path. Only pages with fewer than
+    OCR_MIN_TEXT_CHARS letters/digits that have an image to read are
+    rasterized at ``dpi`` and run through Tesseract, spread over the OCR
+    process pool when there are several. The route taken and the time
+    spent on every page are recorded in the result's ``routing``.
+    """
+    workers = workers or OCR_WORKERS
+    with pdf_source(source) as src:
+        started = time.perf_counter()
+        extracted = extract_document(src, parallel=parallel)
+        extract_ms = (time.perf_counter() - started) * 1000
+        texts = [extracted.page_text(i) for i in range(extracted.page_count)]
+        routing = [{"page": i + 1, "route": ROUTE_TEXT, "chars": len(text)} for i, text in enumerate(texts)]
+        missing = [i for i, text in enumerate(texts) if not has_text_layer(text)]
+        if missing:
+            with open_pdf(src) as doc:
+                candidates = [i for i in missing if _has_visible_content(doc[i])]
+            for i in missing:
+                routing[i]["route"] = ROUTE_BLANK
+            if candidates and tesseract_version() is None:
+                for i in candidates:
+                    routing[i]["route"] = ROUTE_NO_OCR
+            elif candidates:
+                for page, text, timing in _run_ocr(src, candidates, dpi, lang, workers if parallel else 1):
+                    texts[page] = text
+                    routing[page].update(timing, route=ROUTE_OCR, chars=len(text))
+                    # timed in the OCR worker, recorded here
+                    STAGE_SECONDS.observe((timing["raster_ms"] + timing["ocr_ms"]) / 1000, stage="ocr_page")
+                    if "preprocess_ms" in timing:
+                        STAGE_SECONDS.observe(timing["preprocess_ms"] / 1000, stage="ocr_preprocess")
+
+    if any(page["route"] == ROUTE_OCR for page in routing):
+        extracted = ExtractedText(texts)
+    extracted.routing = routing
+    extracted.extract_ms = extract_ms
+    return extracted
+
+
+def routing_summary(extracted: ExtractedText) -> Dict:
+    """Page counts per route and time spent, for API responses and logs"""
+    routes: Dict[str, int] = {}
+    ocr_ms = 0.0
+    for page in extracted.routing:
+        routes[page["route"]] = routes.get(page["route"], 0) + 1
+        ocr_ms += page.get("raster_ms", 0) + page.get("ocr_ms", 0)
+    return {
+        "pages": extracted.page_count,
+        "routes": routes,
+        "extract_ms": round(extracted.extract_ms, 2),
+        "ocr_ms": round(ocr_ms, 2),
+    }
+
+
+def _has_visible_content(page) -> bool:
+    """Scanned pages carry their content as images (rarely as vector drawings)"""
+    return bool(page.get_images(full=False)) or bool(page.get_drawings())
+
+
+def _run_ocr(src, pages: List[int], dpi: int, lang: str, workers: int) -> List[Tuple[int, str, Dict]]:
+    if workers < 2 or len(pages) < 2:
+        return _ocr_pages(src, pages, dpi, lang)
+    # round-robin so each worker gets one copy of the PDF and a similar share of pages
+    parts = min(workers, len(pages))
+    pool = _get_ocr_pool(workers)
+    futures = [pool.submit(_ocr_pages, src, pages[i::parts], dpi, lang) for i in range(parts)]
+    results = []
+    for future in futures:
+        results.extend(future.result())
+    return results
+
+
+def _ocr_pages(src, pages: List[int], dpi: int, lang: str) -> List[Tuple[int, str, Dict]]:
+    """
+    Rasterize and OCR ``pages`` of one document (runs in an OCR worker).
+    A page read with a mean confidence below OCR_PREPROCESS_BELOW is
+    cleaned up (image_preprocess.preprocess) and read again; the better
+    of the two readings is kept.
+    """
+    pytesseract.pytesseract.tesseract_cmd = TESSERACT_CMD
+    results = []
+    with open_pdf(src) as doc:
+        for i in pages:
+            started = time.perf_counter()
+            pix = doc[i].get_pixmap(dpi=dpi, colorspace=fitz.csGRAY)
+            gray = gray_view(pix)  # shares pix's buffer, so pix stays referenced until the page is done
+            rasterized = time.perf_counter()
+            text, confidence = _read(gray, lang)
+            done = time.perf_counter()
+            timing = {
+                "dpi": dpi,
+                "raster_ms": round((rasterized - started) * 1000, 2),
+                "ocr_ms": round((done - rasterized) * 1000, 2),
+                "confidence": confidence,
+            }
+            if confidence is None or confidence < OCR_PREPROCESS_BELOW:
+                cleaned, steps = preprocess(gray, dpi)
+                preprocessed = time.perf_counter()
+                second_text, second_confidence = _read(cleaned, lang)
+                timing.update(
+                    preprocess_ms=round((preprocessed - done) * 1000, 2),
+                    ocr_ms=round(timing["ocr_ms"] + (time.perf_counter() - preprocessed) * 1000, 2),
+                    first_confidence=confidence,
+                    skew=steps["skew"],
+                )
+                if (second_confidence or -1) > (confidence or -1):
+                    text, timing["confidence"] = second_text, second_confidence
+                    timing["preprocessed"] = True
+            results.append((i, text, timing))
+            del gray, pix
+    return results
+
+
+def _read(gray, lang: str) -> Tuple[str, Optional[float]]:
+    height, width = gray.shape
+    # wraps the array's buffer without copying it (rows must be contiguous)
+    image = Image.frombuffer("L", (width, height), np.ascontiguousarray(gray), "raw", "L", 0, 1)
+    return ocr_text(pytesseract.image_to_data(image, lang=lang, output_type=pytesseract.Output.DICT))
+
+
+def ocr_text(data: Dict) -> Tuple[str, Optional[float]]:
+    """
+    Page text and mean word confidence (0-100) from Tesseract's
+    image_to_data dict, with one output line per Tesseract line.
+    """
+    lines: List[List[str]] = []
+    last_line = None
+    confidences = []
+    for word, conf, block, par, line in zip(data["text"], data["conf"], data["block_num"], data["par_num"],
+                                            data["line_num"]):
+        word = word.strip()
+        if not word:
+            continue
+        if (block, par, line) != last_line:
+            lines.append([])
+            last_line = (block, par, line)
+        lines[-1].append(word)
+        conf = float(conf)
+        if conf >= 0:
+            confidences.append(conf)
+    text = "\n".join(" ".join(words) for words in lines)
+    if text:
+        text += "\n"
+    return text, round(sum(confidences) / len(confidences), 2) if confidences else None
+
+
+def _get_ocr_pool(workers: int) -> ProcessPoolExecutor:
+    global _ocr_pool
+    if _ocr_pool is None:
+        # timings come back with each page; a worker keeps none of the server's counts
+        _ocr_pool = ProcessPoolExecutor(max_workers=workers, initializer=registry.reset)
+    return _ocr_pool
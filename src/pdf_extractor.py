@@ -0,0 +1,165 @@
+import os
+import shutil
+import tempfile
+from array import array
+from bisect import bisect_right
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from itertools import accumulate
+from typing import Dict, List, Optional
+
+import fitz  # PyMuPDF
+
+# uploads above this size are spooled to a private temp file instead of memory
+MAX_IN_MEMORY_PDF_BYTES = int(os.environ.get("MAX_IN_MEMORY_PDF_BYTES", 64 * 1024 * 1024))
+
+# documents with at least this many pages are extracted on the process pool
+PARALLEL_PAGE_THRESHOLD = int(os.environ.get("PARALLEL_PAGE_THRESHOLD", 64))
+
+# worker processes for page-parallel extraction (defaults to one per core)
+EXTRACT_WORKERS = int(os.environ.get("EXTRACT_WORKERS", os.cpu_count() or 1))
+
+# bump when a change to extraction alters the text it returns (cached text is keyed by it)
+EXTRACTOR_VERSION = f"1:{fitz.VersionBind}"
+
+_extract_pool = None
+
+
+class ExtractedText:
+    """
+    Document text joined in page order, plus the offset where each page starts.
+    ``routing`` records how each page's text was obtained when the OCR stage
+    ran (see ocr_stage.extract_with_ocr).
+    """
+
+    def __init__(self, pages: List[str]):
+        self.text = "".join(pages)
+        self.page_starts = array('I', accumulate((len(p) for p in pages[:-1]), initial=0)) if pages else array('I')
+        self.routing: List[Dict] = []
+        self.extract_ms = 0.0
+
+    @classmethod
+    def from_offsets(cls, text: str, page_starts: array) -> 'ExtractedText':
+        """Rebuild from ``text`` and ``page_starts`` as stored, e.g. by the text cache."""
+        extracted = cls([])
+        extracted.text = text
+        extracted.page_starts = page_starts
+        return extracted
+
+    @property
+    def page_count(self) -> int:
+        return len(self.page_starts)
+
+    def page_for_offset(self, offset: int) -> int:
+        """0-based page number containing a character offset of ``text``."""
+        return max(bisect_right(self.page_starts, offset) - 1, 0)
+
+    def page_span(self, page: int):
+        """(start, end) offsets of one page inside ``text``."""
+        start = self.page_starts[page]
+        end = self.page_starts[page + 1] if page + 1 < self.page_count else len(self.text)
+        return start, end
+
+    def page_text(self, page: int) -> str:
+        start, end = self.page_span(page)
+        return self.text[start:end]
+
+
+@contextmanager
+def open_pdf(source):
+    """
+    Open a PDF from raw bytes, a file path or an upload (anything with a
+    ``stream``, like werkzeug's FileStorage) without sharing any file
+    between requests.
+    """
+    with pdf_source(source) as src:
+        doc = _open(src)
+        try:
+            yield doc
+        finally:
+            doc.close()
+
+
+@contextmanager
+def pdf_source(source):
+    """
+    Resolve an upload to something every process can open: the PDF bytes,
+    or a path. Documents up to MAX_IN_MEMORY_PDF_BYTES stay in memory;
+    larger uploads are spooled to a uniquely named temp file so they are
+    not held in RAM twice.
+    """
+    if isinstance(source, (bytes, bytearray, memoryview, str, os.PathLike)):
+        yield source
+        return
+
+    stream = getattr(source, "stream", source)
+    stream.seek(0, os.SEEK_END)
+    size = stream.tell()
+    stream.seek(0)
+
+    if size <= MAX_IN_MEMORY_PDF_BYTES:
+        yield stream.read()
+        return
+
+    tmp = tempfile.NamedTemporaryFile(prefix="upload_", suffix=".pdf", delete=False)
+    try:
+        with tmp:
+            shutil.copyfileobj(stream, tmp)
+        yield tmp.name
+    finally:
+        os.remove(tmp.name)
+
+
+def extract_document(source, parallel: bool = True, workers: Optional[int] = None) -> ExtractedText:
+    """
+    Extract every page's text layer. Documents with PARALLEL_PAGE_THRESHOLD
+    pages or more are split into page ranges and extracted on the process
+    pool, each worker opening its own fitz handle; smaller ones are read
+    in-process where the pool overhead would not pay off.
+    """
+    workers = workers or EXTRACT_WORKERS
+    with pdf_source(source) as src:
+        with _open(src) as doc:
+            page_count = doc.page_count
+            if not parallel or workers < 2 or page_count < PARALLEL_PAGE_THRESHOLD:
+                return ExtractedText([page.get_text() for page in doc])
+
+        pool = _get_extract_pool(workers)
+        futures = [
+            pool.submit(_extract_page_range, src, start, stop)
+            for start, stop in page_ranges(page_count, workers)
+        ]
+        pages = []
+        for future in futures:
+            pages.extend(future.result())
+        return ExtractedText(pages)
+
+
+def page_ranges(page_count: int, parts: int):
+    """Split ``range(page_count)`` into at most ``parts`` contiguous (start, stop) ranges."""
+    parts = max(1, min(parts, page_count))
+    size, extra = divmod(page_count, parts)
+    start = 0
+    for i in range(parts):
+        stop = start + size + (1 if i < extra else 0)
+        if stop > start:
+            yield start, stop
+        start = stop
+
+
+def _extract_page_range(src, start: int, stop: int) -> List[str]:
+    with _open(src) as doc:
+        return [doc[i].get_text() for i in range(start, stop)]
+
+
+def _open(src):
+    if isinstance(src, (str, os.PathLike)):
+        return fitz.open(src)
+    return fitz.open(stream=src, filetype="pdf")
+
+
+def _get_extract_pool(workers: int) -> ProcessPoolExecutor:
+    global _extract_pool
+    if _extract_pool is None:
+        _extract_pool = ProcessPoolExecutor(max_workers=workers)
+    return _extract_pool
@@ -0,0 +1,138 @@
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, Optional, Union
+
+# bump when a change to cleaning, extraction or validation rules alters responses
+PIPELINE_VERSION = "8"
+
+RESULT_CACHE_SIZE = int(os.environ.get("RESULT_CACHE_SIZE", 256))
+
+# optional on-disk tier shared by every worker process (unset = memory only)
+RESULT_CACHE_DIR = os.environ.get("RESULT_CACHE_DIR") or None
+
+
+def content_hash(source) -> str:
+    """sha256 of PDF bytes or an upload stream (the stream is rewound afterwards)"""
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        return hashlib.sha256(source).hexdigest()
+    stream = getattr(source, "stream", source)
+    stream.seek(0)
+    digest = hashlib.sha256()
+    for chunk in iter(lambda: stream.read(1 << 20), b""):
+        digest.update(chunk)
+    stream.seek(0)
+    return digest.hexdigest()
+
+
+class ResultCache:
+    """
+    Content-addressed cache of processed documents: a bounded in-memory
+    LRU in front of an optional directory of JSON files. Keys combine the
+    hash of the uploaded bytes with the pipeline/model version, so a rule
+    or model update never serves stale results. ``version`` may be a
+    callable, read each time a key is built, for inputs that change while
+    the process runs (e.g. the KYC master list).
+    """
+
+    def __init__(self, max_entries: int = RESULT_CACHE_SIZE, cache_dir: Optional[str] = RESULT_CACHE_DIR,
+                 version: Union[str, Callable[[], str]] = PIPELINE_VERSION):
+        self.max_entries = max_entries
+        self.cache_dir = cache_dir
+        self.version = version
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries: "OrderedDict[str, Dict]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def key(self, source) -> str:
+        return self.key_for_hash(content_hash(source))
+
+    def key_for_hash(self, digest: str) -> str:
+        """key() for a content_hash that is already known"""
+        return hashlib.sha256(f"{digest}:{self._current_version()}".encode()).hexdigest()
+
+    def get(self, key: str) -> Optional[Dict]:
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return value
+
+        value = self._read_disk(key)
+        with self._lock:
+            if value is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self.disk_hits += 1
+            self._remember(key, value)
+        return value
+
+    def put(self, key: str, value: Dict):
+        with self._lock:
+            self._remember(key, value)
+        self._write_disk(key, value)
+
+    def invalidate(self, version: Optional[str] = None):
+        """Drop every cached result, e.g. after a rule or model update"""
+        with self._lock:
+            self._entries.clear()
+            if version is not None:
+                self.version = version
+        if self.cache_dir and os.path.isdir(self.cache_dir):
+            shutil.rmtree(self.cache_dir, ignore_errors=True)
+
+    def stats(self) -> Dict:
+        lookups = self.hits + self.misses
+        return {
+            'entries': len(self._entries),
+            'max_entries': self.max_entries,
+            'disk': self.cache_dir is not None,
+            'hits': self.hits,
+            'disk_hits': self.disk_hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'hit_rate': self.hits / lookups if lookups else None,
+            'version': self._current_version(),
+        }
+
+    def _current_version(self) -> str:
+        return self.version() if callable(self.version) else self.version
+
+    def _remember(self, key: str, value: Dict):
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key[:2], key + ".json")
+
+    def _read_disk(self, key: str) -> Optional[Dict]:
+        if not self.cache_dir:
+            return None
+        try:
+            with open(self._path(key), encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _write_disk(self, key: str, value: Dict):
+        if not self.cache_dir:
+            return
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # write-then-rename so concurrent readers never see a partial file
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(value, f)
+        os.replace(tmp, path)
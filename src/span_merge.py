@@ -0,0 +1,98 @@
+import os
+from bisect import bisect_left
+from typing import Dict, List, Optional, Sequence
+
+from entity_table import NO_SPAN, EntityTable
+
+# criteria deciding which of two overlapping entities is kept, most important first:
+# "source" (SOURCE_PRIORITY), "label" (LABEL_PRIORITY), "length" (longer span wins)
+MERGE_PRECEDENCE = tuple(os.environ.get("MERGE_PRECEDENCE", "source,label,length").split(","))
+
+# lower wins; None is the regex scanner in document_pipeline
+SOURCE_PRIORITY = {'model': 0, None: 1, 'gazetteer': 2, 'heuristic': 3}
+
+# lower wins; labels not listed rank after all listed ones
+LABEL_PRIORITY = {'PARTY': 0, 'ORG': 1, 'AMOUNT': 2, 'DATE': 3, 'JURISDICTION': 4, 'PARTY_HEURISTIC': 5}
+
+
+class SpanMerger:
+    """
+    Resolves overlapping and contained entity spans in an EntityTable.
+
+    A sweep over the rows sorted by start groups them into clusters of
+    transitively overlapping spans; within a cluster the rows are taken
+    in precedence order and each is kept unless it overlaps one already
+    kept. Sorting dominates, so a merge is O(n log n). Rows without a
+    span are always kept. With ``cross_label=False`` only entities of the
+    same label compete.
+    """
+
+    def __init__(self, precedence: Sequence[str] = MERGE_PRECEDENCE,
+                 source_priority: Optional[Dict] = None, label_priority: Optional[Dict[str, int]] = None,
+                 cross_label: bool = True):
+        unknown = set(precedence) - {'source', 'label', 'length'}
+        if unknown:
+            raise ValueError(f"Unknown merge precedence: {', '.join(sorted(unknown))}")
+        self.precedence = tuple(precedence)
+        self.source_priority = SOURCE_PRIORITY if source_priority is None else source_priority
+        self.label_priority = LABEL_PRIORITY if label_priority is None else label_priority
+        self.cross_label = cross_label
+
+    def merge(self, table: EntityTable) -> int:
+        """Drop the losing rows from ``table`` in place and return how many were dropped"""
+        spans = [i for i in range(len(table)) if table.start[i] != NO_SPAN and table.end[i] != NO_SPAN]
+        if len(spans) < 2:
+            return 0
+        if self.cross_label:
+            groups = [spans]
+        else:
+            by_label: Dict[int, List[int]] = {}
+            for i in spans:
+                by_label.setdefault(table.label[i], []).append(i)
+            groups = list(by_label.values())
+
+        rank = self._rank(table)
+        starts, ends = table.start, table.end
+        dropped = set()
+        for rows in groups:
+            rows.sort(key=starts.__getitem__)
+            cluster, cluster_end = [], None
+            for i in rows:
+                if cluster and starts[i] >= cluster_end:
+                    if len(cluster) > 1:
+                        dropped.update(self._resolve(table, cluster, rank))
+                    cluster, cluster_end = [], None
+                cluster.append(i)
+                cluster_end = ends[i] if cluster_end is None else max(cluster_end, ends[i])
+            if len(cluster) > 1:
+                dropped.update(self._resolve(table, cluster, rank))
+
+        if dropped:
+            table.take([i for i in range(len(table)) if i not in dropped])
+        return len(dropped)
+
+    def _rank(self, table: EntityTable):
+        labels = [self.label_priority.get(label, len(self.label_priority)) for label in table.labels]
+        unranked = len(self.source_priority)
+        criteria = {
+            'source': lambda i: self.source_priority.get(table.source[i], unranked),
+            'label': lambda i: labels[table.label[i]],
+            'length': lambda i: table.start[i] - table.end[i],
+        }
+        keys = [criteria[name] for name in self.precedence]
+        return lambda i: tuple(key(i) for key in keys) + (table.start[i], i)
+
+    @staticmethod
+    def _resolve(table: EntityTable, cluster: List[int], rank) -> List[int]:
+        """Rows of one overlap cluster that lose to a higher-precedence overlapping row"""
+        kept_starts, kept_ends, dropped = [], [], []
+        for i in sorted(cluster, key=rank):
+            start, end = table.start[i], table.end[i]
+            # kept spans never overlap each other, so they are ordered by start and by end alike
+            k = bisect_left(kept_ends, start + 1)
+            if k < len(kept_starts) and kept_starts[k] < end:
+                dropped.append(i)
+                continue
+            kept_starts.insert(k, start)
+            kept_ends.insert(k, end)
+        return dropped
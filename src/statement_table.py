@@ -0,0 +1,349 @@
+import os
+import re
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from amount_engine import parse_amounts
+from date_standardizer import DateStandardizer
+from pdf_extractor import open_pdf
+
+# columns of the transaction frame, in order
+STATEMENT_COLUMNS = ("date", "description", "debit", "credit", "balance")
+
+# header words naming each column, checked in this order ("Transaction Date" is a date,
+# "Transaction Details" a description); a single "Amount" column is split by its Dr/Cr marks
+HEADER_ALIASES = (
+    ("date", ("date", "dated")),
+    ("balance", ("balance",)),
+    ("debit", ("debit", "debits", "withdrawal", "withdrawals", "dr", "out")),
+    ("credit", ("credit", "credits", "deposit", "deposits", "cr", "in")),
+    ("amount", ("amount", "amt")),
+    ("description", ("description", "narration", "particulars", "details", "remarks", "transaction", "transactions")),
+)
+AMOUNT_COLUMNS = ("debit", "credit", "balance", "amount")
+_ALIAS = {word: name for name, words in reversed(HEADER_ALIASES) for word in words}
+
+# word columns while parsing: the frame's text and amount columns, then a signed "amount" column
+_CELLS = ("date", "description", "debit", "credit", "balance", "amount")
+_DATE, _DESCRIPTION, _DEBIT, _CREDIT, _BALANCE, _AMOUNT = range(len(_CELLS))
+
+# money as statements print it: 1,234.56 (12,34,567.00) -500.00 ₹1,000.00 1,234.56Cr; Dr/Cr may be separate words
+AMOUNT_TOKEN_RE = re.compile(
+    r'^(?:\(?[-+]?(?:[$€£₹]|Rs\.?|INR|USD)?\d[\d,]*\.\d{2}\)?(?:Cr|Dr|CR|DR)?\.?|Cr\.?|Dr\.?|CR|DR)$',
+    re.MULTILINE,
+)
+
+# words a transaction date starts with: 15/03/2024, 2024-03-15, 15.03.24, 15, Mar, March
+DATE_TOKEN_RE = re.compile(
+    r'^(?:\d{1,4}(?:[-/.]\d{1,2}(?:[-/.]\d{2,4})?)?|(?:jan|feb|mar|apr|may|jun|jul|aug|sept?|oct|nov|dec)[a-z]*)[.,]?$',
+    re.MULTILINE | re.IGNORECASE,
+)
+
+# a Dr/Cr mark ending an amount; DR_CR_LINE_RE captures it once per line ('' when there is none)
+DR_CR_RE = re.compile(r'\s*(?:Cr|Dr|CR|DR)\.?$', re.MULTILINE)
+DR_CR_LINE_RE = re.compile(r'^.*?(?:\s*(Cr|Dr|CR|DR)\.?)?$', re.MULTILINE)
+
+# a line holding the balance carried into the statement rather than a transaction
+OPENING_BALANCE_RE = re.compile(r'opening\s+balance|balance\s+(?:b/f|brought\s+forward)|brought\s+forward', re.I)
+
+# rows whose balance is off by more than this fail the running-balance check
+BALANCE_TOLERANCE = float(os.environ.get("BALANCE_TOLERANCE", 0.005))
+
+# words further apart than this many word heights start a new header cell
+HEADER_CELL_GAP = 1.0
+
+# a line without a date further below the previous line than this many line heights
+# does not continue the previous transaction
+MAX_CONTINUATION_GAP = 2.0
+
+
+class StatementTable:
+    """
+    Transactions of a bank statement: ``frame`` is a DataFrame of date
+    (datetime64, NaT when unparseable), description, debit, credit and
+    balance (float64, NaN when empty) plus the 1-based ``page``;
+    ``opening_balance`` is the balance carried in, when printed.
+    """
+
+    def __init__(self, frame: pd.DataFrame, opening_balance: Optional[float] = None):
+        self.frame = frame
+        self.opening_balance = opening_balance
+
+    def __len__(self) -> int:
+        return len(self.frame)
+
+    @classmethod
+    def from_words(cls, pages: Sequence[Sequence[tuple]]) -> 'StatementTable':
+        """From each page's ``page.get_text("words")`` tuples"""
+        return _build(pages)
+
+    def balance_check(self, tolerance: float = BALANCE_TOLERANCE) -> Dict:
+        """
+        Running-balance consistency: each printed balance should equal the
+        previous one plus credit minus debit (the first against the
+        opening balance, when known). Statements listed newest first are
+        checked in that order. Mismatching rows are reported by index.
+        """
+        frame = self.frame
+        balance = frame["balance"].to_numpy()
+        change = frame["credit"].fillna(0).to_numpy() - frame["debit"].fillna(0).to_numpy()
+        results = []
+        for order in ("oldest_first", "newest_first"):
+            if order == "oldest_first":
+                previous = np.concatenate(([np.nan if self.opening_balance is None else self.opening_balance],
+                                           balance[:-1]))
+                expected = previous + change
+            else:
+                # the row below holds the balance before this one
+                expected = np.concatenate((balance[1:], [np.nan])) + change
+            checked = ~np.isnan(expected) & ~np.isnan(balance)
+            bad = np.flatnonzero(checked & (np.abs(expected - balance) > tolerance))
+            results.append((len(bad), order, int(checked.sum()), bad, expected))
+            if not len(bad):
+                break
+        mismatches, order, checked, bad, expected = min(results, key=lambda r: r[0])
+        return {
+            "consistent": bool(checked) and not mismatches,
+            "order": order,
+            "rows": len(frame),
+            "checked": checked,
+            "mismatches": [
+                {
+                    "row": int(i),
+                    "date": _iso(frame["date"].iat[i]),
+                    "expected": round(float(expected[i]), 2),
+                    "balance": float(balance[i]),
+                }
+                for i in bad
+            ],
+            "opening_balance": self.opening_balance,
+        }
+
+    def summary(self) -> Dict:
+        frame = self.frame
+        balances = frame["balance"].dropna()
+        return {
+            "transactions": len(frame),
+            "pages": int(frame["page"].nunique()),
+            "total_debit": round(float(frame["debit"].sum()), 2),
+            "total_credit": round(float(frame["credit"].sum()), 2),
+            "opening_balance": self.opening_balance,
+            "closing_balance": float(balances.iat[-1]) if len(balances) else None,
+            "first_date": _iso(frame["date"].min()),
+            "last_date": _iso(frame["date"].max()),
+        }
+
+    def to_records(self) -> List[Dict]:
+        """JSON-ready rows: ISO dates, None for empty cells"""
+        frame = self.frame.astype(object).where(self.frame.notna(), None)
+        frame["date"] = [_iso(value) for value in self.frame["date"]]
+        return frame.to_dict("records")
+
+
+def extract_statement(source) -> StatementTable:
+    """Transaction table of a statement PDF (bytes, path or upload)"""
+    with open_pdf(source) as doc:
+        pages = [page.get_text("words", sort=False) for page in doc]
+    return StatementTable.from_words(pages)
+
+
+def _iso(value) -> Optional[str]:
+    return None if pd.isna(value) else value.strftime("%Y-%m-%d")
+
+
+def _build(pages: Sequence[Sequence[tuple]]) -> StatementTable:
+    x0, y0, x1, y1, text, page = _word_arrays(pages)
+    if not len(x0):
+        return StatementTable(_frame([], [], *np.empty((4, 0))))
+
+    # words → lines: sort by page and vertical centre, break where the centre jumps by half a word height
+    height = float(np.median(y1 - y0)) or 1.0
+    center = (y0 + y1) / 2
+    order = np.lexsort((center, page))
+    new_line = np.ones(len(order), dtype=bool)
+    new_line[1:] = (np.diff(center[order]) > height / 2) | (np.diff(page[order]) != 0)
+    line = np.empty(len(order), dtype=np.int64)
+    line[order] = np.cumsum(new_line) - 1
+    line_start = np.flatnonzero(new_line)
+    line_page = page[order][line_start]
+    line_y = np.maximum.reduceat(center[order], line_start)
+    # reading order: by line, then left to right (the centres of one line differ slightly)
+    order = np.lexsort((x0, line))
+    x0, x1, page, line = x0[order], x1[order], page[order], line[order]
+    text = [text[i] for i in order]
+
+    # classify every word with one substitution over the joined column (no regex call per word)
+    joined = '\n'.join(text)
+    is_amount = np.array(AMOUNT_TOKEN_RE.sub('', joined).split('\n')) == ''
+    is_date = np.array(DATE_TOKEN_RE.sub('', joined).split('\n')) == ''
+    aliases = {word: _ALIAS.get(word.strip('.:/').lower()) for word in set(text)}
+    alias = [aliases[word] for word in text]
+
+    # a layout (header cells) for every page that prints a header; pages without one reuse the last
+    layouts: Dict[int, tuple] = {}
+    table_from = np.full(len(pages), -1)  # first table line of each page (-1: no table)
+    for p, n in _header_lines(line, line_page, alias).items():
+        words = slice(*np.searchsorted(line, [n, n + 1]))
+        layouts[p] = _layout(x0[words], x1[words], alias[words], height)
+        table_from[p] = n + 1
+    if not layouts:
+        return StatementTable(_frame([], [], *np.empty((4, 0))))
+    layout = None
+    for p in range(len(pages)):
+        if p in layouts:
+            layout = layouts[p]
+        elif layout is not None:
+            layouts[p] = layout
+            table_from[p] = np.searchsorted(line_page, p)
+
+    # words → columns, page by page with that page's layout
+    in_table = (table_from[page] >= 0) & (line >= table_from[page])
+    column = np.full(len(x0), -1, dtype=np.int8)
+    for p, (cell_x1, boundaries, cell_column) in layouts.items():
+        words = np.flatnonzero((page == p) & in_table)
+        column[words] = cell_column[np.searchsorted(boundaries, (x0[words] + x1[words]) / 2)]
+        amount_cells = np.flatnonzero(cell_column >= _DEBIT)
+        amounts = words[is_amount[words]]
+        if len(amount_cells) and len(amounts):
+            # amounts are right-aligned under their header
+            nearest = np.abs(x1[amounts, None] - cell_x1[None, amount_cells]).argmin(axis=1)
+            column[amounts] = cell_column[amount_cells[nearest]]
+        # text straying into an amount column belongs to the description
+        column[words[~is_amount[words] & (column[words] >= _DEBIT)]] = _DESCRIPTION
+
+    # lines → transactions: a line with a date starts one, the lines just below without a date continue it
+    lines = len(line_start)
+    line_table = np.zeros(lines, dtype=bool)
+    line_table[line[in_table]] = True
+    has_date = np.zeros(lines, dtype=bool)
+    has_date[line[(column == _DATE) & is_date]] = True
+    has_amount = np.zeros(lines, dtype=bool)
+    has_amount[line[(column >= _DEBIT) & is_amount]] = True
+    gap = np.full(lines, np.inf)
+    gap[1:] = np.where(line_page[1:] == line_page[:-1], np.diff(line_y), np.inf)
+    pitch = float(np.median(gap[np.isfinite(gap)])) if np.isfinite(gap).any() else height
+    row = np.cumsum(has_date) - 1
+    # amounts below a row that already has them are a total, not part of the row
+    row_has_amount = np.zeros(lines + 1, dtype=bool)
+    row_has_amount[row[has_date]] = has_amount[has_date]
+    stop = ~has_date & (~line_table | (gap > MAX_CONTINUATION_GAP * pitch) | (has_amount & row_has_amount[row]))
+    segment = np.cumsum(has_date | stop)
+    segment_is_row = np.zeros(segment[-1] + 1, dtype=bool)
+    segment_is_row[segment[has_date]] = True
+    kept_line = line_table & (row >= 0) & segment_is_row[segment]
+    rows = int(has_date[kept_line].sum())
+
+    # one string per (row, column); a stable sort keeps the words in reading order
+    words = np.flatnonzero(kept_line[line] & (column >= 0))
+    key = row[line[words]] * len(_CELLS) + column[words]
+    order = np.argsort(key, kind="stable")
+    words, key = words[order], key[order]
+    starts = np.flatnonzero(np.concatenate(([True], key[1:] != key[:-1])))
+    ordered = [text[i] for i in words.tolist()]
+    cells = [[''] * rows for _ in _CELLS]
+    for start, end, k in zip(starts.tolist(), np.append(starts[1:], len(key)).tolist(), key[starts].tolist()):
+        cells[k % len(_CELLS)][k // len(_CELLS)] = ' '.join(ordered[start:end])
+
+    debit, credit = np.abs(_amount_values(cells[_DEBIT])), np.abs(_amount_values(cells[_CREDIT]))
+    if any(cells[_AMOUNT]):
+        # one signed "Amount" column: Dr or negative is a debit, anything else a credit
+        amount = _amount_values(cells[_AMOUNT])
+        debit = np.where(amount < 0, -amount, debit)
+        credit = np.where(amount >= 0, amount, credit)
+    opening_balance = _opening_balance(line, text, column, is_amount,
+                                       np.flatnonzero(line_table & ~has_date & has_amount))
+    frame = _frame(cells[_DATE], cells[_DESCRIPTION], debit, credit, _amount_values(cells[_BALANCE]),
+                   line_page[has_date & kept_line] + 1)
+    return StatementTable(frame, opening_balance)
+
+
+def _word_arrays(pages: Sequence[Sequence[tuple]]):
+    """x0, y0, x1, y1 (float arrays), the words (list) and each word's 0-based page"""
+    boxes, text = [], []
+    for words in pages:
+        if words:
+            columns = tuple(zip(*words))
+            boxes.append(np.array(columns[:4], dtype=float))
+            text.extend(columns[4])
+    page = np.repeat(np.arange(len(pages)), [len(words) for words in pages])
+    x0, y0, x1, y1 = np.concatenate(boxes, axis=1) if boxes else np.empty((4, 0))
+    return x0, y0, x1, y1, text, page
+
+
+def _header_lines(line: np.ndarray, line_page: np.ndarray, alias: List[Optional[str]]) -> Dict[int, int]:
+    """
+    Page → its header line: the line naming the most columns, among those
+    naming a date column, an amount column and at least three in all
+    """
+    found: Dict[int, set] = {}
+    for i, name in enumerate(alias):
+        if name:
+            found.setdefault(int(line[i]), set()).add(name)
+    headers: Dict[int, int] = {}
+    for n, columns in sorted(found.items()):
+        if len(columns) >= 3 and "date" in columns and columns & set(AMOUNT_COLUMNS):
+            p = int(line_page[n])
+            if p not in headers or len(columns) > len(found[headers[p]]):
+                headers[p] = n
+    return headers
+
+
+def _layout(x0: np.ndarray, x1: np.ndarray, alias: List[Optional[str]], height: float):
+    """Header words → cells: (right edges, boundaries between cells, column per cell, -1 = ignored)"""
+    breaks = np.flatnonzero(x0[1:] - x1[:-1] > HEADER_CELL_GAP * height) + 1
+    starts = np.concatenate(([0], breaks))
+    ends = np.append(breaks, len(x0))
+    cell_column, taken = [], set()
+    for start, end in zip(starts, ends):
+        cell = set(alias[start:end]) - {None}
+        # first matching name in HEADER_ALIASES order, once per header ("Value Date" after "Txn Date" is ignored)
+        name = next((n for n, _ in HEADER_ALIASES if n in cell and n not in taken), None)
+        taken.add(name)
+        cell_column.append(_CELLS.index(name) if name else -1)
+    boundaries = (x1[ends[:-1] - 1] + x0[starts[1:]]) / 2
+    return x1[ends - 1], boundaries, np.array(cell_column, dtype=np.int8)
+
+
+def _opening_balance(line, text, column, is_amount, candidates) -> Optional[float]:
+    """Balance on the first dateless table line reading e.g. "Opening Balance" or "Brought Forward" """
+    for n in candidates.tolist():
+        words = range(*np.searchsorted(line, [n, n + 1]))
+        if OPENING_BALANCE_RE.search(' '.join(text[i] for i in words)):
+            amounts = ' '.join(text[i] for i in words if is_amount[i] and column[i] >= _DEBIT)
+            value = _amount_values([amounts])[0]
+            if not np.isnan(value):
+                return float(value)
+    return None
+
+
+def _amount_values(texts: List[str]) -> np.ndarray:
+    """Amount strings → float64; a Dr mark makes the amount negative (an overdrawn balance)"""
+    if not texts:
+        return np.empty(0)
+    joined = '\n'.join(texts)
+    marks = np.array(DR_CR_LINE_RE.findall(joined), dtype=str)
+    values = parse_amounts(DR_CR_RE.sub('', joined).split('\n')).values
+    return np.where(np.isin(marks, ('Dr', 'DR')), -np.abs(values), values)
+
+
+def _frame(dates: List[str], descriptions: List[str], debit: np.ndarray, credit: np.ndarray, balance: np.ndarray,
+           page: np.ndarray) -> pd.DataFrame:
+    dates = pd.Series(dates, dtype=object)
+    # DateStandardizer reads numeric dates day first like the rest of the pipeline;
+    # what it leaves unparsed ("15 Mar 2024") goes to pandas, once per distinct string
+    parsed = pd.to_datetime(DateStandardizer.to_iso8601_many(dates), format="%Y-%m-%d", errors="coerce")
+    unparsed = parsed.isna() & (dates != '')
+    if unparsed.any():
+        distinct = dates[unparsed].unique()
+        fallback = pd.to_datetime(pd.Series(distinct), dayfirst=True, format="mixed", errors="coerce")
+        parsed = parsed.where(~unparsed, dates.map(dict(zip(distinct, fallback))))
+    return pd.DataFrame({
+        "date": parsed,
+        "description": pd.Series(descriptions, dtype=object),
+        "debit": debit,
+        "credit": credit,
+        "balance": balance,
+        "page": np.asarray(page, dtype=np.int64),
+    })
@@ -0,0 +1,168 @@
+from array import array
+from bisect import bisect_left, bisect_right
+from typing import Dict, Iterable, List, Tuple
+
+
+class AlignmentMap:
+    """
+    Maps offsets in cleaned text back to the text it was cleaned from.
+
+    Stored as two parallel ``array('I')`` breakpoint lists that tile both
+    strings: segment k covers ``cleaned[clean[k]:clean[k+1]]`` and
+    ``original[orig[k]:orig[k+1]]``. Segments of equal length map
+    character by character; the others are replacements (e.g. a
+    whitespace run collapsed to one space, or deleted characters when
+    the cleaned side is empty). Only edits create breakpoints, so the map
+    stays small, and a lookup is one bisect.
+    """
+
+    __slots__ = ('clean', 'orig')
+
+    def __init__(self, clean: array, orig: array):
+        self.clean = clean
+        self.orig = orig
+
+    @classmethod
+    def identity(cls, length: int) -> 'AlignmentMap':
+        return cls(array('I', (0, length)), array('I', (0, length)))
+
+    @classmethod
+    def from_edits(cls, edits: Iterable[Tuple[int, int, int]], in_length: int) -> 'AlignmentMap':
+        """
+        Map for one rewrite of a string of ``in_length`` characters, given
+        its edits as sorted, non-overlapping (in_start, in_end, out_length).
+        """
+        clean, orig = array('I'), array('I')
+        pos_in = pos_out = 0
+        for start, end, out_length in edits:
+            if start > pos_in:
+                clean.append(pos_out)
+                orig.append(pos_in)
+                pos_out += start - pos_in
+            clean.append(pos_out)
+            orig.append(start)
+            pos_out += out_length
+            pos_in = end
+        if pos_in < in_length or not clean:
+            clean.append(pos_out)
+            orig.append(pos_in)
+            pos_out += in_length - pos_in
+        clean.append(pos_out)
+        orig.append(in_length)
+        return cls(clean, orig).compact()
+
+    @property
+    def clean_length(self) -> int:
+        return self.clean[-1]
+
+    @property
+    def original_length(self) -> int:
+        return self.orig[-1]
+
+    def __len__(self) -> int:
+        """Number of segments"""
+        return len(self.clean) - 1
+
+    @property
+    def nbytes(self) -> int:
+        return (len(self.clean) + len(self.orig)) * self.clean.itemsize
+
+    def to_original(self, offset: int) -> int:
+        """Original offset of the character at ``offset`` in the cleaned text"""
+        k = bisect_right(self.clean, offset) - 1
+        if k >= len(self.clean) - 1:
+            return self.orig[-1]
+        return self.orig[k] + min(offset - self.clean[k], self.orig[k + 1] - self.orig[k])
+
+    def end_to_original(self, offset: int) -> int:
+        """Original offset just past the character before ``offset`` (for span ends)"""
+        if offset <= 0:
+            return self.orig[0]
+        k = bisect_right(self.clean, offset - 1) - 1
+        if offset >= self.clean[k + 1]:
+            return self.orig[k + 1]
+        return self.orig[k] + min(offset - self.clean[k], self.orig[k + 1] - self.orig[k])
+
+    def span_to_original(self, start: int, end: int) -> Tuple[int, int]:
+        return self.to_original(start), self.end_to_original(end)
+
+    def project_entities(self, entities: Dict) -> Dict:
+        """Copy of an entity dict with source_start/source_end on every item that has a span"""
+        projected = {}
+        for label, items in entities.items():
+            projected[label] = [
+                {**item, 'source_start': self.to_original(item['start']), 'source_end': self.end_to_original(item['end'])}
+                if item.get('start') is not None and item.get('end') is not None else item
+                for item in items
+            ]
+        return projected
+
+    def then(self, stage: 'AlignmentMap') -> 'AlignmentMap':
+        """
+        Map for a further rewrite: ``self`` maps text B back to A and
+        ``stage`` maps C back to B; the result maps C back to A.
+        """
+        out_c, out_o = array('I'), array('I')
+        mid, orig = self.clean, self.orig
+        last = len(mid) - 1
+        done = 0  # breakpoints of ``self`` already carried over
+        for j in range(len(stage.clean) - 1):
+            c0, c1 = stage.clean[j], stage.clean[j + 1]
+            m0, m1 = stage.orig[j], stage.orig[j + 1]
+            # every breakpoint of ``self`` at m0 (deletions stack up there)
+            lo = bisect_left(mid, m0, 0, last)
+            hi = bisect_right(mid, m0, 0, last)
+            if lo == hi:
+                out_c.append(c0)
+                out_o.append(self.to_original(m0))
+            elif c1 - c0 == m1 - m0:
+                for k in range(lo, hi):
+                    out_c.append(c0)
+                    out_o.append(orig[k])
+                done = hi
+            else:
+                out_c.append(c0)
+                out_o.append(orig[lo])
+            if c1 - c0 == m1 - m0:
+                # character-for-character segment: keep the inner breakpoints
+                for k in range(hi, bisect_left(mid, m1, 0, last)):
+                    out_c.append(c0 + mid[k] - m0)
+                    out_o.append(orig[k])
+                    done = k + 1
+            else:
+                # replacement: ends where its last character ends, so text
+                # deleted right after it stays a separate segment
+                out_c.append(c1)
+                out_o.append(self.end_to_original(m1))
+        # deletions at the very end of the text
+        end = stage.orig[-1]
+        for k in range(max(bisect_left(mid, end, 0, last), done), last):
+            out_c.append(stage.clean[-1])
+            out_o.append(orig[k])
+        out_c.append(stage.clean[-1])
+        out_o.append(orig[-1])
+        return AlignmentMap(out_c, out_o).compact()
+
+    def compact(self) -> 'AlignmentMap':
+        """Drop breakpoints between two character-for-character segments"""
+        clean, orig = self.clean, self.orig
+        keep_c, keep_o = array('I', clean[:1]), array('I', orig[:1])
+        for k in range(1, len(clean) - 1):
+            prev_linear = clean[k] - keep_c[-1] == orig[k] - keep_o[-1]
+            next_linear = clean[k + 1] - clean[k] == orig[k + 1] - orig[k]
+            if prev_linear and next_linear:
+                continue
+            if clean[k] == keep_c[-1] and orig[k] == keep_o[-1]:
+                continue
+            keep_c.append(clean[k])
+            keep_o.append(orig[k])
+        keep_c.append(clean[-1])
+        keep_o.append(orig[-1])
+        return AlignmentMap(keep_c, keep_o)
+
+    def segments(self) -> List[Tuple[int, int, int, int]]:
+        """(clean_start, clean_end, orig_start, orig_end) per segment, for debugging"""
+        return [
+            (self.clean[k], self.clean[k + 1], self.orig[k], self.orig[k + 1])
+            for k in range(len(self.clean) - 1)
+        ]
@@ -0,0 +1,298 @@
+import argparse
+import hashlib
+import json
+import os
+import sys
+import tempfile
+import threading
+import zlib
+from array import array
+from typing import List, Optional, Tuple
+
+from metrics import stage
+from ocr_stage import extract_with_ocr, ocr_version
+from pdf_extractor import EXTRACTOR_VERSION, ExtractedText
+from result_cache import content_hash
+from text_alignment import AlignmentMap
+from text_cleaner import CLEANER_VERSION, normalize_text
+
+# directory of cached extracted/cleaned text shared by every worker process (unset = no text cache)
+TEXT_CACHE_DIR = os.environ.get("TEXT_CACHE_DIR") or None
+
+# the cache is trimmed back below this many bytes on disk, least recently used first
+TEXT_CACHE_MAX_BYTES = int(os.environ.get("TEXT_CACHE_MAX_BYTES", 1 << 30))
+
+TEXT_CACHE_VERSION = f"{EXTRACTOR_VERSION}:{ocr_version()}:{CLEANER_VERSION}"
+
+# zlib level: text compresses ~4x at 6 and barely better above it
+COMPRESS_LEVEL = 6
+
+
+class CachedText:
+    """The stage outputs kept for one document: extracted pages, cleaned text and its alignment"""
+
+    __slots__ = ('extracted', 'cleaned', 'alignment')
+
+    def __init__(self, extracted: ExtractedText, cleaned: str, alignment: AlignmentMap):
+        self.extracted = extracted
+        self.cleaned = cleaned
+        self.alignment = alignment
+
+
+class TextCache:
+    """
+    Content-addressed disk cache of the extraction and cleaning stages.
+
+    Each document is one zlib-compressed file holding a small JSON header,
+    the extracted and cleaned text, and the page offsets and alignment
+    breakpoints as raw arrays. Keys combine the PDF's hash with the
+    extractor and cleaner versions, so a change to either never serves
+    stale text. A hit touches the file's mtime; once the directory grows
+    past ``max_bytes`` the least recently used files are removed until
+    it is back under 90% of it. Other processes evict from the same
+    directory, so files may vanish at any point, and a failed write is
+    reported and skipped rather than failing the document.
+    """
+
+    def __init__(self, cache_dir: Optional[str] = TEXT_CACHE_DIR, max_bytes: int = TEXT_CACHE_MAX_BYTES,
+                 version: str = TEXT_CACHE_VERSION):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.version = version
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.write_errors = 0
+        self._size: Optional[int] = None
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.cache_dir is not None
+
+    def key(self, source) -> str:
+        return self.key_for_hash(content_hash(source))
+
+    def key_for_hash(self, digest: str) -> str:
+        return hashlib.sha256(f"{digest}:{self.version}".encode()).hexdigest()
+
+    def contains(self, key: str) -> bool:
+        """Whether ``key`` is cached, without reading it or counting a lookup"""
+        return self.enabled and os.path.exists(self._path(key))
+
+    def get(self, key: str) -> Optional[CachedText]:
+        if not self.enabled:
+            return None
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                payload = zlib.decompress(f.read())
+            os.utime(path)
+            cached = _decode(payload)
+        except (OSError, ValueError, KeyError, zlib.error):
+            with self._lock:
+                self.misses += 1
+            return None
+        with self._lock:
+            self.hits += 1
+        return cached
+
+    def put(self, key: str, extracted: ExtractedText, cleaned: str, alignment: AlignmentMap):
+        if not self.enabled:
+            return
+        data = zlib.compress(_encode(extracted, cleaned, alignment), COMPRESS_LEVEL)
+        path = self._path(key)
+        try:
+            replaced = self._write(path, data)
+            with self._lock:
+                self._size = self._disk_size() if self._size is None else self._size + len(data) - replaced
+                if self._size > self.max_bytes:
+                    self._evict()
+        except OSError as exc:
+            with self._lock:
+                self.write_errors += 1
+            print(f"text cache: skipped writing {path} ({type(exc).__name__}: {exc})", file=sys.stderr)
+
+    def _write(self, path: str, data: bytes) -> int:
+        """Write one entry; returns the size of the file it replaced (0 if none)"""
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        try:
+            replaced = os.path.getsize(path)
+        except OSError:
+            replaced = 0
+        # write-then-rename so concurrent readers never see a partial file
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp, path)
+        except BaseException:
+            try:
+                os.remove(tmp)
+            except OSError:
+                pass
+            raise
+        return replaced
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            'enabled': self.enabled,
+            'bytes': self.size(),
+            'max_bytes': self.max_bytes,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'write_errors': self.write_errors,
+            'hit_rate': self.hits / lookups if lookups else None,
+            'version': self.version,
+        }
+
+    def size(self) -> Optional[int]:
+        """Bytes on disk, scanned once and then kept up to date by put (None when disabled)"""
+        if not self.enabled:
+            return None
+        with self._lock:
+            if self._size is None:
+                self._size = self._disk_size() if os.path.isdir(self.cache_dir) else 0
+            return self._size
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key[:2], key + ".txt.z")
+
+    def _files(self) -> List[Tuple[float, int, str]]:
+        """(mtime, size, path) per cached file, skipping any removed by another process meanwhile"""
+        files = []
+        for shard in os.scandir(self.cache_dir):
+            if not shard.is_dir():
+                continue
+            try:
+                entries = list(os.scandir(shard.path))
+            except OSError:
+                continue
+            for entry in entries:
+                if not entry.name.endswith(".txt.z"):
+                    continue
+                try:
+                    st = entry.stat()
+                except OSError:
+                    continue
+                files.append((st.st_mtime, st.st_size, entry.path))
+        return files
+
+    def _disk_size(self) -> int:
+        return sum(size for _, size, _ in self._files())
+
+    def _evict(self):
+        """Remove least recently used files until the cache is under 90% of max_bytes (lock held)"""
+        files = sorted(self._files())
+        size = sum(size for _, size, _ in files)
+        target = self.max_bytes * 0.9
+        for _, file_size, path in files:
+            if size <= target:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:  # another process evicted it first
+                size -= file_size
+                continue
+            except OSError:
+                continue
+            size -= file_size
+            self.evictions += 1
+        self._size = size
+
+
+def _encode(extracted: ExtractedText, cleaned: str, alignment: AlignmentMap) -> bytes:
+    raw, clean = extracted.text.encode("utf-8"), cleaned.encode("utf-8")
+    arrays = (extracted.page_starts, alignment.clean, alignment.orig)
+    header = {'text_bytes': len(raw), 'cleaned_bytes': len(clean), 'arrays': [len(a) for a in arrays],
+              'routing': extracted.routing, 'extract_ms': extracted.extract_ms}
+    return b"".join([json.dumps(header).encode("utf-8"), b"\n", raw, clean] + [a.tobytes() for a in arrays])
+
+
+def _decode(payload: bytes) -> CachedText:
+    newline = payload.index(b"\n")
+    header = json.loads(payload[:newline])
+    pos = newline + 1
+    text = payload[pos:pos + header['text_bytes']].decode("utf-8")
+    pos += header['text_bytes']
+    cleaned = payload[pos:pos + header['cleaned_bytes']].decode("utf-8")
+    pos += header['cleaned_bytes']
+    arrays = []
+    for length in header['arrays']:
+        column = array('I')
+        column.frombytes(payload[pos:pos + length * column.itemsize])
+        pos += length * column.itemsize
+        arrays.append(column)
+    page_starts, clean, orig = arrays
+    extracted = ExtractedText.from_offsets(text, page_starts)
+    extracted.routing = header.get('routing', [])
+    extracted.extract_ms = header.get('extract_ms', 0.0)
+    return CachedText(extracted, cleaned, AlignmentMap(clean, orig))
+
+
+def extract_and_clean(source, cache: TextCache, digest: Optional[str] = None,
+                      parallel: bool = True) -> Tuple[ExtractedText, str, AlignmentMap]:
+    """
+    Extracted text, cleaned text and alignment for one PDF, from ``cache``
+    when this document was seen before, otherwise by running both stages
+    and caching what they produce. Raises if the source is not a PDF.
+    """
+    key = None
+    if cache.enabled:
+        key = cache.key_for_hash(digest or content_hash(source))
+        cached = cache.get(key)
+        if cached is not None:
+            return cached.extracted, cached.cleaned, cached.alignment
+
+    with stage("extract"):
+        extracted = extract_with_ocr(source, parallel=parallel)
+    with stage("clean"):
+        cleaned, alignment = normalize_text(extracted.text, return_alignment=True)
+    if key is not None:
+        cache.put(key, extracted, cleaned, alignment)
+    return extracted, cleaned, alignment
+
+
+def prewarm(paths, cache: TextCache, parallel: bool = True):
+    """Fill ``cache`` for every PDF under ``paths`` (files or directories); yields (path, status)"""
+    for path in paths:
+        if os.path.isdir(path):
+            files = sorted(os.path.join(root, name) for root, _, names in os.walk(path)
+                           for name in names if name.lower().endswith(".pdf"))
+        else:
+            files = [path]
+        for file in files:
+            with open(file, "rb") as f:
+                data = f.read()
+            key = cache.key_for_hash(content_hash(data))
+            if cache.contains(key):
+                yield file, "cached"
+                continue
+            try:
+                extract_and_clean(data, cache, parallel=parallel)
+            except Exception as exc:
+                yield file, f"failed ({type(exc).__name__}: {exc})"
+                continue
+            yield file, "added"
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Prewarm the text cache with extracted and cleaned PDF text")
+    ap.add_argument("paths", nargs="*", default=[os.path.join(os.path.dirname(__file__), "..", "data", "raw")],
+                    help="PDF files or directories (default: data/raw)")
+    ap.add_argument("--cache-dir", default=TEXT_CACHE_DIR, help="cache directory (default: $TEXT_CACHE_DIR)")
+    ap.add_argument("--max-bytes", type=int, default=TEXT_CACHE_MAX_BYTES)
+    args = ap.parse_args(argv)
+    if not args.cache_dir:
+        ap.error("set TEXT_CACHE_DIR or pass --cache-dir")
+
+    cache = TextCache(args.cache_dir, args.max_bytes)
+    for path, status in prewarm(args.paths, cache):
+        print(f"{status:>8}  {path}", file=sys.stderr)
+    print(json.dumps(cache.stats()), file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
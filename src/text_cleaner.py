@@ -1,6 +1,11 @@
 import re
 import unicodedata
-from typing import Dict, Set
+from typing import Dict, Optional, Set
+
+from text_alignment import AlignmentMap
+
+# bump when a cleaning rule changes its output (cached cleaned text is keyed by it)
+CLEANER_VERSION = "1"
 
 class TextCleaner:
     # Common OCR substitution errors - first pass
@@ -35,8 +40,11 @@ class TextCleaner:
         'example', 'market', 'test', 'hello', 'world', 'this', 'is', 'a', 'cafe', 'resume', 'acme'
     }
 
+    # Compiled form of the tables above, built on first use
+    _compiled = None
+
     @staticmethod
-    def normalize_text(text: str) -> str:
+    def normalize_text(text: str, return_alignment: bool = False):
         """
         Apply heuristic rules to clean OCR text:
         - Character substitutions
@@ -45,62 +53,174 @@ class TextCleaner:
         - Lowercase
         - Word merging/splitting
         - Diacritic removal
+
+        Every rule runs as one translate table or one combined regex, so the
+        text is walked a handful of times instead of once per rule.
+
+        With ``return_alignment`` returns ``(cleaned, AlignmentMap)``; the
+        map from cleaned to original offsets is recorded by the same passes
+        that rewrite the text.
         """
-        # Remove diacritics
-        text = unicodedata.normalize('NFD', text)
-        text = ''.join(char for char in text if unicodedata.category(char) != 'Mn')
+        c = TextCleaner.compile()
+        alignment = AlignmentMap.identity(len(text)) if return_alignment else None
 
-        # Apply first OCR substitutions
-        for wrong, correct in TextCleaner.FIRST_SUBSTITUTIONS.items():
-            text = text.replace(wrong, correct)
+        # Remove diacritics, single-char OCR substitutions, noise symbols → space
+        if not text.isascii():
+            text, alignment = _sub(c['non_ascii'], lambda m: m.group().translate(c['chars']), text, alignment)
+        text = text.encode('ascii').translate(c['ascii']).decode('ascii')
 
-        # Replace non-alphanumeric with space (keep : / )
-        text = re.sub(r'[^a-zA-Z0-9\s:/]', ' ', text)
+        # Multi-char OCR substitutions (rn → m, vv → w, ...)
+        if c['first']:
+            text, alignment = _sub(c['first'], c['first_repl'], text, alignment)
 
         # Normalize whitespace (including newlines)
-        text = re.sub(r'\s+', ' ', text).strip()
-
-        # Handle word breaks and merges
-        words = text.split()
-        corrected_words = []
-        i = 0
-        while i < len(words):
-            word = words[i]
-            # Try to merge with next word if it looks like a split
-            if i + 1 < len(words) and len(word) <= 3 and len(words[i+1]) <= 3:
-                merged = word + words[i+1]
-                if merged.lower() in TextCleaner.COMMON_WORDS:
-                    corrected_words.append(merged)
-                    i += 2
-                    continue
-            corrected_words.append(word)
-            i += 1
-
-        text = ' '.join(corrected_words)
+        text, alignment = _collapse_spaces(text, alignment)
+
+        # Merge words split by OCR ("ac me" → "acme")
+        if c['merge']:
+            text, alignment = _sub(c['merge'], TextCleaner._merge_words, text, alignment)
 
         # Apply word corrections
-        for wrong, correct in TextCleaner.WORD_CORRECTIONS.items():
-            text = re.sub(r'\b' + re.escape(wrong) + r'\b', correct, text)
+        if c['words']:
+            text, alignment = _sub(c['words'], c['words_repl'], text, alignment)
 
         # Apply second substitutions only if text contains non-digits
-        if not re.match(r'^[\d\s]*$', text):
-            for wrong, correct in TextCleaner.SECOND_SUBSTITUTIONS.items():
-                text = text.replace(wrong, correct)
+        if not c['all_digits'].match(text):
+            text = text.translate(c['second'])
 
         # Special rule: 'l' -> '1' if adjacent to digit
-        text_list = list(text)
-        for i in range(len(text_list)):
-            if text_list[i] == 'l':
-                adjacent_digit = (i > 0 and text_list[i-1].isdigit()) or (i < len(text_list)-1 and text_list[i+1].isdigit())
-                if adjacent_digit:
-                    text_list[i] = '1'
-        text = ''.join(text_list)
+        text = c['l_digit'].sub(TextCleaner._l_to_one, text)
 
-        # Final cleanup
-        text = re.sub(r'\s+', ' ', text).strip()
+        # Final cleanup (only needed if a correction introduced spaces)
+        if '  ' in text or text[:1] == ' ' or text[-1:] == ' ':
+            text, alignment = _collapse_spaces(text, alignment)
 
+        if return_alignment:
+            return text, alignment
         return text
 
+    @classmethod
+    def compile(cls) -> Dict:
+        """Build translate tables and combined regexes from the rule tables (once)"""
+        if cls._compiled is None:
+            single = {k: v for k, v in cls.FIRST_SUBSTITUTIONS.items() if len(k) == 1}
+            multi = {k: v for k, v in cls.FIRST_SUBSTITUTIONS.items() if len(k) > 1}
+
+            merges = set()
+            for word in cls.COMMON_WORDS:
+                for i in range(1, len(word)):
+                    if len(word[:i]) <= 3 and len(word[i:]) <= 3:
+                        merges.add(re.escape(word[:i]) + ' ' + re.escape(word[i:]))
+
+            chars = _CharTable(single)
+            if any(len(chars[i]) != 1 for i in range(128)):
+                raise ValueError("Single-character substitutions for ASCII must map to one character")
+            ascii_table = bytes(ord(chars[i]) for i in range(128)) + bytes(range(128, 256))
+            merge_firsts = ''.join(sorted({w[0].lower() for w in cls.COMMON_WORDS}))
+            word_firsts = ''.join(sorted({w[0] for w in cls.WORD_CORRECTIONS}))
+
+            # each regex starts with a lookahead on the characters a match can
+            # start with, so the engine skips other positions cheaply
+            cls._compiled = {
+                'chars': chars,
+                'ascii': ascii_table,
+                'non_ascii': re.compile(r'[^\x00-\x7f]+'),
+                'first': _alternation(multi),
+                'first_repl': lambda m: multi[m.group()],
+                'merge': re.compile(
+                    r'(?<!\S)(?=[' + re.escape(merge_firsts) + r'])(?:' + '|'.join(sorted(merges)) + r')(?!\S)',
+                    re.IGNORECASE,
+                ) if merges else None,
+                'words': re.compile(
+                    r'(?=[' + re.escape(word_firsts) + r'])\b(?:' + '|'.join(map(re.escape, cls.WORD_CORRECTIONS)) + r')\b'
+                ) if cls.WORD_CORRECTIONS else None,
+                'words_repl': lambda m: cls.WORD_CORRECTIONS[m.group()],
+                'all_digits': re.compile(r'^[\d\s]*$'),
+                'second': str.maketrans(cls.SECOND_SUBSTITUTIONS),
+                'l_digit': re.compile(r'(?=l)(?:(?<=\d)(l+)|(l+)(?=\d))'),
+            }
+        return cls._compiled
+
+    @classmethod
+    def recompile(cls):
+        """Call after changing the substitution/correction tables at runtime"""
+        cls._compiled = None
+
+    @staticmethod
+    def _merge_words(m) -> str:
+        return m.group().replace(' ', '')
+
+    @staticmethod
+    def _l_to_one(m) -> str:
+        # a digit on the left turns the whole run into 1s (each new 1 is the
+        # next l's left neighbour); a digit on the right only reaches the last l
+        if m.group(1):
+            return '1' * len(m.group(1))
+        return m.group(2)[:-1] + '1'
+
+
+class _CharTable(dict):
+    """
+    str.translate table for the first cleaning step, filled lazily per code
+    point: strip combining marks (NFD), apply single-char OCR substitutions
+    and turn anything outside [a-zA-Z0-9:/] into a space. Whitespace also
+    becomes a space (it is collapsed right after anyway), so every output
+    is plain ASCII.
+    """
+
+    def __init__(self, substitutions: Dict[str, str]):
+        super().__init__()
+        self.substitutions = substitutions
+
+    def __missing__(self, code: int) -> str:
+        out = []
+        for char in unicodedata.normalize('NFD', chr(code)):
+            if unicodedata.category(char) == 'Mn':
+                continue
+            char = self.substitutions.get(char, char)
+            out.append(char if _KEEP.match(char) else ' ')
+        self[code] = value = ''.join(out)
+        return value
+
+
+_KEEP = re.compile(r'[a-zA-Z0-9:/]')
+
+
+_SPACES = re.compile(r' +')
+
+
+def _sub(pattern, repl, text: str, alignment: Optional[AlignmentMap]):
+    """
+    ``pattern.sub(repl, text)``. When an alignment map is being built, the
+    same finditer pass also records each length-changing match as an edit.
+    """
+    if alignment is None:
+        return pattern.sub(repl, text), None
+    pieces, edits, pos = [], [], 0
+    for m in pattern.finditer(text):
+        start, end = m.span()
+        out = repl(m)
+        pieces.append(text[pos:start])
+        pieces.append(out)
+        if len(out) != end - start:
+            edits.append((start, end, len(out)))
+        pos = end
+    pieces.append(text[pos:])
+    return ''.join(pieces), alignment.then(AlignmentMap.from_edits(edits, len(text)))
+
+
+def _collapse_spaces(text: str, alignment: Optional[AlignmentMap]):
+    """Single spaces between words, none at the ends (input whitespace is already ' ')"""
+    if alignment is None:
+        return ' '.join(text.split()), None
+    return _sub(_SPACES, lambda m: '' if m.start() == 0 or m.end() == len(m.string) else ' ', text, alignment)
+
+
+def _alternation(table: Dict[str, str]):
+    if not table:
+        return None
+    return re.compile('|'.join(map(re.escape, table)))
+
 # For backward compatibility
-def normalize_text(text: str) -> str:
-    return TextCleaner.normalize_text(text)
\ No newline at end of file
+def normalize_text(text: str, return_alignment: bool = False):
+    return TextCleaner.normalize_text(text, return_alignment)
\ No newline at end of file
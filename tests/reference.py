@@ -0,0 +1,211 @@
+"""
+Reference implementations and synthetic fixtures shared by the tests
+and the benchmarks.
+
+The legacy_* functions are the straightforward versions the optimized
+code replaced. Tests check the optimized code against them, and the
+benchmarks in benchmarks/ import them from here to time against. Keep
+them unchanged, because they define the expected output.
+"""
+import re
+import unicodedata
+
+from amount_engine import CURRENCY_ISO, CURRENCY_TOKENS, parse_amounts
+from date_standardizer import DateStandardizer
+from text_cleaner import TextCleaner
+from validation_rules import ValidationRules
+
+LEGACY_PATTERNS = {
+    "DATE": [
+        r"\b\d{4}-\d{1,2}-\d{1,2}\b",
+        r"\b\d{1,2}/\d{1,2}/\d{4}\b",
+        r"\b\d{1,2}-\d{1,2}-\d{4}\b",
+        r"\b(?:January|February|March|April|May|June|July|August|September|October|November|December)\s+\d{1,2},\s+\d{4}\b",
+    ],
+    "AMOUNT": [r"\$[0-9][0-9,]*(?:\.[0-9]{2})?"],
+    "ORG": [r"\b[A-Z][A-Z &]{2,}\b"],
+}
+
+
+def legacy_scan(text):
+    """The old build_demo_entities: a separate re.finditer pass per pattern"""
+    entities = {}
+    for label, patterns in LEGACY_PATTERNS.items():
+        for pat in patterns:
+            for m in re.finditer(pat, text):
+                entities.setdefault(label, []).append({"text": m.group(0).strip(), "start": m.start(), "end": m.end()})
+    return entities
+
+
+def statement_line(rng):
+    day, month = rng.randint(1, 28), rng.randint(1, 12)
+    date = rng.choice([f"2024-{month:02d}-{day:02d}", f"{day:02d}/{month:02d}/2024", f"{day}-{month}-2024",
+                       f"March {day}, 2024"])
+    payee = rng.choice(["ACME BANK", "XYZ LIMITED", "grocery store", "ABC CORP", "salary credit"])
+    return f"{date} payment to {payee} reference {rng.randint(10000, 99999)} amount ${rng.randint(1, 99999):,}.00\n"
+
+
+def synthetic_statement(size, rng):
+    """Bank-statement-like text of about ``size`` characters"""
+    lines, total = [], 0
+    while total < size:
+        line = statement_line(rng)
+        lines.append(line)
+        total += len(line)
+    return "".join(lines)
+
+
+def legacy_normalize_text(text: str) -> str:
+    """The original implementation, kept as the reference for equivalence checks."""
+    text = unicodedata.normalize('NFD', text)
+    text = ''.join(char for char in text if unicodedata.category(char) != 'Mn')
+
+    for wrong, correct in TextCleaner.FIRST_SUBSTITUTIONS.items():
+        text = text.replace(wrong, correct)
+
+    text = re.sub(r'[^a-zA-Z0-9\s:/]', ' ', text)
+    text = re.sub(r'\s+', ' ', text).strip()
+
+    words = text.split()
+    corrected_words = []
+    i = 0
+    while i < len(words):
+        word = words[i]
+        if i + 1 < len(words) and len(word) <= 3 and len(words[i+1]) <= 3:
+            merged = word + words[i+1]
+            if merged.lower() in TextCleaner.COMMON_WORDS:
+                corrected_words.append(merged)
+                i += 2
+                continue
+        corrected_words.append(word)
+        i += 1
+
+    text = ' '.join(corrected_words)
+
+    for wrong, correct in TextCleaner.WORD_CORRECTIONS.items():
+        text = re.sub(r'\b' + re.escape(wrong) + r'\b', correct, text)
+
+    if not re.match(r'^[\d\s]*$', text):
+        for wrong, correct in TextCleaner.SECOND_SUBSTITUTIONS.items():
+            text = text.replace(wrong, correct)
+
+    text_list = list(text)
+    for i in range(len(text_list)):
+        if text_list[i] == 'l':
+            adjacent_digit = (i > 0 and text_list[i-1].isdigit()) or (i < len(text_list)-1 and text_list[i+1].isdigit())
+            if adjacent_digit:
+                text_list[i] = '1'
+    text = ''.join(text_list)
+
+    text = re.sub(r'\s+', ' ', text).strip()
+    return text
+
+
+SAMPLE_LINES = [
+    "This Agreement dated January 15, 2024 (the \"Effective Date\") between\n",
+    "ABC CORPORATION, a Delaware corporation (\"Party A\", \"Service Provider\")\n",
+    "Total Value: USD 10O,OOO payable on 0l/02/2024 to Acme Bank Ltd.\n",
+    "Jurisdiction: São Paulo, Brazil — café résumé naïve façade\n",
+    "Th1s is a t3st of the rnarket exam ple exampl ac me c1ear vvorld\n",
+    "  Balance   B/F    12,345.67   Cr   ll0   2l1   \t\n",
+]
+
+
+def legacy_to_iso8601(date_str):
+    """The old per-entity to_iso8601 with uncompiled re.match"""
+    date_str = date_str.strip().strip('.,')
+
+    m = re.match(r'(\w+)\s+(\d{1,2}),?\s+(\d{4})', date_str)
+    if m:
+        month = DateStandardizer.MONTHS.get(m.group(1).lower())
+        if month:
+            return f"{m.group(3)}-{month:02d}-{int(m.group(2)):02d}"
+
+    m = re.match(r'(\d{1,2})[-/](\d{1,2})[-/](\d{4})', date_str)
+    if m:
+        day, month, year = int(m.group(1)), int(m.group(2)), int(m.group(3))
+        if 1 <= month <= 12:
+            return f"{year}-{month:02d}-{day:02d}"
+
+    m = re.match(r'(\d{4})[-/](\d{1,2})[-/](\d{1,2})', date_str)
+    if m:
+        return f"{m.group(1)}-{int(m.group(2)):02d}-{int(m.group(3)):02d}"
+
+    return date_str
+
+
+def random_date(rng):
+    day, month, year = rng.randint(1, 28), rng.randint(1, 12), rng.randint(2015, 2025)
+    return rng.choice([
+        f"{year}-{month:02d}-{day:02d}",
+        f"{day:02d}/{month:02d}/{year}",
+        f"{day}-{month}-{year}",
+        f"March {day}, {year}",
+        f"Sep {day} {year}.",
+        f"{day}-Jan-{year % 100:02d}",
+    ])
+
+
+ODD_LAYOUTS = ["{d}.{m}.{y}", "{y}{m:02d}{d:02d}", "{mon} {d}", "the {d}th of {mon} {y}", "{d}/{m}/{y} 10:30",
+               "not a date", "{m}/{d}"]
+
+
+def date_corpus(count, odd_share, rng):
+    """Statement-style date strings, ``odd_share`` of them in layouts outside parse_date's fast path"""
+    dates = []
+    for _ in range(count):
+        d, m, y = rng.randint(1, 28), rng.randint(1, 12), rng.randint(1990, 2030)
+        mon = rng.choice(["Jan", "January", "Sept", "march", "DEC"])
+        if rng.random() < odd_share:
+            layout = rng.choice(ODD_LAYOUTS)
+        else:
+            layout = rng.choice(["{y}-{m:02d}-{d:02d}", "{d:02d}/{m:02d}/{y}", "{m}/{d}/{y}", "{d}-{mon}-{yy:02d}",
+                                 "{d} {mon} {y}", "{mon} {d}, {y}"])
+        dates.append(layout.format(d=d, m=m, y=y, yy=y % 100, mon=mon))
+    return dates
+
+
+def outcome(parse, value):
+    """What a parser returns for ``value``, or the type of exception it raises"""
+    try:
+        return parse(value)
+    except Exception as exc:
+        return type(exc)
+
+
+def legacy_process(entities, text):
+    """The dict-based stages as they were before EntityTable"""
+    cleaned = {
+        label: [{**item, 'text': ValidationRules.clean_entity_text(item['text'])} for item in items]
+        for label, items in entities.items()
+    }
+    standardized = DateStandardizer.standardize_entities(cleaned)
+    if 'AMOUNT' in standardized:
+        items = standardized['AMOUNT']
+        columns = parse_amounts([item['text'] for item in items])
+        standardized = dict(standardized)
+        standardized['AMOUNT'] = [
+            {'original': item['text'], 'value': None if value != value else value,
+             'currency': CURRENCY_TOKENS[token] or None, 'currency_code': CURRENCY_ISO[token] or None,
+             'valid': valid, 'start': item.get('start'), 'end': item.get('end')}
+            for item, value, token, valid in zip(
+                items, columns.values.tolist(), columns.currency.tolist(), columns.valid.tolist())
+        ]
+    merged = standardized.copy()
+    parties = ValidationRules.extract_party_names(text)
+    if parties:
+        merged.setdefault('PARTY_HEURISTIC', []).extend({'text': p, 'source': 'heuristic'} for p in parties)
+    return merged
+
+
+def synthetic_entities(count, rng):
+    """``count`` model entities cycling DATE, AMOUNT and ORG with consecutive spans"""
+    entities = {'DATE': [], 'AMOUNT': [], 'ORG': []}
+    offset = 0
+    for _ in range(count // 3):
+        day, month = rng.randint(1, 28), rng.randint(1, 12)
+        for label, text in (('DATE', f"{day:02d}/{month:02d}/2024"), ('AMOUNT', f"${rng.randint(1, 99999):,}.00"),
+                            ('ORG', rng.choice(['ACME BANK', 'XYZ LIMITED', 'ABC CORP']))):
+            entities[label].append({'text': text, 'start': offset, 'end': offset + len(text), 'source': 'model'})
+            offset += len(text) + 1
+    return entities
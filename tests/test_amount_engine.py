@@ -0,0 +1,63 @@
+import os
+import sys
+import unittest
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from amount_engine import CURRENCY_TOKENS, parse_amounts
+from ner_post_processor import NERPostProcessor
+
+
+class TestParseAmounts(unittest.TestCase):
+    def test_column_arrays(self):
+        columns = parse_amounts(['$125,000', 'INR 1,00,000.00', '(₹ 12,34,567.50)', 'Rs. 5,000/-', '50 EUR', 'abc'])
+        np.testing.assert_array_equal(columns.values[:5], [125000.0, 100000.0, -1234567.5, 5000.0, 50.0])
+        self.assertTrue(np.isnan(columns.values[5]))
+        self.assertEqual([CURRENCY_TOKENS[c] for c in columns.currency], ['$', 'INR', '₹', 'Rs.', 'EUR', ''])
+        self.assertEqual(list(columns.currency_codes), ['USD', 'INR', 'INR', 'INR', 'EUR', ''])
+        self.assertEqual(columns.valid.tolist(), [True, True, True, True, True, False])
+        self.assertEqual(columns.values.dtype, np.float64)
+        self.assertEqual(columns.currency.dtype, np.int8)
+
+    def test_negatives(self):
+        columns = parse_amounts(['-$5', '$-5', '(5)', '(USD 7.25)'])
+        self.assertEqual(columns.values.tolist(), [-5.0, -5.0, -5.0, -7.25])
+        self.assertTrue(columns.valid.all())
+
+    def test_malformed_amounts_are_invalid(self):
+        columns = parse_amounts(['1,0000', '(5', '$ 5 USD', 'Total $5', '5.5.5', 'XYZ 10'])
+        self.assertFalse(columns.valid.any())
+        self.assertEqual(columns.values[0], 10000.0)
+
+    def test_non_strings_and_newlines_keep_rows_aligned(self):
+        columns = parse_amounts(['$1', None, 'a\n5', 12, '$2'])
+        self.assertEqual(len(columns), 5)
+        self.assertEqual(columns.values[0], 1.0)
+        self.assertEqual(columns.values[4], 2.0)
+        self.assertEqual(columns.valid.tolist(), [True, False, False, False, True])
+
+    def test_series_and_totals(self):
+        import pandas as pd
+
+        columns = parse_amounts(pd.Series(['$10', '€5', '(USD 3)', 'junk']))
+        self.assertEqual(columns.total(), 12.0)
+        self.assertEqual(columns.total('USD'), 7.0)
+
+    def test_empty(self):
+        self.assertEqual(len(parse_amounts([])), 0)
+
+
+class TestPostProcessorAmounts(unittest.TestCase):
+    def test_standardized_items(self):
+        entities = {'AMOUNT': [{'text': '$125,000', 'start': 50, 'end': 58}, {'text': 'INR 1,00,000', 'start': 70, 'end': 82}]}
+        items = NERPostProcessor().process(entities, '')['entities']['AMOUNT']
+        self.assertEqual(items[0], {'original': '$125,000', 'value': 125000.0, 'currency': '$', 'currency_code': 'USD',
+                                    'valid': True, 'start': 50, 'end': 58})
+        self.assertEqual(items[1]['value'], 100000.0)
+        self.assertEqual(items[1]['currency_code'], 'INR')
+
+
+if __name__ == '__main__':
+    unittest.main()
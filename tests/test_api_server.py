@@ -0,0 +1,249 @@
+import io
+import json
+import os
+import sys
+import unittest
+import zipfile
+from unittest import mock
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+import fitz
+
+import api_server
+import document_pipeline
+import ocr_stage
+import pdf_extractor
+from api_server import app
+from test_ocr_stage import fake_ocr, scanned_pdf
+from test_statement_table import ROWS, statement_pdf
+
+
+def make_pdf(*pages):
+    doc = fitz.open()
+    for text in pages:
+        page = doc.new_page()
+        page.insert_text((72, 72), text)
+    data = doc.tobytes()
+    doc.close()
+    return data
+
+
+class TestBatchEndpoint(unittest.TestCase):
+    def setUp(self):
+        self.client = app.test_client()
+
+    def test_batch_reports_failures_per_document(self):
+        response = self.client.post("/api/process/batch", data={
+            "files": [
+                (io.BytesIO(make_pdf("Agreement dated 2024-01-15")), "good.pdf"),
+                (io.BytesIO(b"not a pdf"), "bad.pdf"),
+            ]
+        }, content_type="multipart/form-data")
+        body = response.get_json()
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([d["filename"] for d in body["documents"]], ["good.pdf", "bad.pdf"])
+        self.assertTrue(body["documents"][0]["success"])
+        self.assertFalse(body["documents"][1]["success"])
+        self.assertIn("error", body["documents"][1])
+        self.assertEqual(body["summary"]["failed"], 1)
+        self.assertIn("batch_ms", body["timing"])
+
+    def test_batch_accepts_zip(self):
+        archive = io.BytesIO()
+        with zipfile.ZipFile(archive, "w") as zf:
+            zf.writestr("a.pdf", make_pdf("first"))
+            zf.writestr("b.pdf", make_pdf("second"))
+            zf.writestr("notes.txt", "ignored")
+        archive.seek(0)
+
+        response = self.client.post("/api/process/batch", data={
+            "files": [(archive, "dump.zip")]
+        }, content_type="multipart/form-data")
+        body = response.get_json()
+
+        self.assertEqual(body["summary"]["total_documents"], 2)
+        self.assertEqual(body["summary"]["succeeded"], 2)
+
+    def test_zip_limits_are_checked_before_inflating(self):
+        archive = io.BytesIO()
+        with zipfile.ZipFile(archive, "w", zipfile.ZIP_DEFLATED) as zf:
+            zf.writestr("a.pdf", make_pdf("first"))
+            zf.writestr("zeros.pdf", b"\0" * 4_000_000)
+        data = archive.getvalue()
+
+        with mock.patch.object(api_server, "MAX_ZIP_BYTES", 1_000_000), \
+                mock.patch.object(zipfile.ZipFile, "read", side_effect=AssertionError("inflated")):
+            response = self.client.post("/api/process/batch", data={
+                "files": [(io.BytesIO(data), "bomb.zip")]
+            }, content_type="multipart/form-data")
+        self.assertEqual(response.status_code, 413)
+        self.assertIn("bomb.zip", response.get_json()["error"])
+
+        with mock.patch.object(api_server, "MAX_BATCH_DOCUMENTS", 2), \
+                mock.patch.object(zipfile.ZipFile, "read", side_effect=AssertionError("inflated")):
+            response = self.client.post("/api/process/batch", data={
+                "files": [(io.BytesIO(make_pdf("loose")), "loose.pdf"), (io.BytesIO(data), "two.zip")]
+            }, content_type="multipart/form-data")
+        self.assertEqual(response.status_code, 413)
+
+    def test_batch_requires_files(self):
+        response = self.client.post("/api/process/batch", data={})
+        self.assertEqual(response.status_code, 400)
+
+
+class TestStreamingProcess(unittest.TestCase):
+    def setUp(self):
+        self.client = app.test_client()
+
+    def test_ndjson_stream_emits_pages_then_summary(self):
+        pdf = make_pdf("ACME BANK statement", "page two", "GREEN TRUST notice")
+        response = self.client.post("/api/process?stream=ndjson", data={
+            "file": (io.BytesIO(pdf), "statement.pdf")
+        }, content_type="multipart/form-data")
+        records = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+
+        self.assertEqual(response.mimetype, "application/x-ndjson")
+        self.assertEqual([r["type"] for r in records], ["page", "page", "page", "summary"])
+        self.assertEqual(records[-1]["page_count"], 3)
+        third = records[2]
+        org = third["entities"]["ORG"][0]
+        self.assertEqual(org["start"], third["text_offset"])
+        self.assertEqual(records[-1]["summary"]["total_entities"], 2)
+
+    def stream(self, pdf):
+        response = self.client.post("/api/process?stream=ndjson", data={
+            "file": (io.BytesIO(pdf), "statement.pdf")
+        }, content_type="multipart/form-data")
+        return [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+
+    def test_stream_matches_process_text_and_projects_entities(self):
+        pdf = make_pdf("ACME BANK   statement", "GREEN TRUST notice")
+        records = self.stream(pdf)
+        pages = [r for r in records if r["type"] == "page"]
+        processed = self.client.post("/api/process", data={
+            "file": (io.BytesIO(pdf), "statement.pdf")
+        }, content_type="multipart/form-data").get_json()
+
+        self.assertEqual("".join(p["text"] for p in pages), processed["text"])
+        self.assertEqual(records[-1]["text_length"], processed["text_length"])
+        # same spans, source offsets and pages as the one-shot response
+        self.assertEqual(pages[0]["entities"]["ORG"] + pages[1]["entities"]["ORG"], processed["entities"]["ORG"])
+        self.assertEqual(pages[1]["entities"]["ORG"][0]["page"], 2)
+        self.assertEqual(records[-1]["extraction"]["routes"], {"text": 2})
+
+    def test_cached_document_is_one_summary_record(self):
+        pdf = make_pdf("ACME BANK statement")
+        processed = self.client.post("/api/process", data={
+            "file": (io.BytesIO(pdf), "first.pdf")
+        }, content_type="multipart/form-data").get_json()
+        records = self.stream(pdf)
+
+        self.assertEqual([r["type"] for r in records], ["summary"])
+        self.assertTrue(records[0]["cached"])
+        self.assertEqual(records[0]["page_count"], 1)
+        self.assertEqual((records[0]["entities"], records[0]["text"]), (processed["entities"], processed["text"]))
+
+    def test_pages_without_a_text_layer_are_ocrd(self):
+        with mock.patch.object(ocr_stage, 'tesseract_version', return_value="5.3.0"), \
+                mock.patch.object(ocr_stage.pytesseract, 'image_to_data', side_effect=fake_ocr), \
+                mock.patch.object(ocr_stage, 'OCR_WORKERS', 1):
+            records = self.stream(scanned_pdf())
+
+        self.assertEqual(records[-1]["extraction"]["routes"], {"text": 1, "blank": 1, "ocr": 2})
+        self.assertIn("second line", records[2]["text"])
+
+    def test_sse_stream_format(self):
+        response = self.client.post("/api/process?stream=sse", data={
+            "file": (io.BytesIO(make_pdf("hello")), "a.pdf")
+        }, content_type="multipart/form-data")
+        body = response.get_data(as_text=True)
+        self.assertTrue(body.startswith("event: page\ndata: "))
+        self.assertIn("event: summary", body)
+
+    def test_unknown_stream_format(self):
+        response = self.client.post("/api/process?stream=xml", data={
+            "file": (io.BytesIO(make_pdf("hello")), "a.pdf")
+        }, content_type="multipart/form-data")
+        self.assertEqual(response.status_code, 400)
+
+
+class TestStatementEndpoint(unittest.TestCase):
+    def setUp(self):
+        self.client = app.test_client()
+
+    def test_transactions_summary_and_balance_check(self):
+        response = self.client.post("/api/statement", data={
+            "file": (io.BytesIO(statement_pdf(ROWS)), "march.pdf")
+        }, content_type="multipart/form-data")
+        body = response.get_json()
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(body["transactions"]), 6)
+        self.assertEqual(body["transactions"][1]["credit"], 5000.0)
+        self.assertEqual(body["summary"]["closing_balance"], 1234617.0)
+        self.assertTrue(body["balance_check"]["consistent"])
+
+    def test_csv_format(self):
+        response = self.client.post("/api/statement?format=csv", data={
+            "file": (io.BytesIO(statement_pdf(ROWS)), "march.pdf")
+        }, content_type="multipart/form-data")
+        lines = response.get_data(as_text=True).splitlines()
+        self.assertEqual(response.mimetype, "text/csv")
+        self.assertEqual(lines[0], "date,description,debit,credit,balance,page")
+        self.assertEqual(lines[1], "2024-03-01,UPI/123/GROCERY,250.0,,750.0,1")
+
+    def test_unreadable_upload(self):
+        response = self.client.post("/api/statement", data={
+            "file": (io.BytesIO(b"not a pdf"), "bad.pdf")
+        }, content_type="multipart/form-data")
+        self.assertEqual(response.status_code, 422)
+
+
+class TestPdfExtraction(unittest.TestCase):
+    def test_extracts_from_upload_stream_in_memory(self):
+        upload = io.BytesIO(make_pdf("Statement of account"))
+        text = document_pipeline.extract_text_from_pdf(upload)
+        self.assertIn("Statement of account", text)
+        self.assertFalse(os.path.exists("temp_upload.pdf"))
+
+    def test_large_uploads_spool_to_private_temp_file(self):
+        limit = pdf_extractor.MAX_IN_MEMORY_PDF_BYTES
+        pdf_extractor.MAX_IN_MEMORY_PDF_BYTES = 0
+        try:
+            text = document_pipeline.extract_text_from_pdf(io.BytesIO(make_pdf("spooled")))
+        finally:
+            pdf_extractor.MAX_IN_MEMORY_PDF_BYTES = limit
+        self.assertIn("spooled", text)
+
+    def test_invalid_bytes_raise(self):
+        with self.assertRaises(Exception):
+            document_pipeline.extract_text_from_bytes(b"not a pdf")
+
+
+class TestPageParallelExtraction(unittest.TestCase):
+    def test_page_ranges_cover_document_in_order(self):
+        ranges = list(pdf_extractor.page_ranges(10, 3))
+        self.assertEqual(ranges, [(0, 4), (4, 7), (7, 10)])
+        self.assertEqual(list(pdf_extractor.page_ranges(2, 8)), [(0, 1), (1, 2)])
+
+    def test_parallel_matches_serial_and_keeps_page_boundaries(self):
+        data = make_pdf(*[f"page number {i}" for i in range(12)])
+        threshold = pdf_extractor.PARALLEL_PAGE_THRESHOLD
+        pdf_extractor.PARALLEL_PAGE_THRESHOLD = 4
+        try:
+            parallel = pdf_extractor.extract_document(data, workers=3)
+        finally:
+            pdf_extractor.PARALLEL_PAGE_THRESHOLD = threshold
+        serial = pdf_extractor.extract_document(data, parallel=False)
+
+        self.assertEqual(parallel.text, serial.text)
+        self.assertEqual(parallel.page_count, 12)
+        self.assertIn("page number 7", parallel.page_text(7))
+        offset = parallel.text.index("page number 5")
+        self.assertEqual(parallel.page_for_offset(offset), 5)
+
+
+if __name__ == '__main__':
+    unittest.main()
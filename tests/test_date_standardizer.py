@@ -0,0 +1,47 @@
+import os
+import random
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from date_standardizer import DateStandardizer
+from reference import legacy_to_iso8601, random_date
+
+ODD_DATES = ['', '  ', 'Foo 12, 2024', '31/13/2024', '2024/1/5', 'May 5 2024,', 'not a date', '5-5-20245',
+             'Décembre 3, 2024', '12 01 2024', '1/2/2024 extra']
+
+
+class TestBatchDateStandardization(unittest.TestCase):
+    def test_matches_scalar_reference(self):
+        rng = random.Random(3)
+        dates = [random_date(rng) for _ in range(2000)] + ODD_DATES
+        self.assertEqual(DateStandardizer.to_iso8601_many(dates), [legacy_to_iso8601(d) for d in dates])
+        for value in dates:
+            self.assertEqual(DateStandardizer.to_iso8601(value), legacy_to_iso8601(value), repr(value))
+
+    def test_series_in_series_out(self):
+        import pandas as pd
+
+        series = pd.Series(['January 15, 2024', '15/01/2024', 'January 15, 2024'], index=[10, 11, 12])
+        result = DateStandardizer.to_iso8601_many(series)
+        self.assertEqual(list(result.index), [10, 11, 12])
+        self.assertEqual(list(result), ['2024-01-15'] * 3)
+
+    def test_standardize_entities_keeps_order_and_spans(self):
+        entities = {'DATE': [{'text': '2024-01-15', 'start': 0, 'end': 10}, {'text': 'March 5, 2024', 'start': 20, 'end': 33}],
+                    'ORG': [{'text': 'ACME'}]}
+        result = DateStandardizer.standardize_entities(entities)
+        self.assertEqual([d['standardized'] for d in result['DATE']], ['2024-01-15', '2024-03-05'])
+        self.assertEqual(result['DATE'][1]['start'], 20)
+        self.assertIs(result['ORG'], entities['ORG'])
+
+    def test_repeats_hit_the_cache(self):
+        before = DateStandardizer.cache_info().hits
+        DateStandardizer.to_iso8601_many(['April 1, 2023'] * 3)
+        DateStandardizer.to_iso8601_many(['April 1, 2023'])
+        self.assertGreaterEqual(DateStandardizer.cache_info().hits - before, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
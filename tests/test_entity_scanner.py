@@ -0,0 +1,49 @@
+import os
+import random
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from entity_scanner import EntityScanner, default_scanner
+from reference import legacy_scan, synthetic_statement
+
+
+def as_sets(entities):
+    return {label: {(e['text'], e['start'], e['end']) for e in items} for label, items in entities.items()}
+
+
+class TestEntityScanner(unittest.TestCase):
+    def test_matches_separate_passes(self):
+        text = synthetic_statement(50_000, random.Random(1))
+        text += " Agreement dated January 15, 2024 between ACME BANK and XYZ LIMITED for $125,000.00"
+        self.assertEqual(as_sets(default_scanner.scan(text)), as_sets(legacy_scan(text)))
+
+    def test_results_are_in_document_order(self):
+        text = "Paid $10 on 2024-01-05 to ACME BANK, then 05/02/2024"
+        dates = default_scanner.scan(text)['DATE']
+        self.assertEqual([d['text'] for d in dates], ['2024-01-05', '05/02/2024'])
+
+    def test_org_text_is_stripped_but_span_kept(self):
+        org = default_scanner.scan("ACME BANK agreement")['ORG'][0]
+        self.assertEqual(org, {'text': 'ACME BANK', 'start': 0, 'end': 10})
+
+    def test_registry(self):
+        scanner = EntityScanner()
+        name = scanner.register('IBAN', r'\bGB\d{2}[A-Z]{4}\d{14}\b')
+        scanner.register('ACCOUNT', r'\b\d{8}\b')
+        self.assertEqual(scanner.labels, ['IBAN', 'ACCOUNT'])
+        found = scanner.scan("Pay GB29NWBK60161331926819 from 12345678")
+        self.assertEqual(found['IBAN'][0]['start'], 4)
+        self.assertEqual(found['ACCOUNT'][0]['text'], '12345678')
+
+        scanner.unregister(name)
+        self.assertNotIn('IBAN', scanner.scan("GB29NWBK60161331926819"))
+        with self.assertRaises(ValueError):
+            scanner.register('BAD', r'(\d+)')
+        with self.assertRaises(ValueError):
+            scanner.register('ACCOUNT', r'\d', name='ACCOUNT_0')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,58 @@
+import os
+import random
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from entity_table import EntityTable
+from ner_post_processor import NERPostProcessor
+from reference import legacy_process, synthetic_entities
+from text_alignment import AlignmentMap
+
+
+class TestEntityTable(unittest.TestCase):
+    def test_raw_round_trip(self):
+        entities = {
+            'ORG': [{'text': 'ACME', 'start': 0, 'end': 4, 'source': 'model'}, {'text': 'XYZ', 'start': 9, 'end': 12}],
+            'PARTY_HEURISTIC': [{'text': 'Foo Corp', 'source': 'heuristic'}],
+            'DATE': [],
+            'CUSTOM': [{'text': 'x', 'start': 1, 'end': 2, 'score': 0.5}],
+        }
+        self.assertEqual(EntityTable.from_dicts(entities).to_dicts(), entities)
+
+    def test_processed_round_trip(self):
+        processed = NERPostProcessor().process(
+            {'DATE': [{'text': 'January 15, 2024', 'start': 0, 'end': 16}],
+             'AMOUNT': [{'text': 'INR 1,00,000', 'start': 20, 'end': 32}]},
+            "Agreement between ABC Corp and XYZ Ltd")['entities']
+        self.assertEqual(EntityTable.from_dicts(processed).to_dicts(), processed)
+
+    def test_process_matches_dict_stages(self):
+        entities = synthetic_entities(300, random.Random(1))
+        text = "Statement of account"
+        self.assertEqual(NERPostProcessor().process(entities, text)['entities'], legacy_process(entities, text))
+
+    def test_extend_and_shift(self):
+        first = EntityTable.from_dicts({'ORG': [{'text': 'ACME', 'start': 0, 'end': 4}]})
+        second = EntityTable.from_dicts({'DATE': [{'text': '2024-01-15', 'start': 2, 'end': 12}],
+                                         'ORG': [{'text': 'XYZ', 'start': 0, 'end': 3}]})
+        second.add('PARTY_HEURISTIC', 'Foo Corp', source='heuristic')
+        second.shift(100)
+        first.extend(second)
+        self.assertEqual(first.label_counts(), {'ORG': 2, 'DATE': 1, 'PARTY_HEURISTIC': 1})
+        result = first.to_dicts()
+        self.assertEqual([(e['start'], e['end']) for e in result['ORG']], [(0, 4), (100, 103)])
+        self.assertEqual(result['PARTY_HEURISTIC'], [{'text': 'Foo Corp', 'source': 'heuristic'}])
+
+    def test_project(self):
+        table = EntityTable.from_dicts({'ORG': [{'text': 'ACME', 'start': 2, 'end': 6}],
+                                        'PARTY_HEURISTIC': [{'text': 'Foo'}]})
+        table.project(AlignmentMap.from_edits([(0, 3, 1)], 10))  # "   ACME..." -> " ACME..."
+        result = table.to_dicts()
+        self.assertEqual((result['ORG'][0]['source_start'], result['ORG'][0]['source_end']), (4, 8))
+        self.assertNotIn('source_start', result['PARTY_HEURISTIC'][0])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,70 @@
+import os
+import random
+import re
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from gazetteer import Gazetteer, suffix_entries
+from ner_post_processor import NERPostProcessor
+
+
+def brute_force(keys, text):
+    text = text.lower()
+    return sorted((m.start(), m.start() + len(k), k) for k in keys
+                  for m in re.finditer(rf'(?=(?<![^\W_]){re.escape(k)}(?![^\W_]))', text))
+
+
+class TestGazetteer(unittest.TestCase):
+    def test_matches_every_whole_word_occurrence(self):
+        keys = ['he', 'she', 'hers', 'his', 'acme widgets', 'ltd', 'pvt ltd']
+        gazetteer = Gazetteer.build([(k, 'X') for k in keys])
+        rng = random.Random(1)
+        for _ in range(500):
+            text = ''.join(rng.choice('hersHER ilpvtd') for _ in range(rng.randint(0, 40)))
+            found = sorted((s, e, gazetteer.name(entry)) for s, e, entry in gazetteer.matches(text))
+            self.assertEqual(found, brute_force(keys, text), text)
+
+    def test_counterparties_case_insensitive(self):
+        gazetteer = Gazetteer.build([('Acme Widgets', 'PARTY')])
+        text = "paid to ACME   WIDGETS\tand acme widgets"
+        self.assertEqual([e['text'] for e in gazetteer.scan(text)], ['acme widgets'])
+        entity = gazetteer.scan("paid to ACME WIDGETS")[0]
+        self.assertEqual((entity['label'], entity['text'], entity['name']), ('PARTY', 'ACME WIDGETS', 'Acme Widgets'))
+
+    def test_suffix_extends_over_capitalised_words(self):
+        gazetteer = Gazetteer.build(suffix_entries())
+        text = "Payment from The Foo Bar Pvt Ltd, Smith & Jones LLP and the bank. Bank charges."
+        self.assertEqual([(e['label'], e['text']) for e in gazetteer.scan(text)],
+                         [('ORG', 'Foo Bar Pvt Ltd'), ('ORG', 'Smith & Jones LLP')])
+
+    def test_leftmost_longest(self):
+        gazetteer = Gazetteer.build([('Acme Widgets', 'PARTY'), ('Widgets Co', 'PARTY')] + suffix_entries())
+        entities = gazetteer.scan("Acme Widgets Co")
+        self.assertEqual([(e['label'], e['start'], e['end']) for e in entities], [('ORG', 0, 15)])
+
+    def test_save_and_load(self):
+        gazetteer = Gazetteer.build([('Zürich Re', 'PARTY'), ('Acme Widgets', 'PARTY')] + suffix_entries())
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'names.gaz')
+            gazetteer.save(path)
+            loaded = Gazetteer.load(path)
+            with open(os.path.join(tmp, 'bad.gaz'), 'wb') as f:
+                f.write(b'not a gazetteer')
+            with self.assertRaises(ValueError):
+                Gazetteer.load(os.path.join(tmp, 'bad.gaz'))
+        text = "Zürich Re paid Acme Widgets Holdings"
+        self.assertEqual(loaded.scan(text), gazetteer.scan(text))
+        self.assertEqual(len(loaded), len(gazetteer))
+
+    def test_post_processor_adds_gazetteer_orgs(self):
+        text = "Statement for Foo Traders Pvt Ltd"
+        result = NERPostProcessor().process({}, text)['entities']
+        self.assertEqual(result['ORG'], [{'text': 'Foo Traders Pvt Ltd', 'start': 14, 'end': len(text),
+                                          'source': 'gazetteer'}])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,64 @@
+import os
+import sys
+import unittest
+
+import fitz
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from image_preprocess import deskew, estimate_skew, gray_view, preprocess, to_gray
+
+
+def text_page(dpi=150, colorspace=fitz.csGRAY):
+    doc = fitz.open()
+    page = doc.new_page()
+    for i in range(25):
+        page.insert_text((50, 60 + i * 24), "Opening balance 1,000.00 paid to ACME BANK ref 12345", fontsize=12)
+    pix = page.get_pixmap(dpi=dpi, colorspace=colorspace)
+    doc.close()
+    return pix
+
+
+class TestImagePreprocess(unittest.TestCase):
+    def test_gray_view_shares_the_pixmap_buffer(self):
+        pix = text_page()
+        gray = gray_view(pix)
+        self.assertEqual(gray.shape, (pix.height, pix.width))
+        self.assertEqual(gray.dtype, np.uint8)
+        self.assertTrue(np.shares_memory(gray, np.frombuffer(pix.samples_mv, dtype=np.uint8)))
+
+    def test_colour_pixmaps_are_converted(self):
+        pix = text_page(colorspace=fitz.csRGB)
+        gray = gray_view(pix)
+        self.assertEqual(gray.shape, (pix.height, pix.width))
+        self.assertIs(to_gray(gray), gray)
+
+    def test_skew_is_estimated_and_corrected(self):
+        pix = text_page()
+        gray = gray_view(pix)
+        self.assertEqual(estimate_skew(gray), 0.0)
+        for angle in (-6.5, -1.2, 2.0, 8.3):
+            tilted = deskew(gray, angle)
+            self.assertAlmostEqual(estimate_skew(tilted), -angle, delta=0.2)
+        self.assertEqual(estimate_skew(np.full((200, 300), 255, np.uint8)), 0.0)
+
+    def test_preprocess_binarizes_without_touching_the_input(self):
+        pix = text_page()
+        gray = gray_view(pix)
+        before = gray.copy()
+        # uneven lighting plus a tilt, like a phone photo of the page
+        shaded = np.clip(gray.astype(np.int16) - np.linspace(0, 150, gray.shape[1]).astype(np.int16), 0, 255)
+        tilted = deskew(shaded.astype(np.uint8), 3.0)
+        result, steps = preprocess(tilted, dpi=150)
+        self.assertTrue(np.array_equal(gray, before))
+        self.assertEqual(set(np.unique(result)), {0, 255})
+        self.assertAlmostEqual(steps["skew"], -3.0, delta=0.2)
+        self.assertEqual(steps["threshold_block"], 15)
+        # the shaded right margin stays paper, where a global threshold turns it to ink
+        self.assertGreater(result[:, -20:].mean(), 250)
+        self.assertLess(np.where(tilted > 127, 255, 0)[:, -20:].mean(), 10)
+
+
+if __name__ == '__main__':
+    unittest.main()
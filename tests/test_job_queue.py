@@ -0,0 +1,179 @@
+import io
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+import api_server
+import job_queue
+from job_queue import JobStore, JobWorkerPool
+from test_api_server import make_pdf
+
+
+class TestJobStore(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "jobs.sqlite3")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_queued_jobs_survive_restart(self):
+        job_id = JobStore(self.path).submit("a.pdf", b"%PDF")
+
+        reopened = JobStore(self.path)
+        self.assertEqual(reopened.get(job_id)["status"], "queued")
+        job = reopened.claim()
+        self.assertEqual(job["id"], job_id)
+        self.assertEqual(bytes(job["payload"]), b"%PDF")
+        self.assertEqual(reopened.get(job_id)["status"], "running")
+        self.assertIsNone(reopened.claim())
+
+    def test_stale_running_jobs_are_requeued(self):
+        store = JobStore(self.path)
+        job_id = store.submit("a.pdf", b"%PDF")
+        store.claim()
+
+        self.assertEqual(store.requeue_stale(lease_seconds=3600), 0)
+        self.assertEqual(store.requeue_stale(lease_seconds=-1), 1)
+        self.assertEqual(store.get(job_id)["status"], "queued")
+
+    def test_jobs_that_keep_losing_their_worker_fail(self):
+        store = JobStore(self.path)
+        job_id = store.submit("crash.pdf", b"%PDF")
+        self.assertEqual(store.claim()["attempt"], 1)
+        self.assertEqual(store.requeue_stale(lease_seconds=-1, max_attempts=2), 1)
+        self.assertEqual(store.claim()["attempt"], 2)
+
+        self.assertEqual(store.requeue_stale(lease_seconds=-1, max_attempts=2), 0)
+        job = store.get(job_id)
+        self.assertEqual(job["status"], "failed")
+        self.assertIn("2 times", job["error"])
+        self.assertIsNone(store.claim())
+
+    def test_writes_need_the_current_lease(self):
+        store = JobStore(self.path)
+        job_id = store.submit("a.pdf", b"%PDF")
+        first = store.claim()
+        store.requeue_stale(lease_seconds=-1)
+        second = store.claim()
+
+        self.assertFalse(store.heartbeat(job_id, first["attempt"]))
+        self.assertFalse(store.complete(job_id, {"stale": True}, first["attempt"]))
+        self.assertTrue(store.heartbeat(job_id, second["attempt"]))
+        self.assertTrue(store.complete(job_id, {"fresh": True}, second["attempt"]))
+        self.assertEqual(store.get(job_id)["result"], {"fresh": True})
+
+    def test_heartbeat_keeps_long_jobs_leased(self):
+        store = JobStore(self.path)
+        job_id = store.submit("slow.pdf", b"%PDF")
+
+        def slow_job(store, job):
+            time.sleep(0.6)
+            return {"done": True}
+
+        workers = JobWorkerPool(store, workers=2, poll_seconds=0.02, lease_seconds=0.2)
+        with mock.patch.object(job_queue, "run_job", side_effect=slow_job):
+            workers.start()
+            try:
+                for _ in range(100):
+                    if store.get(job_id)["status"] == "done":
+                        break
+                    time.sleep(0.05)
+            finally:
+                workers.stop(timeout=5)
+        job = store.get(job_id)
+        # the idle worker polled requeue_stale throughout, yet the job ran once
+        self.assertEqual((job["status"], job["attempts"], job["result"]), ("done", 1, {"done": True}))
+
+    def test_worker_survives_store_errors(self):
+        store = JobStore(self.path)
+        claim = store.claim
+        errors = [sqlite3.OperationalError("database is locked")] * 3
+
+        def flaky_claim():
+            if errors:
+                raise errors.pop()
+            return claim()
+
+        workers = JobWorkerPool(store, workers=1, poll_seconds=0.01)
+        with mock.patch.object(store, "claim", side_effect=flaky_claim), \
+                mock.patch.object(job_queue.traceback, "print_exc"):
+            workers.start()
+            try:
+                job_id = store.submit("a.pdf", b"%PDF")
+                for _ in range(100):
+                    if store.get(job_id)["status"] != "queued":
+                        break
+                    time.sleep(0.02)
+                self.assertTrue(workers.running)
+            finally:
+                workers.stop(timeout=5)
+        self.assertEqual(errors, [])
+        self.assertEqual(store.get(job_id)["status"], "failed")  # reached run_job: b"%PDF" is not a document
+
+    def test_idle_workers_share_the_stale_job_check(self):
+        store = JobStore(self.path)
+        workers = JobWorkerPool(store, workers=4, poll_seconds=0.01, lease_seconds=4)
+        with mock.patch.object(store, "requeue_stale", wraps=store.requeue_stale) as requeue:
+            workers.start()
+            time.sleep(0.3)
+            workers.stop(timeout=5)
+        # once at start; the next check is due a quarter lease (1 s) later
+        self.assertEqual(requeue.call_count, 1)
+
+
+class TestJobEndpoints(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.store = JobStore(os.path.join(self.tmp.name, "jobs.sqlite3"))
+        self.workers = JobWorkerPool(self.store, workers=2, poll_seconds=0.05)
+        self.saved = api_server.job_store, api_server.job_workers
+        api_server.job_store, api_server.job_workers = self.store, self.workers
+        self.client = api_server.app.test_client()
+
+    def tearDown(self):
+        self.workers.stop(timeout=5)
+        api_server.job_store, api_server.job_workers = self.saved
+        self.tmp.cleanup()
+
+    def wait_for(self, job_id):
+        for _ in range(200):
+            body = self.client.get(f"/api/jobs/{job_id}").get_json()
+            if body["status"] in ("done", "failed"):
+                return body
+            time.sleep(0.05)
+        self.fail("job did not finish")
+
+    def test_job_runs_in_background(self):
+        response = self.client.post("/api/jobs", data={
+            "file": (io.BytesIO(make_pdf("ACME BANK statement")), "statement.pdf")
+        }, content_type="multipart/form-data")
+        self.assertEqual(response.status_code, 202)
+
+        body = self.wait_for(response.get_json()["job_id"])
+        self.assertEqual(body["status"], "done")
+        self.assertEqual(body["progress"], 1)
+        self.assertEqual(body["result"]["filename"], "statement.pdf")
+        self.assertIn("ORG", body["result"]["entities"])
+
+    def test_failed_job_reports_error(self):
+        response = self.client.post("/api/jobs", data={
+            "file": (io.BytesIO(b"not a pdf"), "bad.pdf")
+        }, content_type="multipart/form-data")
+
+        body = self.wait_for(response.get_json()["job_id"])
+        self.assertEqual(body["status"], "failed")
+        self.assertIn("error", body)
+
+    def test_unknown_job(self):
+        self.assertEqual(self.client.get("/api/jobs/nope").status_code, 404)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,72 @@
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from keyword_index import KeywordIndex
+from ner_post_processor import NERPostProcessor
+
+CONTRACT = ("This Agreement is effective as of January 1, 2024 and shall terminate on December 31, 2023. "
+            "Payment is due March 3, 2024.")
+
+
+def span(text, needle):
+    start = text.index(needle)
+    return start, start + len(needle)
+
+
+class TestKeywordIndex(unittest.TestCase):
+    def test_positions_are_sorted_with_roles(self):
+        index = KeywordIndex(CONTRACT)
+        self.assertEqual(list(index.starts), sorted(index.starts))
+        self.assertEqual(index.roles, ['effective', 'termination'])
+
+    def test_nearest_within_window(self):
+        index = KeywordIndex(CONTRACT)
+        self.assertEqual(index.nearest(*span(CONTRACT, 'January 1, 2024')), 'effective')
+        self.assertEqual(index.nearest(*span(CONTRACT, 'December 31, 2023')), 'termination')
+        self.assertIsNone(index.nearest(*span(CONTRACT, 'March 3, 2024'), window=10))
+
+    def test_keyword_after_date_and_inside_span(self):
+        text = 'January 15, 2024 (the Effective Date) and the Expiry Date 2025'
+        index = KeywordIndex(text)
+        self.assertEqual(index.nearest(*span(text, 'January 15, 2024')), 'effective')
+        self.assertEqual(index.nearest(*span(text, 'the Expiry Date 2025')), 'termination')
+
+    def test_assign_does_not_reach_past_another_date(self):
+        text = 'terminates on 2024-12-31 or 2025-01-31'
+        index = KeywordIndex(text)
+        roles = index.assign([span(text, '2025-01-31'), span(text, '2024-12-31')])
+        self.assertEqual(roles, [None, 'termination'])
+
+
+class TestDateLogicFires(unittest.TestCase):
+    def entities(self, text):
+        return {'DATE': [dict(zip(('start', 'end'), span(text, d)), text=d)
+                         for d in ('January 1, 2024', 'December 31, 2023')]}
+
+    def test_roles_and_date_logic_warning(self):
+        result = NERPostProcessor().process(self.entities(CONTRACT), CONTRACT)
+        self.assertEqual([d['role'] for d in result['entities']['DATE']], ['effective', 'termination'])
+        self.assertIn('Date Logic: Invalid: start > end', result['validation_report'])
+
+    def test_evaluate_uses_roles_from_processed_dicts(self):
+        processor = NERPostProcessor()
+        entities = processor.process(self.entities(CONTRACT), CONTRACT)['entities']
+        self.assertIn('Date Logic: Invalid: start > end', processor.evaluate(entities)['validation_report'])
+
+    def test_dates_in_order_are_not_a_warning(self):
+        text = CONTRACT.replace('December 31, 2023', 'December 31, 2024')
+        entities = {'DATE': [dict(zip(('start', 'end'), span(text, d)), text=d)
+                             for d in ('January 1, 2024', 'December 31, 2024')]}
+        processor = NERPostProcessor()
+        result = processor.process(entities, text)
+        self.assertEqual([d['role'] for d in result['entities']['DATE']], ['effective', 'termination'])
+        self.assertFalse([w for w in result['validation_report'] if w.startswith('Date Logic')])
+        self.assertFalse([w for w in processor.evaluate(result['entities'])['validation_report']
+                          if w.startswith('Date Logic')])
+
+
+if __name__ == '__main__':
+    unittest.main()
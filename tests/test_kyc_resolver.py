@@ -0,0 +1,91 @@
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from entity_table import EntityTable
+from kyc_resolver import KYCResolver, normalize_name
+
+MASTER = [('K1', 'ABC Corporation'), ('K2', 'XYZ Limited'), ('K3', 'ABC Traders Pvt Ltd'), ('K4', 'Acme Bank')]
+
+
+class TestKYCResolver(unittest.TestCase):
+    def test_normalize_folds_ocr_confusions_and_legal_forms(self):
+        self.assertEqual(normalize_name('ABC C0RPORATION'), normalize_name('abc corp.'))
+        self.assertEqual(normalize_name('XYZ LIMlTED'), normalize_name('XYZ Ltd'))
+        self.assertEqual(normalize_name('Acrne  Bank'), normalize_name('Acme Bank'))
+
+    def test_top_k_with_scores(self):
+        resolver = KYCResolver.build(MASTER)
+        matches = resolver.search('ABC C0RPORATION', k=2)
+        self.assertEqual(matches[0], {'id': 'K1', 'name': 'ABC Corporation', 'score': 1.0})
+        self.assertEqual(len(matches), 2)
+        self.assertLess(matches[1]['score'], 1.0)
+        self.assertEqual([m['id'] for m in resolver.search('XYZ LIMlTED', min_score=0.5)], ['K2'])
+        self.assertEqual(resolver.search('qqq'), [])
+
+    def test_add_rename_and_remove(self):
+        resolver = KYCResolver.build(MASTER)
+        resolver.add('K5', 'Zenith Motors Inc')
+        self.assertEqual(resolver.search('ZENITH M0TORS INC', k=1)[0]['id'], 'K5')
+        resolver.add('K5', 'Zenith Foods Inc')
+        self.assertEqual(resolver.search('Zenith Foods', k=1)[0]['name'], 'Zenith Foods Inc')
+        self.assertTrue(resolver.remove('K1'))
+        self.assertFalse(resolver.remove('K1'))
+        self.assertNotIn('K1', [m['id'] for m in resolver.search('ABC Corporation')])
+        self.assertEqual(len(resolver), 4)
+        resolver.compact()
+        self.assertEqual(sorted(resolver.ids), ['K2', 'K3', 'K4', 'K5'])
+        self.assertEqual(resolver.search('XYZ Ltd', k=1)[0]['id'], 'K2')
+
+    def test_version_follows_contents(self):
+        resolver = KYCResolver.build(MASTER)
+        versions = [resolver.version]
+        resolver.add('K5', 'Zenith Motors Inc')
+        versions.append(resolver.version)
+        resolver.add('K5', 'Zenith Foods Inc')
+        versions.append(resolver.version)
+        resolver.remove('K5')
+        self.assertEqual(len(set(versions)), 3)
+        self.assertEqual(resolver.version, versions[0])
+        resolver.compact()
+        self.assertEqual(resolver.version, versions[0])
+        self.assertEqual(KYCResolver.build(reversed(MASTER)).version, versions[0])
+
+    def test_save_and_load(self):
+        resolver = KYCResolver.build(MASTER + [('K6', 'Zürich Versicherung AG')])
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'kyc.idx')
+            resolver.save(path)
+            loaded = KYCResolver.load(path)
+        self.assertEqual(loaded.version, resolver.version)
+        for query in ('ABC C0RPORATION', 'Zurich Versicherung', 'Acme'):
+            self.assertEqual(loaded.search(query), resolver.search(query))
+
+    def test_separator_in_added_values_survives_save(self):
+        resolver = KYCResolver.build(MASTER)
+        resolver.add('K7', 'Delta\x1fShipping Co')
+        with self.assertRaises(ValueError):
+            resolver.add('K8\x1fK9', 'Omega Foods')
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'kyc.idx')
+            resolver.save(path)
+            loaded = KYCResolver.load(path)
+        self.assertEqual(loaded.ids, resolver.ids)
+        self.assertEqual(loaded.search('Delta Shipping Co', k=1), [{'id': 'K7', 'name': 'Delta Shipping Co', 'score': 1.0}])
+        self.assertEqual(loaded.search('Acme Bank', k=1)[0]['id'], 'K4')
+
+    def test_resolve_table(self):
+        table = EntityTable()
+        table.add('ORG', 'XYZ LIMlTED', 0, 11)
+        table.add('DATE', '2024-01-01', 12, 22)
+        KYCResolver.build(MASTER).resolve_table(table, k=1)
+        entities = table.to_dicts()
+        self.assertEqual(entities['ORG'][0]['kyc_matches'], [{'id': 'K2', 'name': 'XYZ Limited', 'score': 1.0}])
+        self.assertNotIn('kyc_matches', entities['DATE'][0])
+
+
+if __name__ == '__main__':
+    unittest.main()
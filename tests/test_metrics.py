@@ -0,0 +1,155 @@
+import io
+import os
+import re
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+import document_pipeline
+import metrics
+from api_server import app
+from metrics import Registry, stage, timed
+from test_api_server import make_pdf
+
+
+def sample(text, name, **labels):
+    """Value of one sample in Prometheus text output (0 when absent); labels in rendered order"""
+    wanted = ",".join(f'{key}="{value}"' for key, value in labels.items())
+    pattern = "^" + re.escape(name + (f"{{{wanted}}}" if wanted else "")) + r" (\S+)$"
+    match = re.search(pattern, text, re.MULTILINE)
+    return float(match.group(1)) if match else 0.0
+
+
+class TestRegistry(unittest.TestCase):
+    def test_histogram_renders_cumulative_buckets(self):
+        registry = Registry(prefix="test")
+        latency = registry.histogram("latency_seconds", "Latency", buckets=(0.1, 1.0))
+        for value in (0.05, 0.5, 0.7, 3.0):
+            latency.observe(value, stage="ocr")
+        text = registry.render()
+
+        self.assertIn("# TYPE test_latency_seconds histogram", text)
+        self.assertEqual(sample(text, "test_latency_seconds_bucket", stage="ocr", le="0.1"), 1)
+        self.assertEqual(sample(text, "test_latency_seconds_bucket", stage="ocr", le="1"), 3)
+        self.assertEqual(sample(text, "test_latency_seconds_bucket", stage="ocr", le="+Inf"), 4)
+        self.assertAlmostEqual(sample(text, "test_latency_seconds_sum", stage="ocr"), 4.25)
+        self.assertEqual(sample(text, "test_latency_seconds_count", stage="ocr"), 4)
+
+    def test_counters_collectors_and_escaping(self):
+        registry = Registry(prefix="test")
+        documents = registry.counter("documents", "Documents")
+        documents.inc(outcome="processed")
+        documents.inc(2, outcome="processed")
+        documents.inc(outcome='odd "name"\n')
+        registry.collector(lambda: metrics.cache_samples("result_cache", {"hits": 3, "misses": 1, "hit_rate": 0.75}))
+        text = registry.render()
+
+        self.assertIn("# TYPE test_documents_total counter", text)
+        self.assertEqual(sample(text, "test_documents_total", outcome="processed"), 3)
+        self.assertIn('test_documents_total{outcome="odd \\"name\\"\\n"} 1', text)
+        self.assertEqual(sample(text, "test_result_cache_lookups_total", result="hit"), 3)
+        self.assertEqual(sample(text, "test_result_cache_hit_ratio"), 0.75)
+
+    def test_snapshot_and_merge(self):
+        worker, server = Registry(prefix="test"), Registry(prefix="test")
+        for registry in (worker, server):
+            registry.histogram("stage_seconds", "Stages", buckets=(1.0,))
+            registry.counter("pages", "Pages")
+        worker.metrics["test_stage_seconds"].observe(0.5, stage="extract")
+        worker.metrics["test_pages_total"].inc(4, route="text")
+        server.metrics["test_pages_total"].inc(route="text")
+
+        server.merge(worker.snapshot(reset=True))
+        self.assertNotIn("test_pages_total{", worker.render())
+        self.assertNotIn("test_stage_seconds_count{", worker.render())
+        text = server.render()
+        self.assertEqual(sample(text, "test_pages_total", route="text"), 5)
+        self.assertEqual(sample(text, "test_stage_seconds_count", stage="extract"), 1)
+
+    def test_disabled_metrics_record_nothing(self):
+        before = metrics.STAGE_SECONDS.snapshot()
+        metrics.registry.enabled = False
+        try:
+            self.assertIs(stage("extract"), metrics._NULL_TIMER)
+            with stage("extract"):
+                pass
+            self.assertEqual(timed("decorated")(lambda x: x * 2)(21), 42)
+            metrics.DOCUMENTS.inc(outcome="processed")
+            self.assertEqual(metrics.STAGE_SECONDS.snapshot(), before)
+        finally:
+            metrics.registry.enabled = True
+
+    def test_timed_decorator(self):
+        @timed("unit_test_stage")
+        def work(x):
+            return x + 1
+
+        self.assertEqual(work(1), 2)
+        self.assertEqual(work.__name__, "work")
+        self.assertEqual(sample(metrics.registry.render(), "docparse_stage_seconds_count", stage="unit_test_stage"), 1)
+
+
+class TestMetricsEndpoint(unittest.TestCase):
+    def setUp(self):
+        self.client = app.test_client()
+
+    def scrape(self):
+        response = self.client.get("/api/metrics")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.headers["Content-Type"], "text/plain; version=0.0.4; charset=utf-8")
+        return response.get_data(as_text=True)
+
+    def test_process_records_stages_and_counts(self):
+        before = self.scrape()
+        response = self.client.post("/api/process", data={
+            "file": (io.BytesIO(make_pdf("ACME BANK statement", "GREEN TRUST notice")), "metrics.pdf")
+        }, content_type="multipart/form-data")
+        self.assertEqual(response.status_code, 200)
+        after = self.scrape()
+
+        def delta(name, **labels):
+            return sample(after, name, **labels) - sample(before, name, **labels)
+
+        for name in ("extract", "clean", "scan", "post_clean", "post_dates", "post_amounts", "post_date_roles",
+                     "post_heuristics", "post_merge", "post_validate"):
+            self.assertEqual(delta("docparse_stage_seconds_count", stage=name), 1, name)
+        self.assertEqual(delta("docparse_documents_total", outcome="processed"), 1)
+        self.assertEqual(delta("docparse_pages_total", route="text"), 2)
+        self.assertEqual(delta("docparse_entities_total", label="ORG"), 2)
+        self.assertEqual(delta("docparse_request_seconds_count", endpoint="process_document", status="200"), 1)
+        self.assertIn("docparse_result_cache_lookups_total", after)
+
+    def test_batch_workers_report_their_stages(self):
+        before = self.scrape()
+        response = self.client.post("/api/process/batch", data={
+            "files": [(io.BytesIO(make_pdf("Batch metrics ACME BANK")), "one.pdf")]
+        }, content_type="multipart/form-data")
+        self.assertNotIn("metrics", response.get_json()["documents"][0])
+        after = self.scrape()
+
+        self.assertEqual(sample(after, "docparse_stage_seconds_count", stage="extract")
+                         - sample(before, "docparse_stage_seconds_count", stage="extract"), 1)
+        self.assertEqual(sample(after, "docparse_documents_total", outcome="processed")
+                         - sample(before, "docparse_documents_total", outcome="processed"), 1)
+
+    def test_fresh_batch_workers_do_not_resend_server_counts(self):
+        # workers forked after the server has recorded metrics start from zero
+        if document_pipeline._batch_pool is not None:
+            document_pipeline._batch_pool.shutdown()
+            document_pipeline._batch_pool = None
+        self.client.post("/api/process", data={
+            "file": (io.BytesIO(make_pdf("recorded before the fork")), "before.pdf")
+        }, content_type="multipart/form-data")
+        before = self.scrape()
+        self.client.post("/api/process/batch", data={
+            "files": [(io.BytesIO(make_pdf("first batch after the fork")), "one.pdf")]
+        }, content_type="multipart/form-data")
+        after = self.scrape()
+
+        self.assertEqual(sample(after, "docparse_stage_seconds_count", stage="extract")
+                         - sample(before, "docparse_stage_seconds_count", stage="extract"), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,160 @@
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from document_pipeline import combine_entities
+from concurrent.futures import ThreadPoolExecutor
+
+import spacy
+
+from ner_batcher import MicroBatcher
+from ner_service import NERService, merge_windows, split_windows
+
+
+def ruler_pipeline():
+    """Blank English pipeline tagging fixed phrases, so entities don't depend on context"""
+    nlp = spacy.blank("en")
+    nlp.add_pipe("entity_ruler").add_patterns([
+        {"label": "PARTY", "pattern": [{"LOWER": "acme"}, {"LOWER": "bank"}, {"LOWER": "ltd"}]},
+        {"label": "JURISDICTION", "pattern": "Delaware"},
+    ])
+    return nlp
+
+
+class TestNERService(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.service = NERService(batch_size=4)
+
+    def test_loads_trained_labels_once(self):
+        nlp = self.service.load()
+        self.assertIs(self.service.load(), nlp)
+        self.assertEqual(sorted(self.service.labels), ['AMOUNT', 'DATE', 'JURISDICTION', 'PARTY'])
+        self.assertIsNotNone(self.service.load_seconds)
+
+    def test_predict_returns_entity_dicts_in_order(self):
+        texts = ["Agreement between ABC Corp and XYZ Ltd.", "", "Governed by the laws of Delaware."]
+        results = self.service.predict(texts)
+
+        self.assertEqual(len(results), 3)
+        for text, entities in zip(texts, results):
+            for label, items in entities.items():
+                for item in items:
+                    self.assertEqual(text[item['start']:item['end']], item['text'])
+        stats = self.service.stats()
+        self.assertEqual(stats['last_batch']['docs'], 3)
+        self.assertGreater(stats['last_batch']['tokens'], 0)
+
+
+class TestWindowedNER(unittest.TestCase):
+    def test_windows_overlap_and_cut_at_line_breaks(self):
+        text = "".join(f"Line {i} of the statement, balance {i * 100}.00\n" for i in range(200))
+        windows = list(split_windows(text, size=500, overlap=100))
+
+        self.assertEqual(windows[0][0], 0)
+        self.assertEqual(windows[-1][1], len(text))
+        for (start, end), (next_start, next_end) in zip(windows, windows[1:]):
+            self.assertLessEqual(end - start, 500)
+            self.assertGreaterEqual(end - next_start, 100)
+            self.assertLess(start, next_start)
+            self.assertEqual(text[end - 1], "\n")
+            self.assertEqual(text[next_start - 1], "\n")
+
+    def test_unbroken_text_is_cut_at_sentences_then_spaces_then_anywhere(self):
+        self.assertEqual(list(split_windows("Done. " * 30, size=100, overlap=10))[0], (0, 96))
+        self.assertEqual(list(split_windows("word " * 40, size=100, overlap=10))[0], (0, 100))
+        self.assertEqual(list(split_windows("x" * 250, size=100, overlap=10)), [(0, 100), (90, 190), (180, 250)])
+
+    def test_windowed_entities_match_whole_document(self):
+        nlp = ruler_pipeline()
+        text = "".join(f"Payment {i} from ACME BANK LTD under the laws of Delaware.\n" for i in range(300))
+        whole = NERService(window_chars=10 ** 9, window_overlap=0)
+        windowed = NERService(window_chars=700, window_overlap=150)
+        whole.nlp = windowed.nlp = nlp
+
+        expected = whole.predict([text, "short Delaware text"])
+        self.assertEqual(windowed.predict([text, "short Delaware text"]), expected)
+        self.assertEqual(len(expected[0]['PARTY']), 300)
+        self.assertGreater(windowed.last_batch['windows'], len(text) // 700)
+        self.assertEqual(windowed.last_batch['docs'], 2)
+
+    def test_overlapping_readings_keep_the_one_furthest_from_an_edge(self):
+        text = "ACME BANK LTD paid"
+        # two windows read the same stretch; the second cut it short at its edge
+        candidates = [(0, 13, 40, 'PARTY'), (0, 9, 2, 'PARTY'), (0, 13, 7, 'PARTY'), (14, 18, 1, 'OTHER')]
+        self.assertEqual(merge_windows(text, candidates), {
+            'PARTY': [{'text': 'ACME BANK LTD', 'start': 0, 'end': 13, 'source': 'model'}],
+            'OTHER': [{'text': 'paid', 'start': 14, 'end': 18, 'source': 'model'}],
+        })
+
+    def test_overlap_must_leave_room_in_the_window(self):
+        with self.assertRaises(ValueError):
+            NERService(window_chars=100, window_overlap=50)
+
+
+class TestCombineEntities(unittest.TestCase):
+    def test_heuristics_fill_in_without_duplicating_model_spans(self):
+        model = {'DATE': [{'text': '2024-01-15', 'start': 5, 'end': 15, 'source': 'model'}]}
+        heuristic = {
+            'DATE': [{'text': '2024-01-15', 'start': 5, 'end': 15}, {'text': '2024-02-01', 'start': 30, 'end': 40}],
+            'ORG': [{'text': 'ACME', 'start': 0, 'end': 4}],
+        }
+        combined = combine_entities(model, heuristic)
+
+        self.assertEqual([d['start'] for d in combined['DATE']], [5, 30])
+        self.assertEqual(combined['DATE'][0]['source'], 'model')
+        self.assertEqual(len(combined['ORG']), 1)
+
+
+class EchoService:
+    """Stands in for NERService: records each batch and echoes the texts back"""
+
+    def __init__(self):
+        self.calls = []
+
+    def predict(self, texts):
+        self.calls.append(list(texts))
+        return [{'TEXT': [{'text': t, 'start': 0, 'end': len(t)}]} for t in texts]
+
+
+class TestMicroBatcher(unittest.TestCase):
+    def test_concurrent_requests_share_batches_and_get_their_own_result(self):
+        service = EchoService()
+        batcher = MicroBatcher(service, max_wait_ms=50, max_batch=8)
+        texts = [f"document {i}" for i in range(16)]
+
+        with ThreadPoolExecutor(max_workers=16) as pool:
+            results = list(pool.map(batcher.predict, texts))
+
+        self.assertEqual([r['TEXT'][0]['text'] for r in results], texts)
+        self.assertLess(len(service.calls), len(texts))
+        self.assertTrue(all(len(call) <= 8 for call in service.calls))
+        stats = batcher.stats()
+        self.assertEqual(stats['docs'], 16)
+        self.assertEqual(sum(stats['batch_size_histogram'].values()), stats['batches'])
+        self.assertEqual(stats['queue_depth'], 0)
+
+    def test_batches_are_split_by_length(self):
+        service = EchoService()
+        batcher = MicroBatcher(service, max_wait_ms=50, length_buckets=(10,))
+
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            list(pool.map(batcher.predict, ["short", "tiny", "x" * 50, "y" * 60]))
+
+        for call in service.calls:
+            self.assertEqual(len({len(t) > 10 for t in call}), 1)
+
+    def test_errors_reach_every_waiting_request(self):
+        class Broken:
+            def predict(self, texts):
+                raise RuntimeError("model down")
+
+        batcher = MicroBatcher(Broken(), max_wait_ms=1)
+        with self.assertRaises(RuntimeError):
+            batcher.predict("text")
+
+
+if __name__ == '__main__':
+    unittest.main()
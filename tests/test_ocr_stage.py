@@ -0,0 +1,105 @@
+import os
+import sys
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
+
+import fitz
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+import ocr_stage
+from ocr_stage import ROUTE_BLANK, ROUTE_NO_OCR, ROUTE_OCR, ROUTE_TEXT, extract_with_ocr, has_text_layer, ocr_text
+
+
+def scanned_pdf():
+    """Page 1 has a text layer, page 2 is blank, pages 3 and 4 are images of text"""
+    doc = fitz.open()
+    doc.new_page().insert_text((72, 72), "ACME BANK statement for March 2024")
+    doc.new_page()
+    for line in ("Opening balance 1,000.00", "Closing balance 2,000.00"):
+        source = fitz.open()
+        source.new_page().insert_text((72, 72), line, fontsize=20)
+        pix = source[0].get_pixmap(dpi=72)
+        source.close()
+        doc.new_page().insert_image(fitz.Rect(0, 0, 300, 300), pixmap=pix)
+    data = doc.tobytes()
+    doc.close()
+    return data
+
+
+def tesseract_data(*lines, conf=90):
+    data = {"text": [], "conf": [], "block_num": [], "par_num": [], "line_num": []}
+    for n, line in enumerate(lines, start=1):
+        for word in [""] + line.split():
+            data["text"].append(word)
+            data["conf"].append(-1 if not word else conf)
+            data["block_num"].append(1)
+            data["par_num"].append(1)
+            data["line_num"].append(n)
+    return data
+
+
+def fake_ocr(image, lang, output_type):
+    return tesseract_data(f"OCR {image.width}x{image.height}", "second line")
+
+
+class TestOCRStage(unittest.TestCase):
+    def test_has_text_layer(self):
+        self.assertFalse(has_text_layer(" \n  - 12 -  \n"))
+        self.assertTrue(has_text_layer("Statement of account"))
+
+    def test_ocr_text_groups_lines_and_averages_confidence(self):
+        data = tesseract_data("Opening balance", "1,000.00")
+        data["conf"][1] = 70
+        self.assertEqual(ocr_text(data), ("Opening balance\n1,000.00\n", 83.33))
+        self.assertEqual(ocr_text(tesseract_data()), ("", None))
+
+    def test_routes_without_tesseract(self):
+        with mock.patch.object(ocr_stage, 'tesseract_version', return_value=None):
+            extracted = extract_with_ocr(scanned_pdf(), parallel=False)
+        self.assertEqual([p["route"] for p in extracted.routing], [ROUTE_TEXT, ROUTE_BLANK, ROUTE_NO_OCR, ROUTE_NO_OCR])
+        self.assertIn("ACME BANK", extracted.page_text(0))
+
+    def test_only_pages_without_text_are_ocrd(self):
+        with mock.patch.object(ocr_stage, 'tesseract_version', return_value="5.3.0"), \
+                mock.patch.object(ocr_stage.pytesseract, 'image_to_data', side_effect=fake_ocr) as ocr:
+            extracted = extract_with_ocr(scanned_pdf(), parallel=False, dpi=100)
+        self.assertEqual(ocr.call_count, 2)
+        self.assertEqual([p["route"] for p in extracted.routing], [ROUTE_TEXT, ROUTE_BLANK, ROUTE_OCR, ROUTE_OCR])
+        self.assertIn("ACME BANK", extracted.page_text(0))
+        # a 595x842pt page rasterized at 100 dpi
+        self.assertEqual(extracted.page_text(2), "OCR 827x1170\nsecond line\n")
+        page = extracted.routing[3]
+        self.assertEqual((page["dpi"], page["confidence"], page["chars"]), (100, 90.0, len(extracted.page_text(3))))
+        self.assertGreaterEqual(page["ocr_ms"], 0)
+        self.assertEqual(ocr_stage.routing_summary(extracted)["routes"], {"text": 1, "blank": 1, "ocr": 2})
+
+    def test_pages_are_spread_over_the_pool(self):
+        with mock.patch.object(ocr_stage, 'tesseract_version', return_value="5.3.0"), \
+                mock.patch.object(ocr_stage.pytesseract, 'image_to_data', side_effect=fake_ocr), \
+                mock.patch.object(ocr_stage, '_get_ocr_pool', return_value=ThreadPoolExecutor(2)), \
+                mock.patch.object(ocr_stage, '_ocr_pages', wraps=ocr_stage._ocr_pages) as worker:
+            extracted = extract_with_ocr(scanned_pdf(), workers=2, dpi=50)
+        self.assertEqual(sorted(call.args[1] for call in worker.call_args_list), [[2], [3]])
+        self.assertEqual([p["route"] for p in extracted.routing][2:], [ROUTE_OCR, ROUTE_OCR])
+
+    def test_low_confidence_pages_are_preprocessed_and_reread(self):
+        # page 3: a poor first reading, a better one after preprocessing; page 4 reads fine
+        readings = [tesseract_data("0pening ba1ance", conf=40), tesseract_data("Opening balance", conf=95),
+                    tesseract_data("Closing balance", conf=92)]
+        ocr = mock.Mock(side_effect=readings)
+
+        with mock.patch.object(ocr_stage, 'tesseract_version', return_value="5.3.0"), \
+                mock.patch.object(ocr_stage.pytesseract, 'image_to_data', ocr) as reader:
+            extracted = extract_with_ocr(scanned_pdf(), parallel=False, dpi=50)
+            self.assertEqual(reader.call_count, 3)  # page 3 twice, page 4 once (confident)
+        page = extracted.routing[2]
+        self.assertEqual(extracted.page_text(2), "Opening balance\n")
+        self.assertEqual((page["first_confidence"], page["confidence"], page["preprocessed"]), (40.0, 95.0, True))
+        self.assertIn("preprocess_ms", page)
+        self.assertNotIn("preprocessed", extracted.routing[3])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,101 @@
+import io
+import os
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+import document_pipeline
+from kyc_resolver import KYCResolver
+from result_cache import ResultCache, content_hash
+from test_api_server import make_pdf
+
+
+class TestResultCache(unittest.TestCase):
+    def test_key_depends_on_bytes_and_version(self):
+        cache = ResultCache(version="1")
+        self.assertEqual(cache.key(b"abc"), cache.key(io.BytesIO(b"abc")))
+        self.assertNotEqual(cache.key(b"abc"), cache.key(b"abd"))
+        self.assertNotEqual(cache.key(b"abc"), ResultCache(version="2").key(b"abc"))
+
+    def test_callable_version_is_read_per_key(self):
+        version = ["1"]
+        cache = ResultCache(version=lambda: version[0])
+        before = cache.key(b"abc")
+        version[0] = "2"
+        self.assertEqual(before, ResultCache(version="1").key(b"abc"))
+        self.assertEqual(cache.key(b"abc"), ResultCache(version="2").key(b"abc"))
+        self.assertEqual(cache.stats()["version"], "2")
+
+    def test_stream_is_rewound_after_hashing(self):
+        stream = io.BytesIO(b"pdf bytes")
+        content_hash(stream)
+        self.assertEqual(stream.read(), b"pdf bytes")
+
+    def test_lru_eviction_and_counters(self):
+        cache = ResultCache(max_entries=2)
+        cache.put("a", {"n": 1})
+        cache.put("b", {"n": 2})
+        cache.get("a")
+        cache.put("c", {"n": 3})
+
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.get("a"), {"n": 1})
+        stats = cache.stats()
+        self.assertEqual((stats["hits"], stats["misses"], stats["evictions"]), (2, 1, 1))
+
+    def test_disk_tier_survives_a_new_process_and_invalidation_clears_it(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            ResultCache(cache_dir=tmp).put("k" * 64, {"n": 1})
+
+            fresh = ResultCache(cache_dir=tmp)
+            self.assertEqual(fresh.get("k" * 64), {"n": 1})
+            self.assertEqual(fresh.stats()["disk_hits"], 1)
+
+            fresh.invalidate()
+            self.assertIsNone(fresh.get("k" * 64))
+            self.assertIsNone(ResultCache(cache_dir=tmp).get("k" * 64))
+
+
+class TestCachedProcessing(unittest.TestCase):
+    def setUp(self):
+        self.saved = document_pipeline.result_cache
+        document_pipeline.result_cache = ResultCache()
+
+    def tearDown(self):
+        document_pipeline.result_cache = self.saved
+
+    def test_repeat_upload_skips_the_pipeline(self):
+        pdf = make_pdf("ACME BANK statement")
+        first = document_pipeline.process_upload(io.BytesIO(pdf), "a.pdf")
+
+        analyze = document_pipeline.analyze_text
+        document_pipeline.analyze_text = None  # any pipeline run would fail now
+        try:
+            second = document_pipeline.process_upload(io.BytesIO(pdf), "again.pdf")
+        finally:
+            document_pipeline.analyze_text = analyze
+
+        self.assertEqual(second["entities"], first["entities"])
+        self.assertEqual(second["filename"], "again.pdf")
+        self.assertEqual(document_pipeline.result_cache.stats()["hits"], 1)
+
+    def test_kyc_edit_misses_the_cache(self):
+        pdf = make_pdf("ACME BANK statement")
+        resolver = KYCResolver.build([('K1', 'Acme Bank')])
+        document_pipeline.result_cache = ResultCache(version=document_pipeline._result_version)
+        with mock.patch.object(document_pipeline, "kyc_resolver", resolver):
+            document_pipeline.process_upload(io.BytesIO(pdf), "a.pdf")
+            resolver.add('K2', 'Acme Bank Ltd')
+            document_pipeline.process_upload(io.BytesIO(pdf), "a.pdf")
+        self.assertEqual(document_pipeline.result_cache.stats()["hits"], 0)
+
+    def test_unreadable_upload_is_not_cached(self):
+        document_pipeline.process_upload(io.BytesIO(b"not a pdf"), "bad.pdf")
+        self.assertEqual(document_pipeline.result_cache.stats()["entries"], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
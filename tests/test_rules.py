@@ -1,3 +1,4 @@
+import random
 import unittest
 import sys
 sys.path.insert(0, '../src')
@@ -12,6 +13,7 @@ from dateutil import parser
 from validation_rules import ValidationRules
 from date_standardizer import DateStandardizer
 from ner_post_processor import NERPostProcessor
+from reference import date_corpus, outcome
 
 class TestDateStandardization(unittest.TestCase):
     def test_full_month_name(self):
@@ -168,3 +170,21 @@ class TestAdvancedEdgeCases(unittest.TestCase):
         self.assertEqual(date1, "2024-02-03")
         self.assertEqual(date2, "2024-03-05")
 
+
+
+class TestFastDateParsing(unittest.TestCase):
+    def test_matches_dateutil(self):
+        dates = date_corpus(3000, 0.1, random.Random(1)) + [
+            '2024-02-30', '31/02/2024', '13/13/2024', '15-Jan-75', '15-Jan-00', 'Sept 5, 2024',
+            'January 15,2024', 'Jan 5 0050', ' 2024-01-05 ', '00-Jan-25', 'Foo 5, 2024',
+        ]
+        for value in dates:
+            self.assertEqual(outcome(ValidationRules.parse_date, value), outcome(parser.parse, value), repr(value))
+
+    def test_common_layouts_skip_dateutil(self):
+        before = ValidationRules.date_parse_stats()
+        for value in ('2024-01-15', '15/01/2024', '15-Jan-25', 'January 15, 2024'):
+            ValidationRules.standardize_date(value)
+        after = ValidationRules.date_parse_stats()
+        self.assertEqual(after['fast'] - before['fast'], 4)
+        self.assertEqual(after['fallback'], before['fallback'])
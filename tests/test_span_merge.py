@@ -0,0 +1,86 @@
+import os
+import random
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from entity_table import EntityTable
+from ner_post_processor import NERPostProcessor
+from span_merge import SpanMerger
+
+
+def table_of(*rows):
+    table = EntityTable()
+    for label, start, end, source in rows:
+        table.add(label, f"{label}@{start}", start, end, source=source)
+    return table
+
+
+def kept(table):
+    return sorted((table.labels[table.label[i]], table.start[i], table.end[i]) for i in range(len(table)))
+
+
+class TestSpanMerger(unittest.TestCase):
+    def test_model_beats_scanner_beats_heuristic(self):
+        table = table_of(('ORG', 10, 20, None), ('PARTY', 10, 24, 'model'), ('PARTY_HEURISTIC', 12, 20, 'heuristic'),
+                         ('DATE', 30, 40, None))
+        self.assertEqual(SpanMerger().merge(table), 2)
+        self.assertEqual(kept(table), [('DATE', 30, 40), ('PARTY', 10, 24)])
+
+    def test_length_first_keeps_the_containing_span(self):
+        table = table_of(('ORG', 0, 4, 'model'), ('ORG', 0, 9, None))
+        SpanMerger(precedence=('length', 'source')).merge(table)
+        self.assertEqual(kept(table), [('ORG', 0, 9)])
+
+    def test_chain_of_overlaps_keeps_non_overlapping_winners(self):
+        # B overlaps A and C, A and C don't overlap: dropping B keeps both
+        table = table_of(('ORG', 0, 10, 'model'), ('ORG', 8, 14, 'heuristic'), ('ORG', 12, 20, 'model'))
+        SpanMerger().merge(table)
+        self.assertEqual(kept(table), [('ORG', 0, 10), ('ORG', 12, 20)])
+
+    def test_same_label_only(self):
+        table = table_of(('ORG', 0, 10, None), ('DATE', 5, 15, None), ('ORG', 2, 6, 'heuristic'))
+        SpanMerger(cross_label=False).merge(table)
+        self.assertEqual(kept(table), [('DATE', 5, 15), ('ORG', 0, 10)])
+
+    def test_rows_without_spans_are_kept(self):
+        table = table_of(('ORG', 0, 10, None))
+        table.add('PARTY_HEURISTIC', 'Foo Corp')
+        self.assertEqual(SpanMerger().merge(table), 0)
+        self.assertEqual(len(table), 2)
+
+    def test_result_never_overlaps(self):
+        rng = random.Random(4)
+        for _ in range(200):
+            rows = []
+            for _ in range(rng.randint(0, 30)):
+                start = rng.randint(0, 100)
+                rows.append((rng.choice(['ORG', 'DATE', 'PARTY']), start, start + rng.randint(1, 15),
+                             rng.choice(['model', None, 'heuristic'])))
+            table = table_of(*rows)
+            SpanMerger().merge(table)
+            spans = sorted(zip(table.start, table.end))
+            self.assertTrue(all(a[1] <= b[0] for a, b in zip(spans, spans[1:])), spans)
+
+    def test_unknown_precedence(self):
+        with self.assertRaises(ValueError):
+            SpanMerger(precedence=('confidence',))
+
+
+class TestHeuristicPartiesMerge(unittest.TestCase):
+    def test_heuristic_parties_have_spans_and_dedupe(self):
+        text = "Agreement between Acme Bank and Foo Corp"
+        start = text.index("Acme Bank")
+        entities = {'PARTY': [{'text': 'Acme Bank', 'start': start, 'end': start + 9, 'source': 'model'}]}
+        result = NERPostProcessor().process(entities, text)['entities']
+        self.assertEqual([p['text'] for p in result['PARTY']], ['Acme Bank'])
+        # the gazetteer finds Foo Corp as well and outranks the regex heuristic
+        self.assertEqual(result['ORG'], [
+            {'text': 'Foo Corp', 'start': text.index('Foo'), 'end': len(text), 'source': 'gazetteer'}
+        ])
+        self.assertEqual(result['PARTY_HEURISTIC'], [])
+
+
+if __name__ == '__main__':
+    unittest.main()
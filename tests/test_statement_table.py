@@ -0,0 +1,137 @@
+import os
+import sys
+import unittest
+
+import fitz
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from statement_table import StatementTable, extract_statement
+
+
+def right(page, x, text, y):
+    """Right-aligned at x, as statements print amounts"""
+    page.insert_text((x - fitz.get_text_length(text, fontsize=8), y), text, fontsize=8)
+
+
+def statement_pdf(rows, per_page=4, header_every_page=True):
+    """rows: (date, description lines, debit, credit, balance); headers, an opening balance and page footers"""
+    doc = fitz.open()
+    for i, (date, description, debit, credit, balance) in enumerate(rows):
+        if i % per_page == 0:
+            page = doc.new_page()
+            page.insert_text((40, 40), "ACME BANK LTD  Statement of Account", fontsize=10)
+            page.insert_text((280, 800), f"Page {doc.page_count}", fontsize=8)
+            y = 70
+            if i == 0 or header_every_page:
+                page.insert_text((40, y), "Txn Date", fontsize=8)
+                page.insert_text((110, y), "Narration", fontsize=8)
+                for x, name in ((360, "Withdrawals"), (440, "Deposits"), (520, "Balance")):
+                    right(page, x, name, y)
+                y += 14
+            if i == 0:
+                page.insert_text((110, y), "Opening Balance", fontsize=8)
+                right(page, 520, "1,000.00", y)
+                y += 12
+        page.insert_text((40, y), date, fontsize=8)
+        for n, text in enumerate(description):
+            page.insert_text((110, y + n * 10), text, fontsize=8)
+        for x, amount in ((360, debit), (440, credit), (520, balance)):
+            if amount:
+                right(page, x, amount, y)
+        y += 12 + 10 * (len(description) - 1)
+    data = doc.tobytes()
+    doc.close()
+    return data
+
+
+ROWS = [
+    ("01/03/2024", ["UPI/123/GROCERY"], "250.00", "", "750.00"),
+    ("02/03/2024", ["SALARY MARCH", "ACME PVT LTD"], "", "5,000.00", "5,750.00"),
+    ("05/03/2024", ["ATM WDL"], "1,000.00", "", "4,750.00"),
+    ("05/03/2024", ["RENT"], "4,800.00", "", "50.00 Dr"),
+    ("09/03/2024", ["REFUND"], "", "100.00", "50.00"),
+    ("10/03/2024", ["NEFT/ACME"], "", "12,34,567.00", "12,34,617.00"),
+]
+
+
+class TestStatementTable(unittest.TestCase):
+    def test_rows_and_columns(self):
+        table = extract_statement(statement_pdf(ROWS))
+        frame = table.frame
+
+        self.assertEqual(list(frame.columns), ["date", "description", "debit", "credit", "balance", "page"])
+        self.assertEqual(len(table), 6)
+        self.assertEqual(table.opening_balance, 1000.0)
+        self.assertEqual(frame["date"].dt.strftime("%Y-%m-%d").tolist()[:3], ["2024-03-01", "2024-03-02", "2024-03-05"])
+        # a narration over two lines is one row; headers, the opening balance line and footers are not rows
+        self.assertEqual(frame["description"].tolist()[:2], ["UPI/123/GROCERY", "SALARY MARCH ACME PVT LTD"])
+        np.testing.assert_array_equal(frame["debit"].to_numpy(), [250, np.nan, 1000, 4800, np.nan, np.nan])
+        np.testing.assert_array_equal(frame["credit"].to_numpy(), [np.nan, 5000, np.nan, np.nan, 100, 1234567])
+        np.testing.assert_array_equal(frame["balance"].to_numpy(), [750, 5750, 4750, -50, 50, 1234617])
+        self.assertEqual(frame["page"].tolist(), [1, 1, 1, 1, 2, 2])
+        self.assertEqual(str(frame["balance"].dtype), "float64")
+
+    def test_pages_without_a_header_reuse_the_last_layout(self):
+        table = extract_statement(statement_pdf(ROWS, per_page=2, header_every_page=False))
+        self.assertEqual(table.frame["description"].tolist(), extract_statement(statement_pdf(ROWS)).frame[
+            "description"].tolist())
+        self.assertEqual(table.frame["page"].tolist(), [1, 1, 2, 2, 3, 3])
+
+    def test_balance_check(self):
+        table = extract_statement(statement_pdf(ROWS))
+        check = table.balance_check()
+        self.assertTrue(check["consistent"])
+        self.assertEqual((check["order"], check["checked"], check["mismatches"]), ("oldest_first", 6, []))
+
+        table.frame.loc[2, "debit"] = 990.0
+        check = table.balance_check()
+        self.assertFalse(check["consistent"])
+        self.assertEqual(check["mismatches"], [{"row": 2, "date": "2024-03-05", "expected": 4760.0, "balance": 4750.0}])
+
+        newest_first = StatementTable(table.frame.iloc[::-1].reset_index(drop=True))
+        newest_first.frame.loc[3, "debit"] = 1000.0
+        self.assertEqual(newest_first.balance_check()["order"], "newest_first")
+        self.assertTrue(newest_first.balance_check()["consistent"])
+
+    def test_signed_amount_column_and_ignored_columns(self):
+        doc = fitz.open()
+        page = doc.new_page()
+        for x, name in ((40, "Date"), (120, "Particulars"), (300, "Chq No")):
+            page.insert_text((x, 60), name, fontsize=8)
+        right(page, 440, "Amount", 60)
+        right(page, 520, "Balance", 60)
+        for y, (date, text, cheque, amount, balance) in enumerate([
+            ("15 Mar 2024", "Cheque deposit", "004512", "2,000.00 Cr", "2,000.00"),
+            ("16 Mar 2024", "Card purchase", "", "150.50 Dr", "1,849.50"),
+        ]):
+            y = 80 + 12 * y
+            page.insert_text((40, y), date, fontsize=8)
+            page.insert_text((120, y), text, fontsize=8)
+            page.insert_text((300, y), cheque, fontsize=8)
+            right(page, 440, amount, y)
+            right(page, 520, balance, y)
+        frame = extract_statement(doc.tobytes()).frame
+
+        self.assertEqual(frame["description"].tolist(), ["Cheque deposit", "Card purchase"])
+        self.assertEqual(frame["date"].dt.strftime("%Y-%m-%d").tolist(), ["2024-03-15", "2024-03-16"])
+        np.testing.assert_array_equal(frame["credit"].to_numpy(), [2000, np.nan])
+        np.testing.assert_array_equal(frame["debit"].to_numpy(), [np.nan, 150.5])
+
+    def test_documents_without_a_table(self):
+        doc = fitz.open()
+        doc.new_page().insert_text((72, 72), "This Agreement dated 2024-01-15 between ACME and XYZ.")
+        table = extract_statement(doc.tobytes())
+        self.assertEqual(len(table), 0)
+        self.assertFalse(table.balance_check()["consistent"])
+        self.assertEqual(table.summary()["transactions"], 0)
+
+    def test_records_are_json_ready(self):
+        records = extract_statement(statement_pdf(ROWS[:2])).to_records()
+        self.assertEqual(records[0], {"date": "2024-03-01", "description": "UPI/123/GROCERY", "debit": 250.0,
+                                      "credit": None, "balance": 750.0, "page": 1})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,150 @@
+import os
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+import document_pipeline
+import text_cache as text_cache_module
+from result_cache import ResultCache
+from test_api_server import make_pdf
+from text_cache import TextCache, extract_and_clean, prewarm
+from text_cleaner import normalize_text
+
+
+class TestTextCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+
+    def test_round_trip_and_hit_skips_extraction(self):
+        pdf = make_pdf("ACME BANK  statement", "Page twoé total $1,200.00")
+        cache = TextCache(self.tmp.name)
+        extracted, cleaned, alignment = extract_and_clean(pdf, cache)
+        expected, expected_alignment = normalize_text(extracted.text, return_alignment=True)
+        self.assertEqual((cleaned, _arrays(alignment)), (expected, _arrays(expected_alignment)))
+
+        with mock.patch.object(text_cache_module, 'extract_with_ocr', side_effect=AssertionError), \
+                mock.patch.object(text_cache_module, 'normalize_text', side_effect=AssertionError):
+            again, cleaned_again, alignment_again = extract_and_clean(pdf, TextCache(self.tmp.name))
+        self.assertEqual((again.text, list(again.page_starts)), (extracted.text, list(extracted.page_starts)))
+        self.assertEqual(again.page_text(1), extracted.page_text(1))
+        self.assertEqual(cleaned_again, cleaned)
+        self.assertEqual(_arrays(alignment_again), _arrays(alignment))
+
+    def test_version_change_misses(self):
+        pdf = make_pdf("ACME BANK statement")
+        extract_and_clean(pdf, TextCache(self.tmp.name, version="1"))
+        other = TextCache(self.tmp.name, version="2")
+        self.assertIsNone(other.get(other.key(pdf)))
+        self.assertEqual(other.stats()['misses'], 1)
+
+    def test_least_recently_used_files_are_evicted(self):
+        cache = TextCache(self.tmp.name)
+        pdfs = [make_pdf(f"statement {i} " * 50) for i in range(4)]
+        for pdf in pdfs[:3]:
+            extract_and_clean(pdf, cache)
+        first, second, third = (cache._path(cache.key(pdf)) for pdf in pdfs[:3])
+        os.utime(first, (1, 1))
+        os.utime(third, (2, 2))
+        extract_and_clean(pdfs[1], cache)  # a hit makes it the most recently used
+
+        # the fourth document pushes the cache over; trimming to 90% removes the two oldest
+        cache.max_bytes = sum(os.path.getsize(path) for path in (first, second, third))
+        extract_and_clean(pdfs[3], cache)
+        self.assertEqual([os.path.exists(path) for path in (first, second, third)], [False, True, False])
+        self.assertEqual(cache.evictions, 2)
+        self.assertLessEqual(cache.stats()['bytes'], cache.max_bytes * 0.9)
+
+    def test_contains_and_size_of_an_existing_cache(self):
+        pdf = make_pdf("ACME BANK statement")
+        extract_and_clean(pdf, TextCache(self.tmp.name))
+
+        reopened = TextCache(self.tmp.name)
+        self.assertTrue(reopened.contains(reopened.key(pdf)))
+        self.assertFalse(reopened.contains(reopened.key(b"other")))
+        self.assertEqual(reopened.stats()['bytes'], os.path.getsize(reopened._path(reopened.key(pdf))))
+        self.assertEqual((reopened.hits, reopened.misses), (0, 0))
+        self.assertEqual(TextCache(os.path.join(self.tmp.name, "missing")).stats()['bytes'], 0)
+        self.assertIsNone(TextCache(None).stats()['bytes'])
+
+    def test_files_removed_by_another_process_during_a_scan(self):
+        cache = TextCache(self.tmp.name)
+        pdfs = [make_pdf(f"statement {i}") for i in range(3)]
+        for pdf in pdfs[:2]:
+            extract_and_clean(pdf, cache)
+        victim = cache._path(cache.key(pdfs[0]))
+        scandir = os.scandir
+
+        def scandir_racing_an_eviction(path):
+            entries = list(scandir(path))
+            if os.path.exists(victim) and any(entry.path == victim for entry in entries):
+                os.remove(victim)
+            return entries
+
+        reopened = TextCache(self.tmp.name)
+        with mock.patch.object(text_cache_module.os, 'scandir', side_effect=scandir_racing_an_eviction):
+            extracted, _, _ = extract_and_clean(pdfs[2], reopened)
+        self.assertIn("statement 2", extracted.text)
+        self.assertEqual(reopened.stats()['bytes'], sum(os.path.getsize(reopened._path(reopened.key(pdf)))
+                                                        for pdf in pdfs[1:]))
+
+    def test_failed_write_is_skipped_and_cleaned_up(self):
+        cache = TextCache(self.tmp.name)
+        with mock.patch.object(text_cache_module.os, 'replace', side_effect=OSError(28, "No space left on device")):
+            extracted, _, _ = extract_and_clean(make_pdf("ACME BANK statement"), cache)
+        self.assertIn("ACME BANK", extracted.text)
+        self.assertEqual(cache.stats()['write_errors'], 1)
+        self.assertEqual([name for _, _, names in os.walk(self.tmp.name) for name in names], [])
+
+    def test_disabled_cache_runs_the_stages(self):
+        extracted, cleaned, _ = extract_and_clean(make_pdf("ACME BANK"), TextCache(None))
+        self.assertIn("ACME BANK", extracted.text)
+        self.assertEqual(TextCache(None).stats()['hits'], 0)
+
+    def test_prewarm_directory(self):
+        docs = os.path.join(self.tmp.name, "raw")
+        os.makedirs(os.path.join(docs, "nested"))
+        for name, text in (("a.pdf", "first"), ("nested/b.pdf", "second")):
+            with open(os.path.join(docs, name), "wb") as f:
+                f.write(make_pdf(text))
+        with open(os.path.join(docs, "broken.pdf"), "wb") as f:
+            f.write(b"not a pdf")
+        cache = TextCache(os.path.join(self.tmp.name, "cache"))
+        statuses = sorted(status.split()[0] for _, status in prewarm([docs], cache, parallel=False))
+        self.assertEqual(statuses, ["added", "added", "failed"])
+        statuses = sorted(status.split()[0] for _, status in prewarm([docs], cache, parallel=False))
+        self.assertEqual(statuses, ["cached", "cached", "failed"])
+
+
+class TestPipelineUsesTextCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        saved = document_pipeline.text_cache, document_pipeline.result_cache
+        self.addCleanup(lambda: setattr_many(document_pipeline, saved))
+        document_pipeline.text_cache = TextCache(self.tmp.name)
+        document_pipeline.result_cache = ResultCache()
+
+    def test_second_upload_reads_cached_text(self):
+        pdf = make_pdf("ACME BANK statement dated 2024-01-15")
+        first = document_pipeline.process_upload(pdf, "a.pdf")
+        document_pipeline.result_cache.invalidate()
+        with mock.patch.object(text_cache_module, 'extract_with_ocr', side_effect=AssertionError):
+            second = document_pipeline.process_upload(pdf, "a.pdf")
+        self.assertEqual(first, second)
+        self.assertEqual(document_pipeline.text_cache.stats()['hits'], 1)
+
+
+def setattr_many(module, saved):
+    module.text_cache, module.result_cache = saved
+
+
+def _arrays(alignment):
+    return list(alignment.clean), list(alignment.orig)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,74 @@
+import os
+import random
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from reference import SAMPLE_LINES, legacy_normalize_text
+from text_cleaner import TextCleaner
+from text_alignment import AlignmentMap
+
+FRAGMENTS = [
+    'rn', 'nn', 'ii', 'cl', 'c1', 'vv', 'vvv', 'O', 'l', 'll', '0', '1', '3', '5', '8', ' ', '  ', '\n', '\t',
+    'ac', 'me', 'exam', 'ple', 'exampl', 'rnarket', 't3', 'st', 'th', 'is', 'a', 'Wor', 'ld', 'HEL', 'lo',
+    'é', 'é', 'Ö', ' ', 'K', '한', 'ß', '—', '$', ',', '.', ':', '/', '@', '#', '"', "'",
+]
+
+
+class TestCompiledCleanerMatchesReference(unittest.TestCase):
+    def test_sample_lines(self):
+        for line in SAMPLE_LINES:
+            self.assertEqual(TextCleaner.normalize_text(line), legacy_normalize_text(line), line)
+
+    def test_random_fragment_soup(self):
+        rng = random.Random(42)
+        for _ in range(3000):
+            text = ''.join(rng.choice(FRAGMENTS) for _ in range(rng.randint(0, 30)))
+            self.assertEqual(TextCleaner.normalize_text(text), legacy_normalize_text(text), repr(text))
+
+    def test_digits_only_text_skips_second_substitutions(self):
+        self.assertEqual(TextCleaner.normalize_text(" 13 58 "), legacy_normalize_text(" 13 58 "))
+        self.assertEqual(TextCleaner.normalize_text(" 13 58 "), "13 58")
+
+
+class TestAlignmentMap(unittest.TestCase):
+    def test_cleaned_text_is_unchanged(self):
+        rng = random.Random(7)
+        for _ in range(1000):
+            text = ''.join(rng.choice(FRAGMENTS) for _ in range(rng.randint(0, 30)))
+            cleaned, alignment = TextCleaner.normalize_text(text, return_alignment=True)
+            self.assertEqual(cleaned, TextCleaner.normalize_text(text))
+            self.assertEqual(alignment.clean_length, len(cleaned))
+            self.assertEqual(alignment.original_length, len(text))
+            self.assertEqual(list(alignment.clean), sorted(alignment.clean), repr(text))
+            self.assertEqual(list(alignment.orig), sorted(alignment.orig), repr(text))
+
+    def test_words_map_back_to_source(self):
+        text = "  @@Th1s is  a   t3st of the rnarket exam ple!! "
+        cleaned, alignment = TextCleaner.normalize_text(text, return_alignment=True)
+        self.assertEqual(cleaned, "This is a test of the market example")
+        spans = {
+            word: text.__getitem__(slice(*alignment.span_to_original(start, start + len(word))))
+            for word, start in (("This", 0), ("test", 10), ("market", 22), ("example", 29))
+        }
+        self.assertEqual(spans, {"This": "Th1s", "test": "t3st", "market": "rnarket", "example": "exam ple"})
+
+    def test_project_entities(self):
+        text = "Effective\n\nDate:   February 3, 2024 ACME BANK"
+        cleaned, alignment = TextCleaner.normalize_text(text, return_alignment=True)
+        start = cleaned.index("ACME")
+        projected = alignment.project_entities({"ORG": [{"text": "ACME BANK", "start": start, "end": start + 9}]})
+        item = projected["ORG"][0]
+        self.assertEqual(text[item["source_start"]:item["source_end"]], "ACME BANK")
+
+    def test_identity_and_composition(self):
+        first = AlignmentMap.from_edits([(2, 4, 1)], 6)  # "ab  cd" -> "ab cd"
+        second = AlignmentMap.from_edits([(0, 1, 0)], 5)  # "ab cd" -> "b cd"
+        combined = first.then(second)
+        self.assertEqual(combined.span_to_original(2, 4), (4, 6))
+        self.assertEqual(AlignmentMap.identity(5).to_original(3), 3)
+
+
+if __name__ == '__main__':
+    unittest.main()